@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+#
+# Poio Tools for Linguists
+#
+# Copyright (C) 2009-2014 Poio Project
+# URL: <http://media.cidles.eu/poio/>
+# For license information, see LICENSE.TXT
+
+"""This module generates synthetic corpora for the benchmark suite. Each
+generator writes a file in one of the input formats of Poio API with a
+configurable number of utterances, words per utterance and tiers. The
+content is deterministic, so two runs with the same parameters parse exactly
+the same data.
+
+"""
+
+from __future__ import unicode_literals
+
+import codecs
+
+from xml.sax.saxutils import escape, quoteattr
+
+GLOSSES = ["PST", "1SG", "DEF", "PL", "ERG", "NEG", "3SG", "LOC"]
+PARTS_OF_SPEECH = ["n", "v", "adj", "adv", "pro", "det"]
+
+
+def _word(utterance, word):
+    return "w{0}x{1}".format(utterance, word)
+
+
+def _stem(utterance, word):
+    return "s{0}x{1}".format(utterance, word)
+
+
+def _gloss(utterance, word):
+    return GLOSSES[(utterance + word) % len(GLOSSES)]
+
+
+def _pos(utterance, word):
+    return PARTS_OF_SPEECH[(utterance * 7 + word) % len(PARTS_OF_SPEECH)]
+
+
+def generate_eaf(filepath, utterances=100, words=8, tiers=2, aligned=True,
+                 utterance_duration=2000):
+    """Write a synthetic Elan EAF file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the output file.
+    utterances : int
+        Number of annotations on the utterance tier.
+    words : int
+        Number of words per utterance.
+    tiers : int
+        Number of symbolic tiers that depend on the word tier.
+    aligned : bool
+        Whether the word tier is time-aligned (Time_Subdivision) or
+        symbolic (Symbolic_Subdivision).
+    utterance_duration : int
+        Length of each utterance in milliseconds.
+
+    """
+
+    time_slots = []
+    utterance_annotations = []
+    word_annotations = []
+    dependent_annotations = [[] for _ in range(tiers)]
+
+    annotation_id = 0
+    for u in range(utterances):
+        start = u * utterance_duration
+        end = start + utterance_duration
+        time_slots.append(start)
+        ts_start = len(time_slots)
+        annotation_id += 1
+        utterance_id = "a{0}".format(annotation_id)
+        utterance_annotations.append(
+            '<ALIGNABLE_ANNOTATION ANNOTATION_ID="{0}" TIME_SLOT_REF1="ts{1}" '
+            'TIME_SLOT_REF2="ts{2}"><ANNOTATION_VALUE>{3}</ANNOTATION_VALUE>'
+            '</ALIGNABLE_ANNOTATION>'.format(
+                utterance_id, ts_start, ts_start + words,
+                " ".join(_word(u, w) for w in range(words))))
+
+        previous_word_id = None
+        step = utterance_duration // words
+        for w in range(words):
+            if w > 0:
+                time_slots.append(start + w * step)
+            annotation_id += 1
+            word_id = "a{0}".format(annotation_id)
+            if aligned:
+                word_annotations.append(
+                    '<ALIGNABLE_ANNOTATION ANNOTATION_ID="{0}" '
+                    'TIME_SLOT_REF1="ts{1}" TIME_SLOT_REF2="ts{2}">'
+                    '<ANNOTATION_VALUE>{3}</ANNOTATION_VALUE>'
+                    '</ALIGNABLE_ANNOTATION>'.format(
+                        word_id, ts_start + w, ts_start + w + 1,
+                        _word(u, w)))
+            else:
+                previous = ""
+                if previous_word_id is not None:
+                    previous = ' PREVIOUS_ANNOTATION="{0}"'.format(
+                        previous_word_id)
+                word_annotations.append(
+                    '<REF_ANNOTATION ANNOTATION_ID="{0}" '
+                    'ANNOTATION_REF="{1}"{2}><ANNOTATION_VALUE>{3}'
+                    '</ANNOTATION_VALUE></REF_ANNOTATION>'.format(
+                        word_id, utterance_id, previous, _word(u, w)))
+            previous_word_id = word_id
+
+            for t in range(tiers):
+                annotation_id += 1
+                if t % 2 == 0:
+                    value = _gloss(u, w)
+                else:
+                    value = _pos(u, w)
+                dependent_annotations[t].append(
+                    '<REF_ANNOTATION ANNOTATION_ID="a{0}" '
+                    'ANNOTATION_REF="{1}"><ANNOTATION_VALUE>{2}'
+                    '</ANNOTATION_VALUE></REF_ANNOTATION>'.format(
+                        annotation_id, word_id, value))
+        time_slots.append(end)
+
+    f = codecs.open(filepath, "w", "utf-8")
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<ANNOTATION_DOCUMENT AUTHOR="" DATE="2014-01-01T00:00:00+00:00" '
+            'FORMAT="2.7" VERSION="2.7">\n')
+    f.write('<HEADER MEDIA_FILE="" TIME_UNITS="milliseconds">'
+            '<MEDIA_DESCRIPTOR MEDIA_URL="file:///benchmark.wav" '
+            'MIME_TYPE="audio/x-wav"/></HEADER>\n')
+
+    f.write('<TIME_ORDER>\n')
+    for i, value in enumerate(time_slots):
+        f.write('<TIME_SLOT TIME_SLOT_ID="ts{0}" TIME_VALUE="{1}"/>\n'.format(
+            i + 1, value))
+    f.write('</TIME_ORDER>\n')
+
+    def write_tier(tier_id, linguistic_type, annotations, parent=None):
+        parent_ref = ""
+        if parent is not None:
+            parent_ref = ' PARENT_REF="{0}"'.format(parent)
+        f.write('<TIER DEFAULT_LOCALE="en" LINGUISTIC_TYPE_REF="{0}" '
+                'TIER_ID="{1}"{2}>\n'.format(linguistic_type, tier_id,
+                                             parent_ref))
+        for a in annotations:
+            f.write('<ANNOTATION>{0}</ANNOTATION>\n'.format(a))
+        f.write('</TIER>\n')
+
+    write_tier("Utterance", "utterance", utterance_annotations)
+    write_tier("Words", "words", word_annotations, "Utterance")
+    for t in range(tiers):
+        write_tier("Dependent{0}".format(t), "dependent{0}".format(t),
+                   dependent_annotations[t], "Words")
+
+    f.write('<LINGUISTIC_TYPE GRAPHIC_REFERENCES="false" '
+            'LINGUISTIC_TYPE_ID="utterance" TIME_ALIGNABLE="true"/>\n')
+    if aligned:
+        f.write('<LINGUISTIC_TYPE CONSTRAINTS="Time_Subdivision" '
+                'GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="words" '
+                'TIME_ALIGNABLE="true"/>\n')
+    else:
+        f.write('<LINGUISTIC_TYPE CONSTRAINTS="Symbolic_Subdivision" '
+                'GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="words" '
+                'TIME_ALIGNABLE="false"/>\n')
+    for t in range(tiers):
+        f.write('<LINGUISTIC_TYPE CONSTRAINTS="Symbolic_Association" '
+                'GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="dependent{0}" '
+                'TIME_ALIGNABLE="false"/>\n'.format(t))
+    f.write('<LOCALE COUNTRY_CODE="US" LANGUAGE_CODE="en"/>\n')
+    f.write('</ANNOTATION_DOCUMENT>\n')
+    f.close()
+
+
+def generate_toolbox(filepath, utterances=100, words=8, tiers=3, **kwargs):
+    """Write a synthetic Toolbox text file with one record per utterance.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the output file.
+    utterances : int
+        Number of records.
+    words : int
+        Number of words per record.
+    tiers : int
+        Number of interlinear tiers below the word tier, in the order
+        morpheme, gloss and part of speech (at most 3).
+
+    """
+
+    markers = ["mb", "ge", "ps"][:max(0, min(tiers, 3))]
+
+    f = codecs.open(filepath, "w", "utf-8")
+    f.write("\\_sh v3.0  1801 Text\n\n\\id benchmark\n\n")
+    for u in range(utterances):
+        columns = {"tx": [], "mb": [], "ge": [], "ps": []}
+        for w in range(words):
+            columns["tx"].append(_word(u, w))
+            columns["mb"].append(_stem(u, w))
+            columns["ge"].append(_gloss(u, w))
+            columns["ps"].append(_pos(u, w))
+
+        widths = [max(len(columns[m][w]) for m in ["tx"] + markers) + 1
+                  for w in range(words)]
+
+        f.write("\\ref bench.{0:06d}\n".format(u))
+        for marker in ["tx"] + markers:
+            line = "".join(value.ljust(width) for value, width in
+                           zip(columns[marker], widths))
+            f.write("\\{0} {1}\n".format(marker, line.rstrip()))
+        f.write("\n\\ft translation of utterance {0}\n\n".format(u))
+    f.close()
+
+
+def generate_typecraft(filepath, utterances=100, words=8, **kwargs):
+    """Write a synthetic Typecraft XML file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the output file.
+    utterances : int
+        Number of phrases.
+    words : int
+        Number of words per phrase. Every word has one part of speech, one
+        morpheme and one gloss.
+
+    """
+
+    f = codecs.open(filepath, "w", "utf-8")
+    f.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n')
+    f.write('<typecraft xmlns="http://typecraft.org/typecraft">\n')
+    for u in range(utterances):
+        f.write('<phrase valid="VALID" id="{0}">\n'.format(u + 1))
+        f.write('<original>{0}</original>\n'.format(
+            escape(" ".join(_word(u, w) for w in range(words)))))
+        f.write('<translation>translation of phrase {0}</translation>\n'
+                .format(u))
+        f.write('<description></description>\n')
+        for w in range(words):
+            f.write('<word head="false" text={0}>\n'.format(
+                quoteattr(_word(u, w))))
+            f.write('<pos>{0}</pos>\n'.format(_pos(u, w).upper()))
+            f.write('<morpheme baseform={0} text={0}>\n'.format(
+                quoteattr(_stem(u, w))))
+            f.write('<gloss>{0}</gloss>\n'.format(_gloss(u, w)))
+            f.write('</morpheme>\n</word>\n')
+        f.write('</phrase>\n')
+    f.write('</typecraft>\n')
+    f.close()
+
+
+def generate_odin(filepath, utterances=100, words=8, sources=10, **kwargs):
+    """Write a synthetic ODIN XML file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the output file.
+    utterances : int
+        Number of IGT examples, distributed evenly over the sources.
+    words : int
+        Number of words per example. Every second word consists of two
+        morphemes separated by a hyphen.
+    sources : int
+        Number of source documents.
+
+    """
+
+    sources = max(1, min(sources, utterances))
+
+    f = codecs.open(filepath, "w", "utf-8")
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<language name="Benchmark" code="bnc" createdAt="2014-01-01">\n')
+    f.write('<sources>\n')
+    u = 0
+    for s in range(sources):
+        f.write('<source verified="High">\n')
+        f.write('<url>http://example.org/source{0}.pdf</url>\n'.format(s))
+        f.write('<odin>http://example.org/igt?id={0}</odin>\n'.format(s))
+        f.write('<citation>Benchmark source {0}</citation>\n'.format(s))
+        f.write('<igt>\n')
+        examples = utterances // sources
+        if s < utterances % sources:
+            examples += 1
+        for _ in range(examples):
+            original = []
+            glosses = []
+            for w in range(words):
+                if w % 2 == 0:
+                    original.append("{0}-{1}".format(_stem(u, w), "ka"))
+                    glosses.append("{0}-{1}".format("go", _gloss(u, w)))
+                else:
+                    original.append(_word(u, w))
+                    glosses.append(_gloss(u, w).lower())
+            f.write('<example>\n')
+            f.write('<line>({0})  {1}</line>\n'.format(
+                u + 1, escape(" ".join(original))))
+            f.write('<line>{0}</line>\n'.format(escape(" ".join(glosses))))
+            f.write("<line>`translation of example {0}'</line>\n".format(u))
+            f.write('</example>\n')
+            u += 1
+        f.write('</igt>\n')
+        f.write('</source>\n')
+    f.write('</sources>\n')
+    f.write('</language>\n')
+    f.close()
+
+
+generators = {
+    "eaf": generate_eaf,
+    "toolbox": generate_toolbox,
+    "typecraft": generate_typecraft,
+    "odin": generate_odin
+}
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+#
+# Poio Tools for Linguists
+#
+# Copyright (C) 2009-2014 Poio Project
+# URL: <http://media.cidles.eu/poio/>
+# For license information, see LICENSE.TXT
+
+"""Benchmark suite for the parsers, the GrAF converter and the writers of
+Poio API.
+
+For every input format the script generates a synthetic corpus and measures
+the time of the parser, the time of GrAFConverter.parse(), the peak memory of
+parsing and conversion and the throughput of the writers. Instead of the
+synthetic corpus, input files of one format can be passed as arguments. For
+ODIN files the time of the line sanitization is measured separately. The
+results are written as JSON, a previous result file can be passed with
+"--compare" to print the relative change of every measurement.
+
+Example:
+
+    python run_benchmarks.py -u 2000 -w 10 -o results.json
+    python run_benchmarks.py -u 2000 -w 10 -c results.json
+    python run_benchmarks.py -f odin -o odin.json /data/odin/*.xml
+
+"""
+
+from __future__ import print_function
+
+import sys
+import os
+import copy
+import json
+import time
+import shutil
+import tempfile
+import platform
+import optparse
+import datetime
+
+import xml.etree.ElementTree as ET
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import poioapi
+import poioapi.annotationgraph
+import poioapi.data
+import poioapi.io.elan
+import poioapi.io.graf
+import poioapi.io.latex
+import poioapi.io.odin
+import poioapi.io.toolbox
+import poioapi.io.typecraft
+
+import corpora
+
+# Use the best available clock for timings
+if hasattr(time, "perf_counter"):
+    clock = time.perf_counter
+else:
+    clock = time.time
+
+
+def _parser_for_format(file_format, filepath):
+    if file_format == "eaf":
+        return poioapi.io.elan.Parser(filepath)
+    elif file_format == "toolbox":
+        return poioapi.io.toolbox.Parser(open(filepath, "rb"))
+    elif file_format == "typecraft":
+        return poioapi.io.typecraft.Parser(filepath)
+    elif file_format == "odin":
+        return poioapi.io.odin.Parser(filepath)
+
+
+def _annotation_graph(file_format, converter):
+    """Build an AnnotationGraph from a converter in the same way as
+    AnnotationGraph._from_file() does, but without parsing again.
+
+    """
+
+    ag = poioapi.annotationgraph.AnnotationGraph()
+    ag.tier_hierarchies = converter.tier_hierarchies
+    ag.tier_tree = converter.tier_tree
+    ag.region_tables = converter.region_tables
+    ag.meta_information = copy.deepcopy(converter.meta_information)
+    ag.root_tiers = converter.root_tiers
+    ag.graf = converter.graf
+    ag.primary_data = converter.primary_data
+    ag.structure_type_handler = poioapi.data.DataStructureType(
+        ag.tier_hierarchies[0])
+
+    if file_format == "eaf":
+        ag.source_type = poioapi.data.EAF
+    elif file_format == "toolbox":
+        ag.source_type = poioapi.data.TOOLBOX
+        ag.tier_mapper = poioapi.io.toolbox.tier_mapping()
+    elif file_format == "typecraft":
+        ag.source_type = poioapi.data.TYPECRAFT
+    elif file_format == "odin":
+        ag.source_type = poioapi.data.ODIN
+        ag.tier_mapper = poioapi.io.odin.tier_mapping()
+        ag.meta_information = converter.parser.metadata
+
+    return ag
+
+
+def _write_graf(ag, outputdir):
+    poioapi.io.graf.Writer().write(os.path.join(outputdir, "out.hdr"), ag)
+
+
+def _write_elan(ag, outputdir):
+    ag.to_elan(os.path.join(outputdir, "out.eaf"))
+
+
+def _write_typecraft(ag, outputdir):
+    poioapi.io.typecraft.Writer().write(
+        os.path.join(outputdir, "out.xml"), ag)
+
+
+def _write_latex(ag, outputdir):
+    poioapi.io.latex.Writer().write(os.path.join(outputdir, "out.tex"), ag)
+
+
+writers_for_format = {
+    "eaf": [("graf", _write_graf), ("elan", _write_elan)],
+    "toolbox": [("graf", _write_graf), ("typecraft", _write_typecraft),
+                ("latex", _write_latex)],
+    "typecraft": [("graf", _write_graf)],
+    "odin": [("graf", _write_graf), ("typecraft", _write_typecraft)]
+}
+
+
+def _odin_lines(filepath):
+    """Return the language name of an ODIN file and the text of its <line>
+    elements, grouped by their position in the example.
+
+    """
+
+    language = None
+    lines = ([], [], [])
+    for event, element in ET.iterparse(filepath, events=("start", "end")):
+        if event == "start":
+            if language is None and element.tag == "language":
+                language = element.get("name", None)
+        elif element.tag == "example":
+            for i, line in enumerate(element.findall("line")[:3]):
+                if line.text is not None:
+                    lines[i].append(line.text)
+            element.clear()
+
+    return language, lines
+
+
+def _benchmark_odin_sanitization(filepath, repeat):
+    """Measure the line sanitization of the ODIN parser for all <line>
+    elements of a file, which dominates the import of large ODIN
+    collections.
+
+    """
+
+    language, (first, second, third) = _odin_lines(filepath)
+
+    # A parser object without a parsed file, only for the sanitization
+    parser = poioapi.io.odin.Parser.__new__(poioapi.io.odin.Parser)
+    parser._full_lang = language
+
+    sanitize_times = []
+    for _ in range(repeat):
+        start = clock()
+        for line in first:
+            parser._sanitize_line(line, False)
+        for line in second:
+            parser._sanitize_line(line, False)
+        for line in third:
+            parser._clean_translation_line(line)
+        sanitize_times.append(clock() - start)
+
+    nr_of_lines = len(first) + len(second) + len(third)
+    sanitize_seconds = min(sanitize_times)
+    return {
+        "examples": len(first),
+        "lines": nr_of_lines,
+        "sanitize_seconds": sanitize_seconds,
+        "lines_per_second":
+            nr_of_lines / sanitize_seconds if sanitize_seconds else None
+    }
+
+
+# Additional measurements that only apply to one input format
+extra_benchmarks_for_format = {
+    "odin": _benchmark_odin_sanitization
+}
+
+
+def _directory_size(directory):
+    size = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            size += os.path.getsize(os.path.join(dirpath, filename))
+    return size
+
+
+def _parse_and_convert(file_format, filepath):
+    start = clock()
+    parser = _parser_for_format(file_format, filepath)
+    parse_time = clock() - start
+
+    start = clock()
+    converter = poioapi.io.graf.GrAFConverter(parser)
+    converter.parse()
+    convert_time = clock() - start
+
+    return converter, parse_time, convert_time
+
+
+def _peak_memory(file_format, filepath):
+    """Return the peak of the memory allocated by Python while parsing and
+    converting the given file, or None if tracemalloc is not available.
+
+    """
+
+    if tracemalloc is None:
+        return None
+
+    tracemalloc.start()
+    try:
+        _parse_and_convert(file_format, filepath)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def benchmark_format(file_format, workdir, repeat=3, filepath=None,
+        **params):
+    """Run the benchmarks for one input format.
+
+    Parameters
+    ----------
+    file_format : str
+        One of the keys of corpora.generators.
+    workdir : str
+        Directory for the generated corpus and the writer output.
+    repeat : int
+        Number of runs, the best time of all runs is reported.
+    filepath : str
+        An input file of the format. If None a synthetic corpus is
+        generated.
+    params : dict
+        Parameters for the corpus generator.
+
+    Returns
+    -------
+    result : dict
+        The measurements for the format.
+
+    """
+
+    if not os.path.exists(workdir):
+        os.makedirs(workdir)
+
+    if filepath is None:
+        filepath = os.path.join(workdir, "corpus.{0}".format(file_format))
+        corpora.generators[file_format](filepath, **params)
+
+    parse_times = []
+    convert_times = []
+    converter = None
+    for _ in range(repeat):
+        converter, parse_time, convert_time = _parse_and_convert(
+            file_format, filepath)
+        parse_times.append(parse_time)
+        convert_times.append(convert_time)
+
+    nr_of_nodes = len(converter.graf.nodes)
+    result = {
+        "input_bytes": os.path.getsize(filepath),
+        "parse_seconds": min(parse_times),
+        "convert_seconds": min(convert_times),
+        "peak_memory_bytes": _peak_memory(file_format, filepath),
+        "nodes": nr_of_nodes,
+        "edges": len(converter.graf.edges),
+        "regions": len(converter.graf.regions),
+        "writers": {}
+    }
+
+    if file_format in extra_benchmarks_for_format:
+        result.update(extra_benchmarks_for_format[file_format](filepath,
+            repeat))
+
+    for name, write in writers_for_format[file_format]:
+        outputdir = os.path.join(workdir, "{0}-{1}".format(file_format, name))
+        write_times = []
+        try:
+            for _ in range(repeat):
+                if os.path.exists(outputdir):
+                    shutil.rmtree(outputdir)
+                os.makedirs(outputdir)
+                ag = _annotation_graph(file_format, converter)
+
+                start = clock()
+                write(ag, outputdir)
+                write_times.append(clock() - start)
+        except Exception as e:
+            # A broken writer should not hide the results of the others
+            result["writers"][name] = {"error": repr(e)}
+            continue
+
+        seconds = min(write_times)
+        output_bytes = _directory_size(outputdir)
+        result["writers"][name] = {
+            "seconds": seconds,
+            "output_bytes": output_bytes,
+            "nodes_per_second": nr_of_nodes / seconds if seconds else None,
+            "bytes_per_second": output_bytes / seconds if seconds else None
+        }
+
+    return result
+
+
+def run(formats, repeat=3, filepaths=None, **params):
+    """Run the benchmarks for a list of formats and return the results
+    together with information about the environment. If a list of input
+    files is given, the files are benchmarked instead of synthetic corpora,
+    all files must have the format of the one element of formats.
+
+    """
+
+    workdir = tempfile.mkdtemp(prefix="poioapi-benchmark-")
+    try:
+        results = {}
+        if filepaths:
+            file_format = formats[0]
+            for i, filepath in enumerate(filepaths):
+                key = "{0}:{1}".format(file_format,
+                    os.path.basename(filepath))
+                results[key] = benchmark_format(file_format,
+                    os.path.join(workdir, "{0}-{1}".format(file_format, i)),
+                    repeat, filepath)
+        else:
+            for file_format in formats:
+                results[file_format] = benchmark_format(
+                    file_format, os.path.join(workdir, file_format), repeat,
+                    **params)
+    finally:
+        shutil.rmtree(workdir)
+
+    if filepaths:
+        params = {}
+
+    return {
+        "created": datetime.datetime.utcnow().isoformat(),
+        "poioapi_version": _poioapi_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": dict(params, repeat=repeat),
+        "results": results
+    }
+
+
+def _poioapi_version():
+    version_file = os.path.join(os.path.dirname(poioapi.__file__), "VERSION")
+    if os.path.exists(version_file):
+        with open(version_file) as f:
+            return f.read().strip()
+    return None
+
+
+def _flatten_measurements(results):
+    """Flatten the nested results into a dict of "format.measurement" keys
+    and numeric values.
+
+    """
+
+    flat = {}
+    for file_format, result in results.items():
+        for key, value in result.items():
+            if key == "writers":
+                for writer, measurements in value.items():
+                    for m, v in measurements.items():
+                        if m == "error":
+                            continue
+                        flat["{0}.{1}.{2}".format(file_format, writer, m)] = v
+            else:
+                flat["{0}.{1}".format(file_format, key)] = value
+    return flat
+
+
+def compare(previous, current):
+    """Compare two result dicts and return a list of tuples with the
+    measurement name, the previous value, the current value and the relative
+    change.
+
+    """
+
+    previous = _flatten_measurements(previous["results"])
+    current = _flatten_measurements(current["results"])
+
+    rows = []
+    for key in sorted(current):
+        if key not in previous:
+            continue
+        old, new = previous[key], current[key]
+        if not old or new is None:
+            continue
+        rows.append((key, old, new, (new - old) / float(old)))
+    return rows
+
+
+def main(argv):
+    usage = "usage: %prog [options] [input files]"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-f", "--formats", dest="formats",
+        default="eaf,toolbox,typecraft,odin",
+        help="Comma separated list of formats (eaf|toolbox|typecraft|odin)")
+    parser.add_option("-u", "--utterances", dest="utterances", type="int",
+        default=500, help="Number of utterances of the synthetic corpora")
+    parser.add_option("-w", "--words", dest="words", type="int", default=8,
+        help="Number of words per utterance")
+    parser.add_option("-t", "--tiers", dest="tiers", type="int", default=2,
+        help="Number of dependent tiers below the word tier (eaf, toolbox)")
+    parser.add_option("-s", "--symbolic", action="store_true",
+        dest="symbolic", default=False,
+        help="Use a symbolic word tier instead of a time-aligned one (eaf)")
+    parser.add_option("-r", "--repeat", dest="repeat", type="int", default=3,
+        help="Number of runs per measurement, the best run is reported")
+    parser.add_option("-o", "--output", dest="output",
+        help="Write the results as JSON to this file")
+    parser.add_option("-c", "--compare", dest="compare",
+        help="Compare the results with a previous JSON result file")
+    (options, files) = parser.parse_args(argv[1:])
+
+    formats = [f.strip() for f in options.formats.split(",") if f.strip()]
+    for f in formats:
+        if f not in corpora.generators:
+            parser.print_usage()
+            sys.exit(1)
+    if len(files) > 0 and len(formats) != 1:
+        parser.error("input files need exactly one format in --formats")
+
+    results = run(formats, repeat=options.repeat, filepaths=files,
+        utterances=options.utterances, words=options.words,
+        tiers=options.tiers, aligned=not options.symbolic)
+
+    dump = json.dumps(results, indent=4, sort_keys=True)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(dump)
+    else:
+        print(dump)
+
+    if options.compare:
+        with open(options.compare) as f:
+            previous = json.load(f)
+        for key, old, new, change in compare(previous, results):
+            print("{0:<45} {1:>14.4f} {2:>14.4f} {3:>+8.1%}".format(
+                key, old, new, change))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
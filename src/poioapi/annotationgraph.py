@@ -12,6 +12,7 @@ from __future__ import absolute_import, unicode_literals
 import sys
 import os.path
 import re
+import copy
 import codecs
 
 from xml.dom import minidom
@@ -29,6 +30,7 @@ import poioapi.io.odin
 
 import poioapi.data
 import poioapi.mapper
+import poioapi.regions
 
 import graf
 
@@ -51,6 +53,8 @@ class AnnotationGraph():
 
         self.graf = None
         self.tier_hierarchies = None
+        self.tier_tree = None
+        self.region_tables = {}
         self.meta_information = None
         self.root_tiers = []
         self.primary_data = None
@@ -60,64 +64,75 @@ class AnnotationGraph():
         self.filtered_node_ids = []
 
         self.tier_mapper = poioapi.mapper.TierMapper()
+        self.conversion_stats = None
 
     @classmethod
-    def from_elan(cls, stream):
+    def from_elan(cls, stream, stats=None):
         """This method generates a GrAF object
         from a Elan file.
 
         """
-        return cls._from_file(stream, poioapi.data.EAF)
+        return cls._from_file(stream, poioapi.data.EAF, stats=stats)
 
     @classmethod
-    def from_mandinka(cls, stream, tier_map_file_path=''):
+    def from_mandinka(cls, stream, tier_map_file_path='', stats=None):
         """This method generates a GrAF object
         from a Elan file.
 
         """
-        cls.tier_mapper = poioapi.io.mandinka.tier_mapping()
-        return cls._from_file(stream, poioapi.data.MANDINKA, tier_map_file_path=tier_map_file_path)
+        return cls._from_file(stream, poioapi.data.MANDINKA,
+                              tier_labels_file_path=tier_map_file_path,
+                              tier_mapper=poioapi.io.mandinka.tier_mapping(),
+                              stats=stats)
 
     @classmethod
-    def from_obt(cls, stream):
+    def from_obt(cls, stream, stats=None):
         """This method generates a GrAF object
         from a Elan file.
 
         """
-        return cls._from_file(stream, poioapi.data.OBT)
+        return cls._from_file(stream, poioapi.data.OBT,
+                              tier_mapper=poioapi.io.obt.tier_mapping(),
+                              stats=stats)
 
     @classmethod
-    def from_typecraft(cls, stream):
+    def from_typecraft(cls, stream, stats=None):
         """This method generates a GrAF object
         from a Typecraft file.
 
         """
-        return cls._from_file(stream, poioapi.data.TYPECRAFT)
+        return cls._from_file(stream, poioapi.data.TYPECRAFT,
+                              tier_mapper=poioapi.io.typecraft.tier_mapping(),
+                              stats=stats)
 
     @classmethod
-    def from_shoebox(cls, stream):
+    def from_shoebox(cls, stream, stats=None):
         """This method generates a GrAF object
         from a shoebox file.
 
         """
-        return cls._from_file(stream, poioapi.data.SHOEBOX)
+        return cls._from_file(stream, poioapi.data.SHOEBOX,
+                              tier_mapper=poioapi.io.shoebox.tier_mapping(),
+                              stats=stats)
 
     @classmethod
-    def from_toolboxxml(cls, stream):
+    def from_toolboxxml(cls, stream, stats=None):
         """This method generates a GrAF object
         from a xml toolbox file.
 
         """
-        return cls._from_file(stream, poioapi.data.TOOLBOXXML)
+        return cls._from_file(stream, poioapi.data.TOOLBOXXML, stats=stats)
 
     @classmethod
-    def from_toolbox(cls, stream, tier_map_file_path=''):
+    def from_toolbox(cls, stream, tier_map_file_path='', stats=None):
         """This method generates a GrAF object
         from a xml toolbox file.
 
         """
-        cls.tier_mapper = poioapi.io.toolbox.tier_mapping()
-        return cls._from_file(stream, poioapi.data.TOOLBOX, tier_map_file_path=tier_map_file_path)
+        return cls._from_file(stream, poioapi.data.TOOLBOX,
+                              tier_labels_file_path=tier_map_file_path,
+                              tier_mapper=poioapi.io.toolbox.tier_mapping(),
+                              stats=stats)
 
     @classmethod
     def from_graf(cls, stream):
@@ -140,13 +155,15 @@ class AnnotationGraph():
         return ag
 
     @classmethod
-    def from_odin(cls, stream, tier_map_file_path=''):
+    def from_odin(cls, stream, tier_map_file_path='', stats=None):
         """This method generates a GrAF object
         from a xml ODIN file.
 
         """
         return cls._from_file(stream, poioapi.data.ODIN,
-                              tier_map_file_path=tier_map_file_path)
+                              tier_labels_file_path=tier_map_file_path,
+                              tier_mapper=poioapi.io.odin.tier_mapping(),
+                              stats=stats)
 
     def _open_file_(self, filename):
         if sys.version_info[:2] < (3, 0):
@@ -158,6 +175,18 @@ class AnnotationGraph():
     def _from_file(cls, stream, stream_type, tier_labels_file_path='', **kwargs):
         ag = cls()
 
+        # an optional poioapi.io.graf.ConversionStats object that collects
+        # the timings and counts of the conversion
+        stats = kwargs.get('stats', None)
+        if stats is not None:
+            start = poioapi.io.graf.clock()
+
+        # every annotation graph has its own tier mapper, formats with
+        # their own tier labels pass a mapper with their defaults
+        tier_mapper = kwargs.get('tier_mapper', None)
+        if tier_mapper is not None:
+            ag.tier_mapper = tier_mapper
+
         #load aditional tier labels if supplied
         if tier_labels_file_path != '' and tier_labels_file_path is not None:
             ag.tier_mapper.load_mapping(tier_labels_file_path)
@@ -171,12 +200,17 @@ class AnnotationGraph():
         parser = None
         if stream_type == poioapi.data.EAF:
             parser = poioapi.io.elan.Parser(stream)
+            # the tier labels of Elan files are the linguistic types of
+            # the file
+            if tier_mapper is None:
+                ag.tier_mapper = parser.tier_mapping()
         elif stream_type == poioapi.data.MANDINKA:
             if not hasattr(stream, 'read'):
                 stream = codecs.open(stream, "rb")
             parser = poioapi.io.mandinka.Parser(stream, tier_label_map=ag.tier_mapper)
         elif stream_type == poioapi.data.OBT:
-            parser = poioapi.io.obt.Parser(stream)
+            # the phrases are read while the converter needs them
+            parser = poioapi.io.obt.Parser(stream, streaming=True)
         elif stream_type == poioapi.data.TYPECRAFT:
             parser = poioapi.io.typecraft.Parser(stream)
         elif stream_type == poioapi.data.TOOLBOXXML:
@@ -188,26 +222,74 @@ class AnnotationGraph():
                 stream = codecs.open(stream, "rb")
             parser = poioapi.io.toolbox.Parser(stream, mapper=ag.tier_mapper)
         elif stream_type == poioapi.data.ODIN:
-            parser = poioapi.io.odin.Parser(stream)
+            parser = poioapi.io.odin.Parser(stream,
+                tier_label_map=ag.tier_mapper)
+
+        if stats is not None:
+            seconds = poioapi.io.graf.clock() - start
+            stats.add_time(poioapi.io.graf.PHASE_PARSER, seconds)
+            stats.add_time(poioapi.io.graf.PHASE_TOTAL, seconds)
+
+        ag._convert_parser(parser, stream_type, stats)
+
+        return ag
+
+    @classmethod
+    def iter_from_odin(cls, stream, tier_map_file_path=''):
+        """Read an ODIN file one <source> element at a time and yield an
+        annotation graph for each source. Only the current source is kept
+        in memory, the graphs can be processed independently of each other.
+        The annotation IDs are unique in the whole file.
+
+        Parameters
+        ----------
+        stream : str or io.stream
+            The path to the ODIN file or a file object.
+        tier_map_file_path : str
+            The path of a file with additional tier labels.
+
+        Returns
+        -------
+        annotation_graphs : generator of AnnotationGraph
+            An annotation graph for each source of the file.
+
+        """
+
+        tier_mapper = poioapi.io.odin.tier_mapping()
+        if tier_map_file_path != '' and tier_map_file_path is not None:
+            tier_mapper.load_mapping(tier_map_file_path)
+
+        parser = poioapi.io.odin.Parser(None, tier_label_map=tier_mapper)
+        for _ in parser.iter_sources(stream):
+            ag = cls()
+            ag.tier_mapper = tier_mapper
+            ag._convert_parser(parser, poioapi.data.ODIN)
+            yield ag
+
+    def _convert_parser(self, parser, stream_type, stats=None):
+        """Convert the data of a parser to the graph of this object.
 
-        converter = poioapi.io.graf.GrAFConverter(parser)
+        """
+
+        converter = poioapi.io.graf.GrAFConverter(parser, stats=stats)
         converter.parse()
         if stream_type == poioapi.data.ODIN:
             converter.meta_information = parser.metadata
 
-        ag.tier_hierarchies = converter.tier_hierarchies
-        ag.meta_information = converter.meta_information
-        ag.root_tiers = converter.root_tiers
-        ag.graf = converter.graf
-        ag.primary_data = converter.primary_data
+        self.tier_hierarchies = converter.tier_hierarchies
+        self.tier_tree = converter.tier_tree
+        self.region_tables = converter.region_tables
+        self.meta_information = converter.meta_information
+        self.root_tiers = converter.root_tiers
+        self.graf = converter.graf
+        self.primary_data = converter.primary_data
+        self.conversion_stats = converter.stats
 
-        ag.source_type = stream_type
+        self.source_type = stream_type
 
         # set the first tier hierarchy as the default data_structure_type
-        ag.structure_type_handler = \
-            poioapi.data.DataStructureType(ag.tier_hierarchies[0])
-
-        return ag
+        self.structure_type_handler = \
+            poioapi.data.DataStructureType(self.tier_hierarchies[0])
 
 
     ########################################################## Methods
@@ -342,6 +424,246 @@ class AnnotationGraph():
         return self.annotation_value_for_annotation(
             node.annotations.get_first())
 
+    def region_table(self, tier_name):
+        """Return the region table of a time aligned tier. Region tables
+        are only available if NumPy is installed.
+
+        Parameters
+        ----------
+        tier_name : str
+            The name of the tier.
+
+        Returns
+        -------
+        region_table : poioapi.regions.RegionTable
+
+        Raises
+        ------
+        UnknownAnnotationTypeError
+            If the tier has no region table.
+
+        """
+
+        try:
+            return self.region_tables[tier_name]
+        except KeyError:
+            raise poioapi.data.UnknownAnnotationTypeError(
+                "No region table for tier {0}".format(tier_name))
+
+    def _region_tables_for_query(self, tier_name):
+        if tier_name is None:
+            return self.region_tables.items()
+        return [(tier_name, self.region_table(tier_name))]
+
+    def nodes_overlapping(self, start, end, tier_name=None):
+        """Return the nodes whose regions overlap with the time window
+        [start, end).
+
+        Parameters
+        ----------
+        start : float
+            The start of the time window.
+        end : float
+            The end of the time window.
+        tier_name : str
+            The tier to search. If None all tiers with a region table
+            are searched.
+
+        Returns
+        -------
+        nodes : list of graf.Node or dict
+            The nodes ordered by the start of their region. If no tier name
+            was given a dict that maps the tier names to their nodes.
+
+        """
+
+        res = {}
+        for name, table in self._region_tables_for_query(tier_name):
+            res[name] = table.nodes_for_indices(table.overlapping(start, end))
+
+        if tier_name is not None:
+            return res[tier_name]
+        return res
+
+    def nodes_at_time(self, time, tier_name=None):
+        """Return the nodes whose regions contain the given time.
+
+        Parameters
+        ----------
+        time : float
+            The time to look up.
+        tier_name : str
+            The tier to search. If None all tiers with a region table
+            are searched.
+
+        Returns
+        -------
+        nodes : list of graf.Node or dict
+            The nodes ordered by the start of their region. If no tier name
+            was given a dict that maps the tier names to their nodes.
+
+        """
+
+        res = {}
+        for name, table in self._region_tables_for_query(tier_name):
+            res[name] = table.nodes_for_indices(table.at(time))
+
+        if tier_name is not None:
+            return res[tier_name]
+        return res
+
+    def duration_for_tier(self, tier_name, by_value=False):
+        """Return the total duration of the regions of a tier.
+
+        Parameters
+        ----------
+        tier_name : str
+            The name of the tier.
+        by_value : bool
+            Whether to return the duration for each annotation value.
+
+        Returns
+        -------
+        duration : float or dict
+            The total duration or a dict that maps each annotation value
+            to its total duration.
+
+        """
+
+        table = self.region_table(tier_name)
+        if by_value:
+            return table.duration_by_value()
+        return table.total_duration()
+
+    def _root_nodes_overlapping(self, tier_name, start, end):
+        """Return the nodes of a root tier whose regions overlap with the
+        time window [start, end), in the order of the graph. Uses the
+        region table of the tier if there is one.
+
+        """
+
+        if tier_name in self.region_tables:
+            table = self.region_tables[tier_name]
+            indices = sorted(table.node_indices[table.overlapping(start, end)])
+            return [table.nodes[i] for i in indices]
+
+        res = []
+        for node in self.nodes_for_tier(tier_name):
+            if node.links:
+                anchors = node.links[0][0].anchors
+                if float(anchors[0]) < end and float(anchors[1]) > start:
+                    res.append(node)
+        return res
+
+    def slice_time(self, start, end):
+        """Return a new annotation graph that contains the root nodes
+        whose regions overlap with the time window [start, end), all their
+        descendants, their regions and annotations. The root nodes are found
+        with the region tables of the root tiers. The new graph has its own
+        copies of the nodes and of the meta information, so that it can be
+        changed and written with to_elan() or to_graf() independently of
+        this graph, the root tiers, the tier hierarchies, the primary data and
+        the tier mapper are copied as well.
+
+        Parameters
+        ----------
+        start : float
+            The start of the time window, in the unit of the regions (e.g.
+            milliseconds for Elan files).
+        end : float
+            The end of the time window.
+
+        Returns
+        -------
+        annotation_graph : AnnotationGraph
+            The annotation graph of the time window.
+
+        """
+
+        tier_tree = poioapi.data.tier_tree_for(self)
+
+        ag = AnnotationGraph(self.structure_type_handler)
+        ag.graf = graf.Graph()
+        ag.root_tiers = list(self.root_tiers)
+        ag.primary_data = copy.copy(self.primary_data)
+        ag.source_type = self.source_type
+        ag.tier_mapper = copy.copy(self.tier_mapper)
+
+        graph = ag.graf
+        header_roots = set(self.graf.header.roots)
+        region_rows = {}
+        anchors = set()
+
+        hierarchies = []
+        for hierarchy in tier_tree.hierarchies:
+            root_nodes = self._root_nodes_overlapping(hierarchy[0], start,
+                end)
+            if len(root_nodes) == 0:
+                continue
+            hierarchies.append(copy.deepcopy(hierarchy))
+
+            # Copy the nodes depth-first in the order of the original graph,
+            # the stack holds the original nodes with their new parent
+            stack = [(n, None) for n in reversed(root_nodes)]
+            while stack:
+                node, parent = stack.pop()
+
+                new_node = graf.Node(node.id)
+                graph.nodes.add(new_node)
+                if parent is not None:
+                    graph.create_edge(parent, new_node, node.in_edges[0].id)
+                elif node.id in header_roots:
+                    graph.header.roots.append(node.id)
+
+                for a in node.annotations:
+                    new_annotation = graf.Annotation(a.label,
+                        copy.copy(a.features), a.id)
+                    new_node.annotations.add(new_annotation)
+                    if a.label not in graph.annotation_spaces:
+                        graph.annotation_spaces.add(
+                            graf.AnnotationSpace(a.label))
+                    graph.annotation_spaces[a.label].add(new_annotation)
+
+                if node.links:
+                    region = node.links[0][0]
+                    new_region = graf.Region(region.id, *region.anchors)
+                    new_node.add_region(new_region)
+                    graph.regions.add(new_region)
+                    anchors.update("{0}".format(a) for a in region.anchors)
+                    tier_name = node.id.rpartition(
+                        poioapi.io.graf.GRAFSEPARATOR)[0]
+                    region_rows.setdefault(tier_name, []).append(
+                        (region.anchors, new_node,
+                         self.annotation_value_for_node(node)))
+
+                children = list(node.iter_children())
+                for child in reversed(children):
+                    stack.append((child, new_node))
+
+        ag.tier_tree = poioapi.data.TierTree(hierarchies)
+        ag.tier_hierarchies = hierarchies
+        ag.region_tables = poioapi.regions.region_tables_for_rows(region_rows)
+        ag.meta_information = self._meta_information_for_slice(anchors)
+
+        return ag
+
+    def _meta_information_for_slice(self, anchors):
+        """Return a copy of the meta information for a slice of the graph.
+        For Elan files only the time slots of the given anchors are kept.
+
+        """
+
+        meta_information = copy.deepcopy(self.meta_information)
+
+        if hasattr(meta_information, 'find'):
+            time_order = meta_information.find('TIME_ORDER')
+            if time_order is not None:
+                for time_slot in list(time_order):
+                    if time_slot.attrib.get('TIME_VALUE') not in anchors:
+                        time_order.remove(time_slot)
+
+        return meta_information
+
     def as_html_table(self, filtered = False, full_html = True):
         """Return the graph as a HTML table.
 
@@ -442,6 +764,7 @@ class AnnotationGraph():
             None, poioapi.io.elan.Writer())
         converter.graf = self.graf
         converter.tier_hierarchies = self.tier_hierarchies
+        converter.tier_tree = self.tier_tree
         converter.meta_information = self.meta_information
         converter.write(outputfile)
 
@@ -459,6 +782,7 @@ class AnnotationGraph():
             None, poioapi.io.graf.Writer())
         converter.graf = self.graf
         converter.tier_hierarchies = self.tier_hierarchies
+        converter.tier_tree = self.tier_tree
         converter.meta_information = self.meta_information
         converter.write(outputfile)
 
@@ -647,7 +971,7 @@ class AnnotationGraph():
 
         filter = AnnotationGraphFilter(self)
         for k in search_dict:
-            if k in self.structure_type_handler.flat_data_hierarchy:
+            if k in self.structure_type_handler:
                 filter.set_filter_for_tier(k, search_dict[k])
         return filter
 
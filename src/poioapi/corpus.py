@@ -17,9 +17,676 @@ work items.
 
 from __future__ import unicode_literals
 
+import os
+import json
+import tempfile
+import itertools
+import unicodedata
+
 import poioapi.data
-import poioapi.annotationtree
 import poioapi.annotationgraph
+import poioapi.io.graf
+
+# The methods of AnnotationGraph that load each file type
+loader_for_filetype = {
+    poioapi.data.EAF: "from_elan",
+    poioapi.data.EAFFROMTOOLBOX: "from_elan",
+    poioapi.data.TYPECRAFT: "from_typecraft",
+    poioapi.data.TOOLBOX: "from_toolbox",
+    poioapi.data.TOOLBOXXML: "from_toolboxxml",
+    poioapi.data.SHOEBOX: "from_shoebox",
+    poioapi.data.OBT: "from_obt",
+    poioapi.data.MANDINKA: "from_mandinka",
+    poioapi.data.ODIN: "from_odin"
+}
+
+
+def load_graph(filepath, filetype):
+    """Load a file of the corpus as annotation graph.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+    filetype : int
+        The file type, one of the file types of poioapi.data.
+
+    Returns
+    -------
+    annotation_graph : poioapi.annotationgraph.AnnotationGraph
+        The annotation graph of the file.
+
+    Raises
+    ------
+    UnknownFileFormatError
+        If the file type is not supported.
+
+    """
+
+    if filetype not in loader_for_filetype:
+        raise poioapi.data.UnknownFileFormatError()
+
+    loader = getattr(poioapi.annotationgraph.AnnotationGraph,
+        loader_for_filetype[filetype])
+    return loader(filepath)
+
+
+def _mtime(filepath):
+    try:
+        return os.path.getmtime(filepath)
+    except (OSError, TypeError):
+        return None
+
+
+def _slice_length(start, stop, step):
+    if step > 0:
+        return max(0, (stop - start + step - 1) // step)
+    return max(0, (start - stop - step - 1) // -step)
+
+
+def _nodes_for_tier_type(annotation_graph, tier_type, parent_node=None):
+    """Return the nodes of all tiers of a tier type, below a parent node or
+    in the whole graph. The tiers are the tier labels of the graph's tier
+    mapper. The nodes are in the order of the tier labels and then in graph
+    order, each node is returned once.
+
+    """
+
+    nodes = []
+    node_ids = set()
+    for label in annotation_graph.tier_mapper.tier_labels(tier_type):
+        for node in annotation_graph.nodes_for_tier(label, parent_node):
+            if node.id not in node_ids:
+                node_ids.add(node.id)
+                nodes.append(node)
+    return nodes
+
+
+def _tagged_words_for_phrase(annotation_graph, phrase):
+    value = annotation_graph.annotation_value_for_node
+    tagged_words = []
+    for word in _nodes_for_tier_type(annotation_graph,
+            poioapi.data.TIER_WORD, phrase):
+        tags = _nodes_for_tier_type(annotation_graph,
+            poioapi.data.TIER_POS, word)
+        tag = None
+        if len(tags) > 0:
+            tag = value(tags[0])
+        tagged_words.append((value(word), tag))
+    return tagged_words
+
+
+def iter_words(annotation_graph):
+    """Iterate over the words of the phrases of an annotation graph."""
+
+    value = annotation_graph.annotation_value_for_node
+    for phrase in _nodes_for_tier_type(annotation_graph,
+            poioapi.data.TIER_UTTERANCE):
+        for word in _nodes_for_tier_type(annotation_graph,
+                poioapi.data.TIER_WORD, phrase):
+            yield value(word)
+
+
+def iter_sents(annotation_graph):
+    """Iterate over the phrases of an annotation graph, each phrase is a
+    list of its words. Phrases without words are skipped.
+
+    """
+
+    value = annotation_graph.annotation_value_for_node
+    for phrase in _nodes_for_tier_type(annotation_graph,
+            poioapi.data.TIER_UTTERANCE):
+        words = [value(word) for word in _nodes_for_tier_type(
+            annotation_graph, poioapi.data.TIER_WORD, phrase)]
+        if len(words) > 0:
+            yield words
+
+
+def iter_tagged_words(annotation_graph):
+    """Iterate over the words of an annotation graph as (word, tag) tuples.
+    The tag is the first part of speech of the word, or None.
+
+    """
+
+    for phrase in _nodes_for_tier_type(annotation_graph,
+            poioapi.data.TIER_UTTERANCE):
+        for tagged_word in _tagged_words_for_phrase(annotation_graph, phrase):
+            yield tagged_word
+
+
+def iter_tagged_sents(annotation_graph):
+    """Iterate over the phrases of an annotation graph, each phrase is a
+    list of (word, tag) tuples. Phrases without words are skipped.
+
+    """
+
+    for phrase in _nodes_for_tier_type(annotation_graph,
+            poioapi.data.TIER_UTTERANCE):
+        tagged_words = _tagged_words_for_phrase(annotation_graph, phrase)
+        if len(tagged_words) > 0:
+            yield tagged_words
+
+
+class CorpusView(object):
+    """
+    A lazy, read-only sequence of the items of all files of a corpus, for
+    example the words or the sentences. Only one annotation graph is loaded
+    at a time. The number of items of each file is cached in the corpus
+    when the file is loaded, so len() and indexing only load the files
+    that are needed. Slices are views as well.
+
+    Attributes
+    ----------
+    corpus : CorpusFiles or CorpusGraphs
+        The corpus of the view.
+    items_for_graph : function
+        A function that returns an iterator over the items of an annotation
+        graph.
+
+    """
+
+    def __init__(self, corpus, items_for_graph):
+        self.corpus = corpus
+        self.items_for_graph = items_for_graph
+
+    def _count(self, file_index):
+        return self.corpus.item_count(self.items_for_graph, file_index)
+
+    def _items(self, file_index):
+        return self.corpus.items_for_file(self.items_for_graph, file_index)
+
+    def __len__(self):
+        return sum(self._count(i) for i in range(self.corpus.nr_of_files))
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over the items beginning with the item at the index
+        start. Files with a cached item count before the item are skipped
+        without loading them, every other file is loaded once.
+
+        """
+
+        offset = start
+        for file_index in range(self.corpus.nr_of_files):
+            count = self.corpus.cached_item_count(self.items_for_graph,
+                file_index)
+            if count is not None and offset >= count:
+                offset -= count
+                continue
+
+            items = self._items(file_index)
+            for item in items[offset:]:
+                yield item
+            offset = max(0, offset - len(items))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return CorpusViewSlice(self, start, stop, step)
+
+        if index < 0:
+            index += len(self)
+        if index < 0:
+            raise IndexError("CorpusView index out of range")
+
+        for item in self.iter_from(index):
+            return item
+        raise IndexError("CorpusView index out of range")
+
+    def __repr__(self):
+        return "<{0} of {1} files>".format(self.__class__.__name__,
+            self.corpus.nr_of_files)
+
+
+class CorpusViewSlice(object):
+    """
+    A slice of a CorpusView. The items are read from the view when the
+    slice is iterated or indexed. Slices of the slice are views of the
+    same CorpusView.
+
+    Attributes
+    ----------
+    view : CorpusView
+        The view of the slice.
+    start, stop, step : int
+        The indices of the slice in the view, as returned by slice.indices().
+
+    """
+
+    def __init__(self, view, start, stop, step):
+        self.view = view
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self._length = _slice_length(start, stop, step)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        if self._length == 0:
+            return iter([])
+        if self.step > 0:
+            stop = (self._length - 1) * self.step + 1
+            return itertools.islice(self.view.iter_from(self.start), 0, stop,
+                self.step)
+        return self._iter_backwards()
+
+    def _iter_backwards(self):
+        """Iterate over a slice with a negative step, file by file from the
+        last file of the slice to the first.
+
+        """
+
+        counts = [self.view._count(i)
+            for i in range(self.view.corpus.nr_of_files)]
+        file_end = sum(counts)
+        index = self.start
+        remaining = self._length
+        for file_index in reversed(range(len(counts))):
+            if remaining == 0:
+                break
+            file_start = file_end - counts[file_index]
+            if index >= file_start:
+                items = self.view._items(file_index)
+                while remaining > 0 and index >= file_start:
+                    yield items[index - file_start]
+                    index += self.step
+                    remaining -= 1
+            file_end = file_start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            length = _slice_length(start, stop, step)
+            start = self.start + start * self.step
+            step = self.step * step
+            return CorpusViewSlice(self.view, start, start + length * step,
+                step)
+
+        if index < 0:
+            index += self._length
+        if index < 0 or index >= self._length:
+            raise IndexError("CorpusViewSlice index out of range")
+        return self.view[self.start + index * self.step]
+
+
+def tokens_for_value(value):
+    """Split an annotation value into the lower case tokens of the corpus
+    index. The tokens are in Unicode normal form C. Punctuation and symbols
+    at the start and the end of each token are removed.
+
+    """
+
+    tokens = []
+    for token in unicodedata.normalize("NFC", value.lower()).split():
+        start = 0
+        end = len(token)
+        while start < end and \
+                unicodedata.category(token[start])[0] in "PS":
+            start += 1
+        while end > start and \
+                unicodedata.category(token[end - 1])[0] in "PS":
+            end -= 1
+        if start < end:
+            tokens.append(token[start:end])
+    return tokens
+
+
+class CorpusIndex(object):
+    """
+    A persistent index of the annotation values of a corpus. The index maps
+    each tier name to the tokens of the annotation values of the tier and
+    each token to the hits, which are (file path, root node id) tuples. The
+    root node is the node of the root tier that the annotation belongs to.
+    The index is stored as a JSON file and updated file by file: only the
+    files that are new or that changed since the last update are loaded.
+    An index file that can not be read is rebuilt on the next update.
+
+    Attributes
+    ----------
+    filepath : str
+        The path of the JSON file of the index.
+
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._mtimes = {}
+        self._hits_for_token = {}
+        self._changed = False
+
+        if os.path.exists(filepath):
+            try:
+                self._load()
+            except (IOError, OSError, ValueError, KeyError, TypeError,
+                    AttributeError):
+                self._mtimes = {}
+                self._hits_for_token = {}
+                self._changed = True
+
+    def _load(self):
+        with open(self.filepath, "r") as f:
+            index = json.load(f)
+        self._mtimes = dict(index["files"])
+        for tier_name, hits_for_token in index["tiers"].items():
+            self._hits_for_token[tier_name] = dict(
+                (token, [tuple(hit) for hit in hits])
+                for token, hits in hits_for_token.items())
+
+    @property
+    def filepaths(self):
+        return sorted(self._mtimes)
+
+    @property
+    def tier_names(self):
+        return sorted(self._hits_for_token)
+
+    def is_current(self, filepath, mtime):
+        """Return True if the file is in the index and did not change."""
+        filepath = os.path.abspath(filepath)
+        return filepath in self._mtimes and self._mtimes[filepath] == mtime
+
+    def add_graph(self, filepath, mtime, annotation_graph):
+        """Add the annotation values of an annotation graph to the index.
+        Entries of a previous version of the file are removed. Removing
+        entries scans the whole index, so callers that add several files
+        should remove them with one call of remove_files() first.
+
+        """
+
+        filepath = os.path.abspath(filepath)
+        if filepath in self._mtimes:
+            self.remove_files([filepath])
+
+        # The root nodes of all tier hierarchies, root_nodes() only returns
+        # the ones of the first hierarchy
+        root_nodes = []
+        for hierarchy in annotation_graph.tier_hierarchies:
+            root_nodes.extend(annotation_graph.nodes_for_tier(hierarchy[0]))
+
+        value = annotation_graph.annotation_value_for_node
+        node_ids = set()
+        for root_node in root_nodes:
+            nodes = [root_node]
+            while len(nodes) > 0:
+                node = nodes.pop()
+                if node.id in node_ids:
+                    continue
+                node_ids.add(node.id)
+                nodes.extend(node.iter_children())
+
+                node_value = value(node)
+                if node_value is None:
+                    continue
+                tokens = tokens_for_value(node_value)
+                if len(tokens) == 0:
+                    continue
+
+                tier_name = node.id.rsplit(poioapi.io.graf.GRAFSEPARATOR, 1)[0]
+                hits_for_token = self._hits_for_token.setdefault(tier_name, {})
+                for token in tokens:
+                    hits = hits_for_token.setdefault(token, [])
+                    hit = (filepath, root_node.id)
+                    if hit not in hits[-1:]:
+                        hits.append(hit)
+
+        self._mtimes[filepath] = mtime
+        self._changed = True
+
+    def remove_files(self, filepaths):
+        """Remove all entries of the given files from the index."""
+
+        filepaths = set(os.path.abspath(f) for f in filepaths) & \
+            set(self._mtimes)
+        if len(filepaths) == 0:
+            return
+
+        for tier_name, hits_for_token in list(self._hits_for_token.items()):
+            for token, hits in list(hits_for_token.items()):
+                hits = [hit for hit in hits if hit[0] not in filepaths]
+                if len(hits) > 0:
+                    hits_for_token[token] = hits
+                else:
+                    del hits_for_token[token]
+            if len(hits_for_token) == 0:
+                del self._hits_for_token[tier_name]
+
+        for filepath in filepaths:
+            del self._mtimes[filepath]
+        self._changed = True
+
+    def update(self, corpus):
+        """Update the index for the files of a corpus. Files that are not in
+        the corpus anymore are removed, new and changed files are loaded one
+        at a time and indexed. The index is saved if it changed.
+
+        """
+
+        filepaths = set()
+        stale_files = []
+        for i in range(corpus.nr_of_files):
+            filepath = corpus.filepath(i)
+            filepaths.add(os.path.abspath(filepath))
+            mtime = _mtime(filepath)
+            if not self.is_current(filepath, mtime):
+                stale_files.append((i, filepath, mtime))
+
+        # the entries of changed and removed files are removed in one pass
+        self.remove_files((set(self._mtimes) - filepaths) |
+            set(filepath for _, filepath, _ in stale_files))
+
+        for i, filepath, mtime in stale_files:
+            _, annotation_graph = corpus.graph(i)
+            self.add_graph(filepath, mtime, annotation_graph)
+
+        if self._changed:
+            self.save()
+
+    def save(self):
+        """Write the index to its JSON file. The index is written to a
+        temporary file in the same directory first, which then replaces the
+        index file, so an interrupted write leaves the old index intact.
+
+        """
+
+        index = {
+            "files": self._mtimes,
+            "tiers": self._hits_for_token
+        }
+
+        fd, temp_filepath = tempfile.mkstemp(suffix=".json",
+            dir=os.path.dirname(os.path.abspath(self.filepath)))
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f, sort_keys=True)
+            if hasattr(os, "replace"):
+                os.replace(temp_filepath, self.filepath)
+            else:
+                # Python 2 can not rename onto an existing file on Windows
+                if os.name == "nt" and os.path.exists(self.filepath):
+                    os.remove(self.filepath)
+                os.rename(temp_filepath, self.filepath)
+        except:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+            raise
+        self._changed = False
+
+    def query(self, tier_name, text):
+        """Return the hits of a text on a tier. The hits are the (file path,
+        root node id) tuples of all root nodes that have all tokens of the
+        text on the tier. The hits of a file are next to each other.
+
+        Parameters
+        ----------
+        tier_name : str
+            The name of the tier, for example "word" or "utterance..W-Spch".
+        text : str
+            The text to search.
+
+        Returns
+        -------
+        hits : list of tuple
+
+        """
+
+        hits_for_token = self._hits_for_token.get(tier_name, {})
+        tokens = tokens_for_value(text)
+        if len(tokens) == 0:
+            return []
+
+        hits = hits_for_token.get(tokens[0], [])
+        for token in tokens[1:]:
+            token_hits = set(hits_for_token.get(token, []))
+            hits = [hit for hit in hits if hit in token_hits]
+        return list(hits)
+
+
+class CorpusViewsMixin(object):
+    """
+    The views over the files of a corpus and the cache of the number of
+    items per file. The classes that use the mixin provide the number of
+    files, the file path of each file and the graphs.
+
+    """
+
+    def _item_count_cache(self):
+        if not hasattr(self, "_item_counts"):
+            self._item_counts = {}
+        return self._item_counts
+
+    def cached_item_count(self, items_for_graph, file_index):
+        """Return the cached number of items of a file, or None if the
+        file was not counted yet or changed since.
+
+        """
+
+        filepath = self.filepath(file_index)
+        cached = self._item_count_cache().get((items_for_graph, filepath))
+        if cached is not None and cached[0] == _mtime(filepath):
+            return cached[1]
+        return None
+
+    def items_for_file(self, items_for_graph, file_index):
+        """Return the items of a file as list. The number of items is
+        cached until the file changes.
+
+        """
+
+        filepath = self.filepath(file_index)
+        _, annotation_graph = self.graph(file_index)
+        items = list(items_for_graph(annotation_graph))
+        self._item_count_cache()[(items_for_graph, filepath)] = \
+            (_mtime(filepath), len(items))
+        return items
+
+    def item_count(self, items_for_graph, file_index):
+        """Return the number of items of a file. The file is only loaded if
+        the count is not cached.
+
+        """
+
+        count = self.cached_item_count(items_for_graph, file_index)
+        if count is None:
+            count = len(self.items_for_file(items_for_graph, file_index))
+        return count
+
+    def _index_filepath(self, index_filepath):
+        if index_filepath is None:
+            index_filepath = getattr(self, "index_filepath", None)
+        if index_filepath is None and self.nr_of_files > 0:
+            index_filepath = os.path.join(
+                os.path.dirname(os.path.abspath(self.filepath(0))),
+                "corpus_index.json")
+        return index_filepath
+
+    def index(self, index_filepath=None):
+        """Return the CorpusIndex of the corpus, updated for new and changed
+        files. By default the index is stored as "corpus_index.json" in the
+        directory of the first file of the corpus.
+
+        Raises
+        ------
+        ValueError
+            If the corpus is empty and there is no index file path.
+
+        """
+
+        index_filepath = self._index_filepath(index_filepath)
+        if index_filepath is None:
+            raise ValueError("An empty corpus needs an index file path.")
+
+        corpus_index = getattr(self, "_corpus_index", None)
+        if corpus_index is None or corpus_index.filepath != index_filepath:
+            corpus_index = CorpusIndex(index_filepath)
+            self._corpus_index = corpus_index
+
+        corpus_index.update(self)
+        return corpus_index
+
+    def query(self, tier_name, text, index_filepath=None):
+        """Search a text on a tier in all files of the corpus. Only the
+        index is searched, no annotation graph is loaded unless the file is
+        new or changed.
+
+        Returns
+        -------
+        hits : list of tuple
+            The (file path, root node id) tuples of the hits.
+
+        """
+
+        if self.nr_of_files == 0 and \
+                self._index_filepath(index_filepath) is None:
+            return []
+        return self.index(index_filepath).query(tier_name, text)
+
+    def query_graphs(self, tier_name, text, index_filepath=None):
+        """Search a text on a tier and iterate over the matching files as
+        (file path, annotation graph, root nodes) tuples. Only the files with
+        hits are loaded.
+
+        """
+
+        hits = self.query(tier_name, text, index_filepath)
+
+        file_index_for_path = {}
+        for i in range(self.nr_of_files):
+            file_index_for_path.setdefault(
+                os.path.abspath(self.filepath(i)), i)
+
+        for filepath, file_hits in itertools.groupby(hits, lambda h: h[0]):
+            filepath, annotation_graph = \
+                self.graph(file_index_for_path[filepath])
+            root_nodes = [annotation_graph.graf.nodes[node_id]
+                for _, node_id in file_hits]
+            yield filepath, annotation_graph, root_nodes
+
+    def words(self):
+        """The words of the corpus as a lazy CorpusView."""
+        return CorpusView(self, iter_words)
+
+    def sents(self):
+        """The sentences of the corpus, which are lists of words, as a lazy
+        CorpusView.
+
+        """
+        return CorpusView(self, iter_sents)
+
+    def tagged_words(self):
+        """The (word, tag) tuples of the corpus as a lazy CorpusView."""
+        return CorpusView(self, iter_tagged_words)
+
+    def tagged_sents(self):
+        """The sentences of the corpus, which are lists of (word, tag)
+        tuples, as a lazy CorpusView.
+
+        """
+        return CorpusView(self, iter_tagged_sents)
+
 
 class CorpusTrees():
 
@@ -28,6 +695,9 @@ class CorpusTrees():
         self.data_structure_type = data_structure_type
 
     def add_item(self, filepath, filetype):
+        # the annotation trees were replaced by annotation graphs
+        import poioapi.annotationtree
+
         if filetype == poioapi.data.TREEPICKLE:
             annotation_tree = poioapi.annotationtree.AnnotationTree(
                 poioapi.data.data_structure_handler_for_type(
@@ -49,25 +719,67 @@ class CorpusTrees():
             raise poioapi.data.UnknownFileFormatError()
 
 
-class CorpusGraphs(list):
+class CorpusFiles(CorpusViewsMixin):
+    """
+    A corpus of files that are loaded as annotation graphs when they are
+    needed, one at a time. The last loaded graph is kept for further
+    access.
+
+    """
+
+    def __init__(self):
+        self.files = []
+        self._current = (None, None)
 
     def add_item(self, filepath, filetype):
-        annotation_graph = poioapi.annotationgraph.AnnotationGraph(None)
-        if filetype == poioapi.data.EAF:
-            annotation_graph.from_elan(filepath)
-        if filetype == poioapi.data.EAFFROMTOOLBOX:
-            annotation_graph.from_elan(filepath)
-        elif filetype == poioapi.data.TYPECRAFT:
-            annotation_graph.from_typecraft(filepath)
-        else:
+        if filetype not in loader_for_filetype:
             raise poioapi.data.UnknownFileFormatError()
 
-        annotation_graph.structure_type_handler = \
-            poioapi.data.DataStructureType(
-                annotation_graph.tier_hierarchies[0]
-            )
+        self.files.append( (filepath, filetype) )
+
+    @property
+    def nr_of_files(self):
+        return len(self.files)
+
+    def filepath(self, file_index):
+        return self.files[file_index][0]
+
+    def graph(self, file_index):
+        """Return the file path and the annotation graph of a file."""
+
+        if self._current[0] != file_index:
+            filepath, filetype = self.files[file_index]
+            self._current = (file_index,
+                (filepath, load_graph(filepath, filetype)))
+        return self._current[1]
+
+    def iter_graphs(self):
+        """Iterate over the files as (file path, annotation graph) tuples.
+        The graphs are loaded one at a time.
+
+        """
+
+        for i in range(len(self.files)):
+            yield self.graph(i)
+
+
+class CorpusGraphs(list, CorpusViewsMixin):
+
+    def add_item(self, filepath, filetype):
+        self.append( (filepath, load_graph(filepath, filetype)) )
+
+    @property
+    def nr_of_files(self):
+        return len(self)
+
+    def filepath(self, file_index):
+        return self[file_index][0]
+
+    def graph(self, file_index):
+        return self[file_index]
 
-        self.append( (filepath, annotation_graph) )
+    def iter_graphs(self):
+        return iter(self)
 
     @property
     def tier_names(self):
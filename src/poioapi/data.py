@@ -85,6 +85,227 @@ def data_structure_handler_for_type(data_structure_type):
             data_structure_type)))
 
 
+class TierTree(object):
+    """
+    Precomputed structure of a list of tier hierarchies, as they are
+    created by the converters. In each list of a hierarchy the first element
+    is the parent of all the other elements of the list and of the first
+    elements of nested lists. The tree is built once and answers questions
+    like "what are the children of tier X" with a dictionary lookup instead
+    of a search in the nested lists.
+
+    Attributes
+    ----------
+    hierarchies : array_like
+        The list of tier hierarchies the tree was built from.
+    parent : dict
+        Maps each tier to its parent tier or to None for root tiers.
+    children : dict
+        Maps each tier to the list of its child tiers.
+    depth : dict
+        Maps each tier to its depth in the hierarchy, root tiers have a depth
+        of 0.
+    order : array_like
+        All tiers in the order of the flattened hierarchies.
+    roots : array_like
+        The root tiers.
+
+    If a tier appears more than once in the hierarchies its parent and depth
+    are those of its last occurrence, as in the recursive lookups that the
+    tree replaces, while it keeps the position of its first occurrence in
+    `order`.
+
+    """
+
+    def __init__(self, tier_hierarchies=None):
+        if tier_hierarchies is None:
+            tier_hierarchies = []
+
+        self.hierarchies = tier_hierarchies
+        self.signature = self.signature_for(tier_hierarchies)
+        self.parent = {}
+        self.children = {}
+        self.depth = {}
+        self.order = []
+        self.roots = []
+
+        for hierarchy in tier_hierarchies:
+            self._add_hierarchy(hierarchy)
+
+    @staticmethod
+    def signature_for(tier_hierarchies):
+        """Return a tuple that is equal for equal tier hierarchies. It is
+        used to find out whether the hierarchies of a tree were changed in
+        place. The tuple lists the elements of the nested lists in pre-order
+        together with their depth, the lists themselves by their depth only.
+
+        """
+
+        signature = []
+        stack = [(e, 0) for e in reversed(tier_hierarchies)]
+        while stack:
+            e, depth = stack.pop()
+            if isinstance(e, list):
+                signature.append(depth)
+                stack.extend((child, depth + 1) for child in reversed(e))
+            else:
+                signature.append((depth, e))
+        return tuple(signature)
+
+    @classmethod
+    def from_parent_list(cls, tiers_parent_list):
+        """Create the tier tree from a list of (tier, parent tier) tuples,
+        as it is collected by the converters while they traverse the tiers
+        of a parser. A tuple with a parent of None starts a new hierarchy,
+        all following tiers are appended to every occurrence of their parent
+        in the current hierarchy.
+
+        Parameters
+        ----------
+        tiers_parent_list : array_like
+            A list of tuples with a tier name and the name of its parent tier.
+
+        Returns
+        -------
+        tier_tree : TierTree
+            The tree of the tier hierarchies.
+
+        """
+
+        tier_hierarchies = []
+        occurrences = {}
+        for tier, parent_tier in tiers_parent_list:
+            if parent_tier is None:
+                hierarchy = [tier]
+                tier_hierarchies.append(hierarchy)
+                occurrences = {tier: [hierarchy]}
+            else:
+                for tiers_list in occurrences.get(parent_tier, [])[:]:
+                    tier_list = [tier]
+                    tiers_list.append(tier_list)
+                    occurrences.setdefault(tier, []).append(tier_list)
+
+        return cls(tier_hierarchies)
+
+    def _add_hierarchy(self, hierarchy):
+        # Each stack item is a list of the hierarchy, the position of the
+        # next element to visit in the list (None if the first element was
+        # not visited yet), and the parent and depth of the elements
+        stack = [(hierarchy, None, None, 0)]
+        while stack:
+            elements, i, parent, depth = stack.pop()
+            if i is None:
+                i = 0
+                if len(elements) > 0 and not isinstance(elements[0], list):
+                    self._add_tier(elements[0], parent, depth)
+                    parent = elements[0]
+                    depth += 1
+                    i = 1
+
+            while i < len(elements):
+                e = elements[i]
+                i += 1
+                if isinstance(e, list):
+                    stack.append((elements, i, parent, depth))
+                    stack.append((e, None, parent, depth))
+                    break
+                self._add_tier(e, parent, depth)
+
+    def _add_tier(self, tier, parent, depth):
+        if tier in self.parent:
+            # the last occurrence of the tier wins
+            previous_parent = self.parent[tier]
+            if previous_parent == parent:
+                self.depth[tier] = depth
+                return
+            if previous_parent is None:
+                self.roots.remove(tier)
+            else:
+                self.children[previous_parent].remove(tier)
+        else:
+            self.children[tier] = []
+            self.order.append(tier)
+
+        self.parent[tier] = parent
+        self.depth[tier] = depth
+
+        if parent is None:
+            self.roots.append(tier)
+        else:
+            self.children[parent].append(tier)
+
+    def __contains__(self, tier):
+        return tier in self.parent
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def get_parent(self, tier):
+        """Return the parent tier of a tier or None for a root tier.
+
+        Raises
+        ------
+        UnknownAnnotationTypeError
+            If the tier is not in the tree.
+
+        """
+
+        try:
+            return self.parent[tier]
+        except KeyError:
+            raise UnknownAnnotationTypeError(tier)
+
+    def get_children(self, tier):
+        """Return the list of child tiers of a tier. The list is shared,
+        callers must not change it.
+
+        Raises
+        ------
+        UnknownAnnotationTypeError
+            If the tier is not in the tree.
+
+        """
+
+        try:
+            return self.children[tier]
+        except KeyError:
+            raise UnknownAnnotationTypeError(tier)
+
+    def get_depth(self, tier):
+        """Return the depth of a tier, root tiers have a depth of 0.
+
+        Raises
+        ------
+        UnknownAnnotationTypeError
+            If the tier is not in the tree.
+
+        """
+
+        try:
+            return self.depth[tier]
+        except KeyError:
+            raise UnknownAnnotationTypeError(tier)
+
+
+def tier_tree_for(obj):
+    """Return the TierTree of an object with tier hierarchies, like a
+    converter or an annotation graph. The object's tree is reused if it was
+    built for hierarchies equal to the object's current tier hierarchies,
+    otherwise a new tree is built. Hierarchies that were changed in place
+    are detected as well.
+
+    """
+
+    tier_tree = getattr(obj, "tier_tree", None)
+    if tier_tree is None or tier_tree.signature != \
+            TierTree.signature_for(obj.tier_hierarchies):
+        tier_tree = TierTree(obj.tier_hierarchies)
+    return tier_tree
+
+
 class DataStructureType(object):
     """
     Data structure type constructor.
@@ -107,10 +328,35 @@ class DataStructureType(object):
         if custom_data_hierarchy != None:
             self.data_hierarchy = custom_data_hierarchy
 
-        self.flat_data_hierarchy = self._flatten_hierarchy_elements(
-            self.data_hierarchy)
+        self.tier_tree = TierTree([self.data_hierarchy])
+        self.flat_data_hierarchy = self.tier_tree.order
         self.nr_of_types = len(self.flat_data_hierarchy)
 
+        # The results of all hierarchy queries only depend on the hierarchy,
+        # so they are computed once for every type
+        self._parents_of_type = {}
+        self._children_of_type = {}
+        self._siblings_of_type = {}
+        for ann_type in self.flat_data_hierarchy:
+            if ann_type in self.data_hierarchy:
+                self._parents_of_type[ann_type] = []
+            else:
+                self._parents_of_type[ann_type] = \
+                    self._get_parents_of_type_helper(
+                        ann_type, self.data_hierarchy)[1]
+            self._children_of_type[ann_type] = \
+                self._get_children_of_type_helper(
+                    ann_type, self.data_hierarchy)
+
+            parent = self.tier_tree.parent[ann_type]
+            if parent is None:
+                self._siblings_of_type[ann_type] = self.tier_tree.roots
+            else:
+                self._siblings_of_type[ann_type] = \
+                    self.tier_tree.children[parent]
+
+    def __contains__(self, ann_type):
+        return ann_type in self.tier_tree
 
     def type_has_region(self, ann_type):
         """ Checks whether the given type has regions that connect it
@@ -128,41 +374,58 @@ class DataStructureType(object):
         """
         return (ann_type in self.types_with_regions)
 
-    # def get_siblings_of_type(self, ann_type):
-    #     """Return all the siblings of a given type in the hierarchy
-    #     including the given type itself.
+    def get_siblings_of_type(self, ann_type):
+        """Return all the siblings of a given type in the hierarchy
+        including the given type itself. The siblings are the types with
+        the same parent type, or the root types for a root type.
 
-    #     Parameters
-    #     ----------
-    #     ann_type : str
-    #         Value of the field in the data structure hierarchy.
+        Parameters
+        ----------
+        ann_type : str
+            Value of the field in the data structure hierarchy.
 
-    #     Returns
-    #     -------
-    #     ann_type : str
-    #         Value of the field in the data structure hierarchy if
-    #         exist.
+        Returns
+        -------
+        siblings : array_like
+            The siblings of the type.
 
-    #     Raises
-    #     ------
-    #     UnknownAnnotationTypeError
-    #         If the ann_type doesn't exist.
+        Raises
+        ------
+        UnknownAnnotationTypeError
+            If the ann_type doesn't exist.
 
-    #     """
+        """
 
-    #     if ann_type not in self.flat_data_hierarchy:
-    #         raise UnknownAnnotationTypeError
+        try:
+            return list(self._siblings_of_type[ann_type])
+        except KeyError:
+            raise UnknownAnnotationTypeError
 
-    #     if ann_type in self.data_hierarchy:
-    #         return [s for s in self.data_hierarchy
-    #             if isinstance(s, string_type)]
+    def get_depth_of_type(self, ann_type):
+        """Return the depth of a given type in the hierarchy, the root type
+        has a depth of 0.
 
-    #     for e in self.data_hierarchy:
-    #         if type(e) is list:
-    #             if ann_type in e:
-    #                 return [s for s in e if isinstance(s, string_type)]
+        Parameters
+        ----------
+        ann_type : str
+            Value of the field in the data structure hierarchy.
 
-    #     return []
+        Returns
+        -------
+        depth : int
+            The depth of the type.
+
+        Raises
+        ------
+        UnknownAnnotationTypeError
+            If the ann_type doesn't exist.
+
+        """
+
+        try:
+            return self.tier_tree.depth[ann_type]
+        except KeyError:
+            raise UnknownAnnotationTypeError
 
     def get_parents_of_type(self, ann_type):
         """Returns all the elements that are above a given type in the type
@@ -184,16 +447,11 @@ class DataStructureType(object):
 
         """
 
-        if ann_type not in self.flat_data_hierarchy:
+        try:
+            return list(self._parents_of_type[ann_type])
+        except KeyError:
             raise UnknownAnnotationTypeError
 
-        # is ann_type a root type?
-        if ann_type in self.data_hierarchy:
-            return []
-
-        return self._get_parents_of_type_helper(
-            ann_type, self.data_hierarchy)[1]
-
     def _get_parents_of_type_helper(self, ann_type, hierarchy):
         """Helper function for get_parents_of_type.
 
@@ -248,11 +506,11 @@ class DataStructureType(object):
 
         """
 
-        if ann_type not in self.flat_data_hierarchy:
+        try:
+            return list(self._children_of_type[ann_type])
+        except KeyError:
             raise UnknownAnnotationTypeError
 
-        return self._get_children_of_type_helper(ann_type, self.data_hierarchy)
-
     def _get_children_of_type_helper(self, ann_type, hierarchy):
         """Helper function for get_children_of_type.
 
@@ -26,6 +26,20 @@ from xml.etree.ElementTree import Element, SubElement, tostring
 from xml.dom import minidom
 
 import poioapi.io.graf
+import poioapi.data
+import poioapi.mapper
+
+# The tier type of a child tier, by the tier type of its parent and by
+# whether the linguistic type of the child subdivides the parent (True) or is
+# associated with it (False)
+child_tier_types = {
+    (poioapi.data.TIER_UTTERANCE, True): poioapi.data.TIER_WORD,
+    (poioapi.data.TIER_UTTERANCE, False): poioapi.data.TIER_TRANSLATION,
+    (poioapi.data.TIER_WORD, True): poioapi.data.TIER_MORPHEME,
+    (poioapi.data.TIER_WORD, False): poioapi.data.TIER_POS,
+    (poioapi.data.TIER_MORPHEME, True): poioapi.data.TIER_GLOSS,
+    (poioapi.data.TIER_MORPHEME, False): poioapi.data.TIER_GLOSS
+}
 
 
 class ElanTier(poioapi.io.graf.Tier):
@@ -91,6 +105,45 @@ class Parser(poioapi.io.graf.BaseParser):
                 for tier in self.tree.findall('TIER')
                 if not 'PARENT_REF' in tier.attrib]
 
+    def tier_mapping(self):
+        """This method creates a tier mapper with the tier labels of the
+        file. The labels are the linguistic types of the tiers, as they
+        appear in the tier names of the annotation graph. The root tiers
+        are utterances, the tier types of the other tiers are looked up in
+        child_tier_types. Tiers below a tier without a tier type are not
+        mapped.
+
+        Returns
+        -------
+        tier_mapper : poioapi.mapper.TierMapper
+            The tier mapper of the file.
+
+        """
+
+        subdivides = dict(
+            (l.attrib["LINGUISTIC_TYPE_ID"],
+             l.attrib.get("CONSTRAINTS") != "Symbolic_Association")
+            for l in self.tree.findall("LINGUISTIC_TYPE"))
+
+        tier_mapping = {}
+        # the list grows while it is traversed, parents come before their
+        # children so that the labels are in the order of the hierarchy
+        tiers = [(t, poioapi.data.TIER_UTTERANCE)
+                 for t in self.get_root_tiers()]
+        for tier, tier_type in tiers:
+            label = tier.linguistic_type.replace(' ', '_')
+            labels = tier_mapping.setdefault(tier_type, [])
+            if label not in labels:
+                labels.append(label)
+
+            for child in self.get_child_tiers_for_tier(tier):
+                child_type = child_tier_types.get(
+                    (tier_type, subdivides.get(child.linguistic_type, True)))
+                if child_type is not None:
+                    tiers.append((child, child_type))
+
+        return poioapi.mapper.TierMapper(tier_mapping)
+
     def get_tier_by_name(self, name):
         """This method retrieves a tier by it's name.
 
@@ -497,8 +550,7 @@ class Writer(poioapi.io.graf.BaseWriter):
         self._time_slot_id = 0
         self.time_order = self._map_time_slots(converter.meta_information)
 
-        for tier in self._flatten_hierarchy_elements(
-                converter.tier_hierarchies):
+        for tier in poioapi.data.tier_tree_for(converter).order:
             element = self._tier_in_meta_information(tier,
                 converter.meta_information)
             if element is not None:
@@ -557,6 +609,9 @@ class Writer(poioapi.io.graf.BaseWriter):
         return annotation_value, ann_type, features
 
     def _time_order(self, anchor):
+        # the time slots are mapped by their "TIME_VALUE" strings, the
+        # anchors of the regions are numbers
+        anchor = "{0}".format(anchor)
         if anchor in self.time_order:
             return self.time_order[anchor]
         else:
@@ -619,29 +674,6 @@ class Writer(poioapi.io.graf.BaseWriter):
         file.write(doc.toprettyxml(indent='    ', encoding='UTF-8'))
         file.close()
 
-    def _flatten_hierarchy_elements(self, elements):
-        """Flat the elements appended to a new list of elements.
-
-        Parameters
-        ----------
-        elements : array_like
-            An array of string values.
-
-        Returns
-        -------
-        flat_elements : array_like
-            An array of flattened `elements`.
-
-        """
-
-        flat_elements = []
-        for e in elements:
-            if type(e) is list:
-                flat_elements.extend(self._flatten_hierarchy_elements(e))
-            else:
-                flat_elements.append(e)
-        return flat_elements
-
     def _map_time_slots(self, meta_information):
         """This method map "TIME_SLOT_ID"s with
         their respective values.
@@ -18,16 +18,37 @@ from __future__ import absolute_import, unicode_literals
 import abc
 import codecs
 import os
+import time
+
+import xml.etree.ElementTree as ET
 
 from xml.etree.ElementTree import tostring
 from xml.dom import minidom
 
 import graf
 
+import poioapi.data
+import poioapi.regions
+
 # GrAF ID's separator
 GRAFSEPARATOR = ".."
 (TEXT, AUDIO, VIDEO, NONE, UNKNOWN) = ("text", "audio", "video", "none", "none")
 
+# Phases of a conversion for the ConversionStats
+(PHASE_PARSER, PHASE_NODES, PHASE_ANNOTATIONS, PHASE_HIERARCHY,
+    PHASE_PRIMARY_DATA, PHASE_TOTAL) = ("parser", "nodes", "annotations",
+    "hierarchy", "primary_data", "total")
+
+# Item types on the work stack of GrAFConverter._convert_tier
+(_TIER_ITEM, _ANNOTATION_ITEM, _ITERATOR_ITEM) = ("tier", "annotation",
+    "iterator")
+
+# Use the best available clock for the timings
+if hasattr(time, "perf_counter"):
+    clock = time.perf_counter
+else:
+    clock = time.time
+
 
 class Tier:
     """A list of tiers.
@@ -94,6 +115,187 @@ class PrimaryData:
         self.content = None
 
 
+class AnnotationRecord(object):
+    """An annotation of a root tier together with the annotations of the
+    tiers below it. Parsers that read a file record by record use it to
+    collect the annotations of one record.
+
+    Attributes
+    ----------
+    annotation : Annotation
+        The annotation of the record.
+    annotations_for_parent : dict
+        The annotations of the tiers below the record, the keys are tuples
+        of the ID of the parent annotation and the tier name.
+
+    """
+
+    __slots__ = ["annotation", "annotations_for_parent"]
+
+    def __init__(self, annotation, annotations_for_parent=None):
+        self.annotation = annotation
+        if annotations_for_parent is None:
+            annotations_for_parent = {}
+        self.annotations_for_parent = annotations_for_parent
+
+    def add_annotation(self, tier_name, parent_id, annotation):
+        key = (parent_id, tier_name)
+        if key in self.annotations_for_parent:
+            self.annotations_for_parent[key].append(annotation)
+        else:
+            self.annotations_for_parent[key] = [annotation]
+
+    def add_annotations(self, tier_name, parent_id, annotations):
+        key = (parent_id, tier_name)
+        if key in self.annotations_for_parent:
+            self.annotations_for_parent[key].extend(annotations)
+        else:
+            self.annotations_for_parent[key] = annotations
+
+    def get_annotations_for_tier(self, tier_name, parent_id=None):
+        """Return the annotations of a tier for a parent annotation ID. If
+        no parent is given the record is the parent.
+
+        """
+
+        if parent_id is None:
+            parent_id = self.annotation.id
+        return self.annotations_for_parent.get((parent_id, tier_name), [])
+
+    def copy_annotations_to(self, annotations_for_parent):
+        """Add the annotations of the record to a dict with the same keys
+        as annotations_for_parent, e.g. the one of a parser that collects
+        the annotations of all records.
+
+        """
+
+        for key, annotations in self.annotations_for_parent.items():
+            if key in annotations_for_parent:
+                annotations_for_parent[key].extend(annotations)
+            else:
+                annotations_for_parent[key] = annotations
+
+
+def iterparse_and_free(source, tags):
+    """Iterate over the "start" and "end" events of an XML file with
+    iterparse. The elements with one of the given tags are cleared and
+    removed from their parent when the iteration continues after their
+    "end" event, so only the current record of the file is held in memory.
+
+    Parameters
+    ----------
+    source : str or file object
+        The XML file.
+    tags : set of str
+        The tags of the elements to free, without namespace.
+
+    Returns
+    -------
+    events : generator of (str, Element)
+        The events and their elements.
+
+    """
+
+    # the elements from the root to the current element
+    elements = []
+
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            elements.append(element)
+            yield event, element
+            continue
+
+        elements.pop()
+        yield event, element
+
+        if element.tag.rpartition("}")[2] in tags:
+            element.clear()
+            if elements:
+                elements[-1].remove(element)
+
+
+class ConversionStats(object):
+    """This class collects timings and counts of a conversion with the
+    GrAFConverter. The timings are stored per phase of the conversion
+    (time spent in the parser, creating nodes, edges and regions, creating
+    annotations and the annotation space bookkeeping, building the tier
+    hierarchies and getting the primary data). The counts of annotations,
+    nodes, edges and regions are stored in total and per tier, as well as
+    the number of regions that were left out of the region tables.
+    Sub-classes may override `add_time` and `add_count` to forward the
+    values to an external metrics system while the conversion is running.
+
+    """
+
+    def __init__(self):
+        self.timings = dict()
+        self.counts = dict()
+        self.tiers = dict()
+
+    def _tier(self, tier):
+        if tier not in self.tiers:
+            self.tiers[tier] = {"annotations": 0, "nodes": 0, "edges": 0,
+                                "regions": 0, "skipped_regions": 0,
+                                "timings": dict()}
+        return self.tiers[tier]
+
+    def add_time(self, phase, seconds, tier=None):
+        """Add the time spent in a phase of the conversion.
+
+        Parameters
+        ----------
+        phase : str
+            The name of the phase, one of the PHASE_* constants.
+        seconds : float
+            The time spent in the phase.
+        tier : str
+            The prefix of the tier the time was spent for, if any.
+
+        """
+
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        if tier is not None:
+            timings = self._tier(tier)["timings"]
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+    def add_count(self, name, tier, n=1):
+        """Add to the count of converted annotations or created graph
+        elements.
+
+        Parameters
+        ----------
+        name : str
+            One of "annotations", "nodes", "edges", "regions" or
+            "skipped_regions".
+        tier : str
+            The prefix of the tier the elements belong to.
+        n : int
+            The number to add.
+
+        """
+
+        self.counts[name] = self.counts.get(name, 0) + n
+        self._tier(tier)[name] += n
+
+    def as_dict(self):
+        """Return all timings and counts as a dict, e.g. for JSON export.
+
+        Returns
+        -------
+        stats : dict
+            A dict with the keys "timings", "counts" and "tiers".
+
+        """
+
+        tiers = dict()
+        for tier, values in self.tiers.items():
+            tiers[tier] = dict(values)
+            tiers[tier]["timings"] = dict(values["timings"])
+
+        return {"timings": dict(self.timings), "counts": dict(self.counts),
+                "tiers": tiers}
+
+
 class BaseParser(object):
     """This class is a base class to the
     parser classes in order to create
@@ -168,7 +370,10 @@ class BaseParser(object):
         Returns
         -------
         list : array-like
-            List of annotations type.
+            List of annotations type. A streaming parser may
+            return an iterator instead, the GrAFConverter then
+            converts each annotation and its descendants before
+            it fetches the next one.
 
         See also
         --------
@@ -288,11 +493,16 @@ class GrAFConverter:
 
     """
 
-    def __init__(self, parser, writer=None):
+    def __init__(self, parser, writer=None, stats=None,
+                 bulk_annotations=True):
         self.parser = parser
         self.writer = writer
+        self.stats = stats
+        self.bulk_annotations = bulk_annotations
         self.graf = graf.Graph()
         self.tier_hierarchies = []
+        self.tier_tree = None
+        self.region_tables = {}
         self.meta_information = None
         self.primary_data = None
         self.original_file = None
@@ -304,41 +514,239 @@ class GrAFConverter:
     def parse(self):
         """This method will be the responsible to transform
         the parser into a GrAF object. This method also
-        retrieves the tiers hierarchies.
+        retrieves the tiers hierarchies. If the converter
+        was created with a ConversionStats object the
+        timings and counts of the conversion are stored
+        in it. In bulk mode (the default) the annotations
+        are collected per annotation space and attached to
+        their space in one batch after all tiers are
+        converted. If NumPy is installed a region table is
+        built for every tier with regions.
 
         """
 
+        stats = self.stats
+        if stats is not None:
+            start_parse = clock()
+
         self._tiers_parent_list = []
+        self._tiers_parent_set = set()
+        self._annotation_spaces = {}
+        self._region_rows = {}
         self.root_tiers = []
-        tiers_hierarchy_map = {}
 
         for tier in self.parser.get_root_tiers():
             self.root_tiers.append(tier.name)
             self._convert_tier(tier, None, None)
 
-        i = 0
-        for t in self._tiers_parent_list:
-            if t[1] is None:
-                i += 1
-                tiers_hierarchy_map[str(i)] = [t[0]]
-            else:
-                self._append_tier_to_hierarchy(tiers_hierarchy_map[str(i)],
-                    t[1], t[0])
+        if stats is not None:
+            start = clock()
 
-        for i, hierarchy in tiers_hierarchy_map.items():
-            self.tier_hierarchies.append(hierarchy)
+        self._attach_pending_annotations()
+
+        if stats is not None:
+            stats.add_time(PHASE_ANNOTATIONS, clock() - start)
+            start = clock()
+
+        self.tier_tree = poioapi.data.TierTree.from_parent_list(
+            self._tiers_parent_list)
+        self.tier_hierarchies = self.tier_tree.hierarchies
+
+        if stats is not None:
+            stats.add_time(PHASE_HIERARCHY, clock() - start)
+
+        self.region_tables = poioapi.regions.region_tables_for_rows(
+            self._region_rows, stats)
 
         if hasattr(self.parser, 'meta_information'):
             self.meta_information = self.parser.meta_information
 
+        if stats is not None:
+            start = clock()
+
         self.primary_data = self.parser.get_primary_data()
         if hasattr(self.parser, 'filepath') and \
                 isinstance(self.parser.filepath, str):
             self.original_file = os.path.abspath(self.parser.filepath)
 
+        if stats is not None:
+            end = clock()
+            stats.add_time(PHASE_PRIMARY_DATA, end - start)
+            stats.add_time(PHASE_TOTAL, end - start_parse)
+
     def _convert_tier(self, tier, parent_node, parent_annotation,
             parent_prefix=None):
+        """Convert the annotations of a tier and of all its child tiers
+        into nodes of the graph. The tiers are traversed depth-first with an
+        explicit work stack, so that deep hierarchies do not hit the
+        recursion limit. The stack holds three kinds of items: tiers whose
+        annotations still need to be fetched from the parser, annotations
+        whose node still needs to be created and iterators over the
+        annotations of a tier, if the parser returned an iterator instead of
+        a list. An iterator is only advanced after the previous annotation
+        and all its descendants were converted, so that a streaming parser
+        only needs to keep the current annotation in memory. Parent nodes
+        are carried on the stack as graf.Node objects, so that they never
+        have to be looked up again by their ID.
+
+        Parameters
+        ----------
+        tier : object
+            The Tier object to start the conversion with.
+        parent_node : graf.Node
+            The node of the parent annotation or None.
+        parent_annotation : object
+            The Annotation object of the parent annotation or None.
+        parent_prefix : str
+            The prefix of the parent tier or None.
+
+        """
+
+        stats = self.stats
+        parser = self.parser
+        graph = self.graf
+        tier_infos = {}
+
+        stack = [(_TIER_ITEM, tier, parent_node, parent_annotation,
+                  parent_prefix)]
+        while stack:
+            item = stack.pop()
+
+            if item[0] == _ANNOTATION_ITEM:
+                _, info, space, annotation, parent_node = item
+                (prefix, annotation_name, has_regions, child_tiers,
+                    node_prefix, region_prefix, is_root, region_rows) = info
+
+                if stats is not None:
+                    start = clock()
+
+                # The ID of each node is formatted exactly once
+                index = str(annotation.id)
+                node_id = node_prefix + index
+                node = graf.Node(node_id)
+                graph.nodes.add(node)
+
+                if parent_node is not None:
+                    graph.create_edge(parent_node, node, "e" + index)
+
+                region = None
+                if has_regions:
+                    if stats is not None:
+                        start_parser = clock()
+                        regions = parser.region_for_annotation(annotation)
+                        parser_time = clock() - start_parser
+                        stats.add_time(PHASE_PARSER, parser_time, prefix)
+                        start += parser_time
+                    else:
+                        regions = parser.region_for_annotation(annotation)
+
+                    if regions is not None:
+                        region = graf.Region(region_prefix + index, *regions)
+                        node.add_region(region)
+                        graph.regions.add(region)
+                        if region_rows is not None:
+                            region_rows.append(
+                                (regions, node, annotation.value))
+
+                if is_root:
+                    graph.header.roots.append(node_id)
+
+                if stats is not None:
+                    middle = clock()
+
+                self._add_graf_annotation(annotation_name, annotation, node,
+                    *space)
+
+                if stats is not None:
+                    stats.add_time(PHASE_NODES, middle - start, prefix)
+                    stats.add_time(PHASE_ANNOTATIONS, clock() - middle,
+                        prefix)
+                    stats.add_count("annotations", prefix)
+                    stats.add_count("nodes", prefix)
+                    if parent_node is not None:
+                        stats.add_count("edges", prefix)
+                    if region is not None:
+                        stats.add_count("regions", prefix)
+
+                for t in reversed(child_tiers):
+                    stack.append((_TIER_ITEM, t, node, annotation, prefix))
+
+            elif item[0] == _ITERATOR_ITEM:
+                _, info, annotations, parent_node, seen = item
+
+                if stats is not None:
+                    start = clock()
+
+                annotation = next(annotations, None)
+
+                if stats is not None:
+                    stats.add_time(PHASE_PARSER, clock() - start, info[0])
+
+                if annotation is not None:
+                    stack.append((_ITERATOR_ITEM, info, annotations,
+                                  parent_node, True))
+                    stack.append((_ANNOTATION_ITEM, info,
+                                  self._annotation_space(info[1]),
+                                  annotation, parent_node))
+                elif not seen:
+                    for t in reversed(info[3]):
+                        stack.append((_TIER_ITEM, t, None, None, info[0]))
+
+            else:
+                _, tier, parent_node, parent_annotation, parent_prefix = item
+
+                if stats is not None:
+                    start = clock()
+
+                # The child tiers and the regions only depend on the tier,
+                # so we ask the parser only once per tier
+                key = (tier.name, tier.annotation_space)
+                info = tier_infos.get(key, None)
+                if info is None:
+                    info = self._tier_info(tier)
+                    tier_infos[key] = info
+                prefix = info[0]
+                child_tiers = info[3]
+
+                self._add_tier_in_hierarchy_list(prefix, parent_prefix)
+
+                annotations = parser.get_annotations_for_tier(tier,
+                    parent_annotation)
+
+                if stats is not None:
+                    stats.add_time(PHASE_PARSER, clock() - start, prefix)
+
+                if not hasattr(annotations, "__len__"):
+                    stack.append((_ITERATOR_ITEM, info, iter(annotations),
+                                  parent_node, False))
+                elif annotations:
+                    # The annotation space is only created when the first
+                    # annotation is added to it
+                    space = self._annotation_space(info[1])
+                    for annotation in reversed(annotations):
+                        stack.append((_ANNOTATION_ITEM, info, space,
+                                      annotation, parent_node))
+                else:
+                    for t in reversed(child_tiers):
+                        stack.append((_TIER_ITEM, t, None, None, prefix))
+
+    def _tier_info(self, tier):
+        """Collect the information about a tier that the conversion needs
+        for each of the tier's annotations.
+
+        Returns
+        -------
+        info : tuple
+            The prefix and the annotation space name of the tier, whether
+            the tier has regions, the child tiers, the prefixes for the node
+            and region IDs, whether the tier is a root tier and the list
+            that collects the rows of the tier's region table.
+
+        """
+
         child_tiers = self.parser.get_child_tiers_for_tier(tier)
+        if not child_tiers:
+            child_tiers = []
 
         if tier.annotation_space is None:
             prefix = tier.name
@@ -350,93 +758,77 @@ class GrAFConverter:
                 tier.name)
 
         has_regions = False
+        region_rows = None
 
         if self.parser.tier_has_regions(tier):
             has_regions = True
+            # the rows are only collected if region tables can be built
+            if poioapi.regions.numpy is not None:
+                region_rows = self._region_rows.setdefault(prefix, [])
 
-        self._add_tier_in_hierarchy_list(prefix, parent_prefix)
+        return (prefix, annotation_name, has_regions, child_tiers,
+                "{0}{1}n".format(prefix, GRAFSEPARATOR),
+                "{0}{1}r".format(prefix, GRAFSEPARATOR),
+                prefix in self.root_tiers, region_rows)
 
-        annotations = self.parser.get_annotations_for_tier(tier,
-            parent_annotation)
+    def _annotation_space(self, annotation_name):
+        """Return the annotation space with the given name together with
+        the list of its pending annotations (None if the converter is not in
+        bulk mode). The space object is cached, it is created and added to
+        the graph the first time it is requested.
 
-        for annotation in annotations:
-            regions = None
-
-            if has_regions:
-                regions = self.parser.region_for_annotation(annotation)
-
-            node_id = NodeId(prefix, annotation.id)
-            self._add_node(node_id, annotation, annotation_name, regions,
-                parent_node)
-            self._add_root_nodes(prefix, node_id)
-
-            if child_tiers:
-                for t in child_tiers:
-                    self._convert_tier(t, node_id, annotation, prefix)
-
-        if annotations == [] and child_tiers:
-            for t in child_tiers:
-                self._convert_tier(t, None, None, prefix)
-
-    def _add_tier_in_hierarchy_list(self, prefix, parent_prefix):
-        if not (prefix, parent_prefix) in self._tiers_parent_list:
-            self._tiers_parent_list.append((prefix, parent_prefix))
+        """
 
-    def _append_tier_to_hierarchy(self, tiers_list, parent_tier, tier):
-        for t in tiers_list:
-            if isinstance(t, list):
-                self._append_tier_to_hierarchy(t, parent_tier, tier)
+        space = self._annotation_spaces.get(annotation_name, None)
+        if space is None:
+            if annotation_name in self.graf.annotation_spaces:
+                annotation_space = self.graf.annotation_spaces[annotation_name]
             else:
-                if t == parent_tier:
-                    tiers_list.append([tier])
+                annotation_space = graf.AnnotationSpace(annotation_name)
+                self.graf.annotation_spaces.add(annotation_space)
 
-    def _add_node(self, node_id, annotation, annotation_name, regions,
-            from_node_id):
-        self._add_node_to_graph(node_id, regions, from_node_id)
-        self._add_graf_annotation(annotation_name, annotation.id, node_id,
-                                  annotation.value, annotation.features)
+            pending_annotations = None
+            if self.bulk_annotations:
+                pending_annotations = []
 
-    def _add_root_nodes(self, prefix, node_id):
-        if prefix in self.root_tiers:
-            self.graf.header.roots.append(node_id.to_str())
+            space = (annotation_space, pending_annotations)
+            self._annotation_spaces[annotation_name] = space
 
-    def _add_graf_annotation(self, annotation_name, annotation_id,
-            annotation_ref, annotation_value, annotation_features=None):
-        annotation = graf.Annotation(annotation_name, annotation_features,
-                                     annotation_id)
+        return space
 
-        if annotation_value is not None:
-            annotation.features['annotation_value'] = annotation_value
+    def _attach_pending_annotations(self):
+        """Add the annotations that were collected in bulk mode to their
+        annotation spaces.
 
-        self.graf.nodes[annotation_ref.to_str()].annotations.add(annotation)
-
-        if annotation_name in self.graf.annotation_spaces:
-            #if annotation not in self.graf.annotation_spaces[annotation_name]:
-            self.graf.annotation_spaces[annotation_name].add(annotation)
-        else:
-            annotation_space = graf.AnnotationSpace(annotation_name)
-            annotation_space.add(annotation)
-
-            self.graf.annotation_spaces.add(annotation_space)
+        """
 
-    def _add_node_to_graph(self, node_id, regions=None,
-                           from_node_id=None):
+        for annotation_space, pending_annotations in \
+                self._annotation_spaces.values():
+            if pending_annotations:
+                add = annotation_space.add
+                for graf_annotation in pending_annotations:
+                    add(graf_annotation)
+                del pending_annotations[:]
 
-        node = graf.Node(node_id.to_str())
+    def _add_tier_in_hierarchy_list(self, prefix, parent_prefix):
+        if not (prefix, parent_prefix) in self._tiers_parent_set:
+            self._tiers_parent_set.add((prefix, parent_prefix))
+            self._tiers_parent_list.append((prefix, parent_prefix))
 
-        if from_node_id is not None:
-            edge_id = node_id.str_edge()
-            self.graf.create_edge(self.graf.nodes[from_node_id.to_str()], node,
-                edge_id)
+    def _add_graf_annotation(self, annotation_name, annotation, node,
+            annotation_space, pending_annotations=None):
+        graf_annotation = graf.Annotation(annotation_name,
+            annotation.features, annotation.id)
 
-        if regions is not None:
-            region_id = node_id.str_region()
-            region = graf.Region(region_id, *regions)
-            node.add_region(region)
+        if annotation.value is not None:
+            graf_annotation.features['annotation_value'] = annotation.value
 
-            self.graf.regions.add(region)
+        node.annotations.add(graf_annotation)
 
-        self.graf.nodes.add(node)
+        if pending_annotations is not None:
+            pending_annotations.append(graf_annotation)
+        else:
+            annotation_space.add(graf_annotation)
 
 
 class Writer(BaseWriter):
@@ -446,29 +838,6 @@ class Writer(BaseWriter):
         self.meta_information = None
         self.standoffheader = graf.StandoffHeader(**kwargs)
 
-    def _flatten_hierarchy_elements(self, elements):
-        """Flat the elements appended to a new list of elements.
-
-        Parameters
-        ----------
-        elements : array_like
-            An array of string values.
-
-        Returns
-        -------
-        flat_elements : array_like
-            An array of flattened `elements`.
-
-        """
-
-        flat_elements = []
-        for e in elements:
-            if type(e) is list:
-                flat_elements.extend(self._flatten_hierarchy_elements(e))
-            else:
-                flat_elements.append(e)
-        return flat_elements
-
     def write(self, outputfile, ag):
         """Writes an AnnotationGraph object as GrAF files.
 
@@ -485,13 +854,13 @@ class Writer(BaseWriter):
 
         (basedirname, _) = os.path.splitext(outputfile)
 
-        self._get_parents(ag.tier_hierarchies)
+        tier_tree = poioapi.data.tier_tree_for(ag)
+        self._get_parents(tier_tree)
 
         standoffrenderer = graf.StandoffHeaderRenderer("{0}.hdr".format(
             basedirname))
 
-        for tier_name in self._flatten_hierarchy_elements(
-                ag.tier_hierarchies):
+        for tier_name in tier_tree.order:
             annotation_space = tier_name.split(GRAFSEPARATOR)[0]
             out_graf = graf.Graph()
             renderer = graf.GrafRenderer("{0}-{1}.xml".format(
@@ -528,21 +897,13 @@ class Writer(BaseWriter):
 
         return out_graf
 
-    def _get_parents(self, tier_hierarchies):
+    def _get_parents(self, tier_tree):
         self._parent = {}
 
-        for h in tier_hierarchies:
-            self._get_hierarchy_parents(h, None)
-
-    def _get_hierarchy_parents(self, hierarchy, parent):
-        for i, h in enumerate(hierarchy):
-            if isinstance(h, list):
-                self._get_hierarchy_parents(h, parent)
-            else:
-                self._parent[h] = parent
-
-                if i is 0:
-                    parent = h.split(GRAFSEPARATOR)[0]
+        for tier_name, parent in tier_tree.parent.items():
+            if parent is not None:
+                parent = parent.split(GRAFSEPARATOR)[0]
+            self._parent[tier_name] = parent
 
     def _add_primary_data(self, primary_data, basedirname):
         if primary_data.external_link:
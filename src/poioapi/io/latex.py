@@ -16,8 +16,9 @@ import poioapi.data
 import poioapi.mapper
 
 import unicodedata
-import os
+import io
 import codecs
+import collections
 
 #the key is the result of calling ord() on the char
 special_char_mapping = {
@@ -44,6 +45,20 @@ class Writer(poioapi.io.graf.BaseWriter):
         self._document_class = 'article'
         self._dc_options = ['a4paper', '11pt']
 
+        # The tier types of the concrete tier prefixes of the current graph
+        # and the children of the last parent node grouped by tier type,
+        # see _all_nodes_for_tier()
+        self._tier_table_graph = None
+        self._tier_types_for_prefix = dict()
+        self._children_parent = None
+        self._children_for_type = None
+
+        # The escaped text and the packages that it needs for each
+        # character and each token, see _format_for_latex()
+        self._latex_table = None
+        self._latex_modifiers = None
+        self._latex_memo = dict()
+
     def _add_package(self, package, option=''):
         """ Method to add a latex package to the preamble.
             This is done this way to prevent loading unnecessary packages.
@@ -238,6 +253,9 @@ class Writer(poioapi.io.graf.BaseWriter):
                 3. Replacement of non-typesettable character with their
                     latex counterpart or equivalent character.
 
+            The text is escaped token by token, the result for each token
+            is memoized together with the packages it needs.
+
             Parameters
             ----------
             text : str
@@ -247,36 +265,149 @@ class Writer(poioapi.io.graf.BaseWriter):
             -------
             The text after sanitation.
         """
-        correct_line = ''
+        if self._latex_table is None:
+            self._build_latex_table()
+
         normalized_line = unicodedata.normalize('NFC', text)
-        for idx, c in enumerate(normalized_line):
-            try:
-                if unicodedata.combining(c) != 0:
-                    continue
-                next_char = normalized_line[idx+1]
-                name = unicodedata.name(c, None)
-                codepoint = ord(next_char)
-                if codepoint in special_char_mapping.keys():
-                    latex_command = special_char_mapping[codepoint]
-                    correct_line += self._build_latex_replacement(latex_command, c)
-                elif c in special_char_mapping.keys():
-                    latex_command = special_char_mapping[c]
-                    correct_line += self._build_latex_replacement(latex_command, c)
-                elif name is None:
-                    self._preamble['latexsym'] = ''
-                    correct_line += '□'
-                else:
-                    correct_line += c
-            except IndexError:
-                if unicodedata.combining(c) != 0:
-                    continue
-                if c in special_char_mapping.keys():
-                    latex_command = special_char_mapping[c]
-                    correct_line += self._build_latex_replacement(latex_command, c)
-                else:
-                    correct_line += c
+        tokens = normalized_line.split(' ')
+
+        # a combining character that is mapped to a command applies to
+        # the space before it, so the text can not be split
+        modifiers = self._latex_modifiers
+        for token in tokens[1:]:
+            if token[:1] in modifiers:
+                correct_line, packages = self._escape_for_latex(
+                    normalized_line, True)
+                for package in packages:
+                    self._add_package(*package)
+                return correct_line
+
+        memo = self._latex_memo
+        last = len(tokens) - 1
+        correct_tokens = []
+        for i, token in enumerate(tokens):
+            key = (token, i == last)
+            escaped = memo.get(key, None)
+            if escaped is None:
+                escaped = self._escape_for_latex(token, i == last)
+                memo[key] = escaped
+            correct_tokens.append(escaped[0])
+            for package in escaped[1]:
+                self._add_package(*package)
+
+        return ' '.join(correct_tokens)
+
+    def _build_latex_table(self):
+        """ Builds the translation table of the characters from
+            special_char_mapping. Each character is mapped to its
+            replacement and the package that the replacement needs. The
+            characters that are mapped by their code point are combining
+            characters that modify the character before them.
+        """
+        self._latex_table = dict()
+        self._latex_modifiers = dict()
+        for key, value in special_char_mapping.items():
+            if isinstance(key, int):
+                # unicode character of the code point on Python 2 and 3
+                self._latex_modifiers['%c' % key] = value
+            elif unicodedata.combining(key) != 0:
+                self._latex_table[key] = None
+            else:
+                command, package = self._latex_replacement(value, key)
+                self._latex_table[key] = (command, package, False)
+
+    def _latex_table_entry(self, c):
+        """ Returns the entry of the translation table for a character,
+            characters that are not in the table yet are added.
+
+            Parameters
+            ----------
+            c : str
+                The character.
+
+            Returns
+            -------
+            entry : tuple or None
+                None for combining characters, which are removed. Otherwise
+                the replacement, the package it needs and if the character
+                is unknown to unicodedata.
+        """
+        entry = None
+        if unicodedata.combining(c) == 0:
+            if unicodedata.name(c, None) is None:
+                entry = ('□', ('latexsym', ''), True)
+            else:
+                entry = (c, None, False)
+
+        self._latex_table[c] = entry
+        return entry
+
+    def _escape_for_latex(self, text, at_end):
+        """ Escapes the characters of a normalized text with the
+            translation table.
+
+            Parameters
+            ----------
+            text : str
+                The normalized text.
+            at_end : bool
+                If the text is at the end of the line. Unknown characters
+                at the end of a line are kept.
+
+            Returns
+            -------
+            escaped : tuple
+                The escaped text and the packages that it needs.
+        """
+        table = self._latex_table
+        modifiers = self._latex_modifiers
+        correct_line = []
+        packages = []
+        last = len(text) - 1
+
+        for idx, c in enumerate(text):
+            if c in table:
+                entry = table[c]
+            else:
+                entry = self._latex_table_entry(c)
+            if entry is None:
+                continue
+
+            command, package, unknown = entry
+            if idx < last:
+                modifier = modifiers.get(text[idx+1], None)
+                if modifier is not None:
+                    command, package = self._latex_replacement(modifier, c)
+            elif at_end and unknown:
+                command, package = c, None
+
+            correct_line.append(command)
+            if package is not None:
+                packages.append(package)
+
+        return ''.join(correct_line), tuple(packages)
+
+    def _latex_replacement(self, value, cmd_param):
+        """ Helper function that builds the latex or equivalent
+            replacement for a character without adding its package.
+
+            Parameters
+            ----------
+            value : str or list
+                The latex command, or a list of the package, the package
+                option and the latex command.
+            cmd_param : str
+                The parameter for the command.
+
+            Returns
+            -------
+            The built command and the package and option that it needs, or
+            None if it needs no package.
+        """
+        if isinstance(value, list):
+            return value[2].format(cmd_param), (value[0], value[1])
 
-        return correct_line
+        return value.format(cmd_param), None
 
     def _build_latex_replacement(self, value, cmd_param):
         """ Helper function that builds the latex or equivalent
@@ -296,102 +427,113 @@ class Writer(poioapi.io.graf.BaseWriter):
             parameters or if its a direct character
             replacement, the effective return is the value parameter
         """
-        command = ''
-        if isinstance(value, list):
-            self._add_package(value[0], value[1])
-            command = value[2]
-        else:
-            command = value
+        command, package = self._latex_replacement(value, cmd_param)
+        if package is not None:
+            self._add_package(*package)
 
-        return command.format(cmd_param)
+        return command
 
-    def _build_latex_body(self, converter, temp_file_name):
-        """ Method that builds a temporary file that contains the latex
-            body of the document. This is done to allow for document specific
-            packages to be added to the preamble.
+    def _build_latex_body(self, converter):
+        """ Method that builds the latex body of the document as a list of
+            chunks in memory. The body is built before the preamble is
+            written to allow for document specific packages to be added to
+            the preamble.
 
             Parameters
             ----------
             converter : poioapi.annotationgraph.AnnotationGraph
                 The node storage
-            temp_file_name : str
-                The temporary file name.
+
+            Returns
+            -------
+            body : list of str
+                The chunks of the document body.
         """
-        temp_file = codecs.open(temp_file_name, 'w', encoding='utf8')
+        body = []
 
         root_nodes = converter.root_nodes()
 
         for node in root_nodes:
-            temp_file.write('\\ea\n')
+            body.append('\\ea\n')
             tier_id = node.id.split('..')[0]
             if tier_id in converter.tier_mapper.tier_labels(poioapi.data.TIER_UTTERANCE):
                 lines = self._build_lines_for_phrase(converter, node)
-                temp_file.write('\\glll\n')
-                temp_file.write(self._format_for_latex(
+                body.append('\\glll\n')
+                body.append(self._format_for_latex(
                     lines['words']) + '\\\\\n')
-                temp_file.write(self._format_for_latex(
+                body.append(self._format_for_latex(
                     lines['morpheme']) + '\\\\\n')
-                temp_file.write(self._format_for_latex(
+                body.append(self._format_for_latex(
                     lines['gloss']) + '\\\\\n')
                 if lines['translation'] != '':
-                    temp_file.write('\\glt{} ' + self._format_for_latex(
+                    body.append('\\glt{} ' + self._format_for_latex(
                         lines['translation']) + '\\\\\n')
             else:
                 phrases = self._all_nodes_for_tier(poioapi.data.TIER_UTTERANCE,
                                                 converter, node)
                 root_annot = converter.annotation_value_for_node(node)
                 root_annot = self._format_for_latex(root_annot)
-                temp_file.write('\\ref {0}\\\\\n'.format(root_annot))
+                body.append('\\ref {0}\\\\\n'.format(root_annot))
 
                 for phrase in phrases:
                     lines = self._build_lines_for_phrase(converter, phrase)
-                    temp_file.write('\\glll\n')
-                    temp_file.write(self._format_for_latex(
+                    body.append('\\glll\n')
+                    body.append(self._format_for_latex(
                     lines['words']) + '\\\\\n')
-                    temp_file.write(self._format_for_latex(
+                    body.append(self._format_for_latex(
                         lines['morpheme']) + '\\\\\n')
-                    temp_file.write(self._format_for_latex(
+                    body.append(self._format_for_latex(
                         lines['gloss']) + '\\\\\n')
                     if lines['translation'] != '':
-                        temp_file.write('\\glt{} ' + self._format_for_latex(
+                        body.append('\\glt{} ' + self._format_for_latex(
                             lines['translation'] + '\\\\\n'))
 
-            temp_file.write('\\z\n')
+            body.append('\\z\n')
 
-        temp_file.close()
+        return body
 
     def write(self, outputfile, converter):
-        """ Method to write the latex document.
+        """ Method to write the latex document. The body is built in memory
+            first, then the preamble and the body are written in one pass.
 
             Parameters
             ----------
-            ouputfile : str
-                The destination filepath.
+            ouputfile : str or file object
+                The destination filepath or a writable stream. Binary
+                streams get the document encoded as UTF-8, the stream is
+                not closed.
             converter : poioapi.annotationgraph.AnnotationGraph
                 The node storage.
         """
-        self._output_stream = codecs.open(outputfile, 'w', encoding='utf8')
-
         #build the document body
-        temp_file = outputfile + '.tmp'
-        self._build_latex_body(converter, temp_file)
+        body = self._build_latex_body(converter)
+
+        was_stream = hasattr(outputfile, 'write')
+        if was_stream:
+            if isinstance(outputfile, (io.BufferedIOBase, io.RawIOBase)) or \
+                    'b' in getattr(outputfile, 'mode', ''):
+                self._output_stream = codecs.getwriter('utf8')(outputfile)
+            else:
+                self._output_stream = outputfile
+        else:
+            self._output_stream = codecs.open(outputfile, 'w', encoding='utf8')
 
         #write the final document
         self._write_preamble()
 
         self._output_stream.write('\\begin{document}\n')
-
-        for line in codecs.open(temp_file, 'r', encoding='utf8'):
-            self._output_stream.write(line)
-
-        os.remove(temp_file)
-
+        self._output_stream.write(''.join(body))
         self._output_stream.write('\\end{document}')
 
-        self._output_stream.close()
+        if not was_stream:
+            self._output_stream.close()
+        self._output_stream = None
 
     def _all_nodes_for_tier(self, tier_identifier, converter, parent_node):
         """ Helper function to get all the node for an annotation_tier.
+            The children of the parent node are grouped by tier type once,
+            the nodes of each tier type of the same parent are then a
+            single lookup.
 
             Parameters
             ----------
@@ -401,12 +543,95 @@ class Writer(poioapi.io.graf.BaseWriter):
             converter : poioapi.annotationgraph.AnnotationGraph
                 The node storage.
         """
-        tier_nodes = []
-        tier_tags = converter.tier_mapper.tier_labels(tier_identifier)
-        for tag in tier_tags:
-            nodes = converter.nodes_for_tier(tag, parent_node)
-            for node in nodes:
-                if node not in tier_nodes:
-                    tier_nodes.append(node)
-
-        return tier_nodes
\ No newline at end of file
+        if parent_node is None:
+            tier_nodes = collections.OrderedDict()
+            tier_tags = converter.tier_mapper.tier_labels(tier_identifier)
+            for tag in tier_tags:
+                for node in converter.nodes_for_tier(tag, parent_node):
+                    tier_nodes.setdefault(node.id, node)
+
+            return list(tier_nodes.values())
+
+        if self._tier_table_graph is not converter:
+            self._tier_table_graph = converter
+            self._tier_types_for_prefix = dict()
+            self._children_parent = None
+
+        if self._children_parent is not parent_node:
+            self._children_parent = parent_node
+            self._children_for_type = self._children_by_tier_type(converter,
+                parent_node)
+
+        return self._children_for_type.get(tier_identifier, [])
+
+    def _children_by_tier_type(self, converter, parent_node):
+        """ Groups the children of a node by their tier types. The nodes of
+            a tier type are ordered by the position of their tier in the
+            mapped labels of the tier type, then by their order in the
+            graph, as with a call of nodes_for_tier() for each label.
+
+            Parameters
+            ----------
+            converter : poioapi.annotationgraph.AnnotationGraph
+                The node storage.
+            parent_node : graf.Node
+                The node whose children are grouped.
+
+            Returns
+            -------
+            children_for_type : dict
+                The list of child nodes for each tier type.
+        """
+        ranked_children = collections.defaultdict(list)
+        seen = set()
+        for node in parent_node.iter_children():
+            # nodes are equal if their IDs are equal
+            if node.id in seen:
+                continue
+            seen.add(node.id)
+
+            prefix = node.id.rsplit(poioapi.io.graf.GRAFSEPARATOR, 1)[0]
+            tier_types = self._tier_types_for_prefix.get(prefix, None)
+            if tier_types is None:
+                tier_types = self._tier_types(converter, prefix)
+                self._tier_types_for_prefix[prefix] = tier_types
+
+            for tier_identifier, rank in tier_types:
+                ranked_children[tier_identifier].append((rank, node))
+
+        children_for_type = dict()
+        for tier_identifier, children in ranked_children.items():
+            # the sort is stable, the graph order is kept for equal ranks
+            children.sort(key=lambda child: child[0])
+            children_for_type[tier_identifier] = [c[1] for c in children]
+
+        return children_for_type
+
+    def _tier_types(self, converter, prefix):
+        """ Resolves the tier types of a concrete tier prefix from the tier
+            mapper of the graph. A tier prefix belongs to a tier type if it
+            is one of the mapped labels of the type, or starts with one of
+            them and the GrAF separator.
+
+            Parameters
+            ----------
+            converter : poioapi.annotationgraph.AnnotationGraph
+                The node storage.
+            prefix : str
+                The tier prefix of the node IDs.
+
+            Returns
+            -------
+            tier_types : list of tuple
+                The tier types with the index of the first matching label.
+        """
+        tier_types = []
+        node_prefix = prefix + poioapi.io.graf.GRAFSEPARATOR
+        for tier_identifier in poioapi.data.tier_labels:
+            tags = converter.tier_mapper.tier_labels(tier_identifier)
+            for rank, tag in enumerate(tags):
+                if node_prefix.startswith(tag + poioapi.io.graf.GRAFSEPARATOR):
+                    tier_types.append((tier_identifier, rank))
+                    break
+
+        return tier_types
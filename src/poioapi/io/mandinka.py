@@ -24,18 +24,6 @@ re_last_quote = re.compile("[^\"]*$")
 #This is to account for words that are separated but must be considered as one.
 word_line_separators = ['Áŋ aŋ', '[^\s «»,\.]+']
 
-#The regular expressions to use in line sanitation, and the corresponding substitutes
-sanitation_tokens = {
-	' ': ' ',
-	'«\s': '«',
-	'\s»': '»',
-	'\s\.\.\.': '...',
-	'\s!': '!',
-	'\s\?': '?',
-	'^[^\wŋ«]\s': '',
-	'[ \t]+': ' '
-}
-
 #list of phrase termination detection tokens
 phrase_terminators = [
 	'[\.!\?]$',
@@ -68,17 +56,32 @@ ignore_these = ['^\sMmm...\s',
 
 BOMLEN = len(codecs.BOM_UTF8)
 
+# The regular expressions to use in line sanitation, see
+# Parser.sanitize_line(). The whitespace after « and before », ..., ! and ?
+# is removed in one pass. The lookbehind sees the unchanged line, so "«  x"
+# keeps one space.
+re_punctuation_space = re.compile(r'(?<=«)\s|\s(?=[»!?]|\.\.\.)')
+re_leading_symbol = re.compile(r'^[^\wŋ«]\s')
+re_blanks = re.compile(r'[ \t]{2,}|\t')
+
+re_word_line_separators = re.compile(
+	r'(?:%s)' % '|'.join(word_line_separators))
+re_ignore_these = re.compile('|'.join(ignore_these))
+re_phrase_terminators = re.compile('|'.join(phrase_terminators))
+
+
+default_tier_mapping = {
+	poioapi.data.TIER_UTTERANCE: ['phrase'],
+	poioapi.data.TIER_WORD: ['word'],
+	poioapi.data.TIER_TRANSLATION: ['translation'],
+	poioapi.data.TIER_MORPHEME: ['morpheme'],
+	poioapi.data.TIER_GLOSS: ['gloss'],
+	poioapi.data.TIER_POS: ['pos']
+}
+
 
 def tier_mapping():
-	mapping = poioapi.mapper.TierMapper()
-	mapping.append_to_tier_labels(poioapi.data.TIER_UTTERANCE, ['phrase'])
-	mapping.append_to_tier_labels(poioapi.data.TIER_WORD, ['word'])
-	mapping.append_to_tier_labels(poioapi.data.TIER_TRANSLATION, ['translation'])
-	mapping.append_to_tier_labels(poioapi.data.TIER_MORPHEME, ['morpheme'])
-	mapping.append_to_tier_labels(poioapi.data.TIER_GLOSS, ['gloss'])
-	mapping.append_to_tier_labels(poioapi.data.TIER_POS, ['pos'])
-
-	return mapping
+	return poioapi.mapper.TierMapper(default_tier_mapping)
 
 
 class Parser(poioapi.io.graf.BaseParser):
@@ -141,10 +144,22 @@ class Parser(poioapi.io.graf.BaseParser):
 
 		block_line_count = 3
 
-		#compile all regexes structures defined
-		self.separate = re.compile(r'(?:%s)' % '|'.join(word_line_separators))
-		ignore_lines = re.compile('|'.join(ignore_these))
-		terminators = re.compile('|'.join(phrase_terminators))
+		#the regexes structures are compiled in the module
+		self.separate = re_word_line_separators
+		ignore_lines = re_ignore_these
+		terminators = re_phrase_terminators
+
+		#the tier labels are resolved once for all phrases
+		self._phrase_tier = self._tier_labels.tier_labels(
+			poioapi.data.TIER_UTTERANCE)[0]
+		self._word_tier = self._tier_labels.tier_labels(
+			poioapi.data.TIER_WORD)[0]
+		self._morpheme_tier = self._tier_labels.tier_labels(
+			poioapi.data.TIER_MORPHEME)[0]
+		self._gloss_tier = self._tier_labels.tier_labels(
+			poioapi.data.TIER_GLOSS)[0]
+		self._translation_tier = self._tier_labels.tier_labels(
+			poioapi.data.TIER_TRANSLATION)[0]
 
 		self._annotations_for_parent = collections.defaultdict(list)
 
@@ -190,62 +205,59 @@ class Parser(poioapi.io.graf.BaseParser):
 			self._handle_phrase()
 
 	def _handle_phrase(self):
+		annotations_for_parent = self._annotations_for_parent
+		Annotation = poioapi.io.graf.Annotation
+
 		#adding the annotations for phrase
 		self.current_phrase_id = self.current_id
-		self._annotations_for_parent[(None, self._tier_labels.tier_labels(
-																poioapi.data.TIER_UTTERANCE)[0])].append(
-			poioapi.io.graf.Annotation('a{0}'.format(self.current_phrase_id),
-									   re.sub('[-]+', '', self.block['phrase'])))
+		phrase_id = 'a{0}'.format(self.current_phrase_id)
+		annotations_for_parent[(None, self._phrase_tier)].append(
+			Annotation(phrase_id, self.block['phrase'].replace('-', '')))
 
 		word_tokens = self.separate.findall(self.block['phrase'])
 
 		#basic space-driven split for the gloss line
 		gloss_tokens = self.block['gloss'].split(' ')
 
+		words = annotations_for_parent[(phrase_id, self._word_tier)]
 		for i in range(0, len(word_tokens), 1):
 			self.current_id += 1
 			self.current_word_id = self.current_id
+			word_id = 'a{0}'.format(self.current_word_id)
 			#add the word tier annotations
-			self._annotations_for_parent[('a{0}'.format(self.current_phrase_id),
-										  self._tier_labels.tier_labels(poioapi.data.TIER_WORD)[0])].append(
-				poioapi.io.graf.Annotation('a{0}'.format(self.current_word_id),
-										   re.sub('[-]+', '', word_tokens[i].strip())))
+			words.append(Annotation(word_id,
+									word_tokens[i].strip().replace('-', '')))
 			morphemes_for_word = word_tokens[i].split('-')
 			glosses_for_word = gloss_tokens[i].split('-')
 
 			#add the morphemes and the glosses, reading both lines simultaneously.
 			#Its vital that they have the same number of elements.
-			while len(morphemes_for_word) > 0 and len(glosses_for_word) > 0:
-				morpheme = morphemes_for_word.pop(0)
-				gloss_word = glosses_for_word.pop(0)
+			morphemes = annotations_for_parent[(word_id, self._morpheme_tier)]
+			nr_of_pairs = min(len(morphemes_for_word), len(glosses_for_word))
+			for j in range(nr_of_pairs):
 				self.current_id += 1
-				current_morpheme_id = self.current_id
-				self._annotations_for_parent[('a{0}'.format(self.current_word_id),
-											  self._tier_labels.tier_labels(
-												  poioapi.data.TIER_MORPHEME)[0])].append(
-					poioapi.io.graf.Annotation('a{0}'.format(current_morpheme_id), morpheme.strip()))
+				morpheme_id = 'a{0}'.format(self.current_id)
+				morphemes.append(Annotation(morpheme_id,
+											morphemes_for_word[j].strip()))
 
 				#if the morpheme and gloss counts for this word don't match,
 				#join all remaining glosses in the last one.
-				if len(morphemes_for_word) == 0 and len(glosses_for_word) > 0:
-					while len(glosses_for_word) > 0:
-						gloss_word += '.' + glosses_for_word.pop(0)
+				if j == nr_of_pairs - 1:
+					gloss_word = '.'.join(glosses_for_word[j:])
+				else:
+					gloss_word = glosses_for_word[j]
 
-				glosses_for_morpheme = gloss_word.split('.')
-				for gloss in glosses_for_morpheme:
+				glosses = annotations_for_parent[(morpheme_id, self._gloss_tier)]
+				for gloss in gloss_word.split('.'):
 					self.current_id += 1
-					current_gloss_id = self.current_id
-					self._annotations_for_parent[('a{0}'.format(current_morpheme_id),
-												  self._tier_labels.tier_labels(
-													  poioapi.data.TIER_GLOSS)[0])].append(
-						poioapi.io.graf.Annotation('a{0}'.format(current_gloss_id), gloss.strip()))
+					glosses.append(Annotation('a{0}'.format(self.current_id),
+											  gloss.strip()))
 
 		#finally, add the translation annotation
 		self.current_id += 1
 		current_translation_id = self.current_id
-		self._annotations_for_parent[('a{0}'.format(self.current_phrase_id), self._tier_labels.tier_labels(
-																poioapi.data.TIER_TRANSLATION)[0])].append(
-				poioapi.io.graf.Annotation('a{0}'.format(current_translation_id), self.block['translation']))
+		annotations_for_parent[(phrase_id, self._translation_tier)].append(
+			Annotation('a{0}'.format(current_translation_id), self.block['translation']))
 
 		#increment the current annotation id for the next phrase
 		self.current_id += 1
@@ -258,8 +270,8 @@ class Parser(poioapi.io.graf.BaseParser):
 
 	def sanitize_line(self, line):
 		""" Function to remove unwanted character(s) from the line.
-			To define which characters are to be removed, add them to the
-			sanitation_tokens dictionary declared in the beginning of the module.
+			The regular expressions are compiled once at the beginning of
+			the module.
 
 			Parameters
 			----------
@@ -271,8 +283,10 @@ class Parser(poioapi.io.graf.BaseParser):
 			line : string
 			This is the same as the parameter, but after cleaning.
 		"""
-		for key in sanitation_tokens.keys():
-			line = re.sub(key, sanitation_tokens[key], line)
+		line = line.replace('\u00a0', ' ')
+		line = re_punctuation_space.sub('', line)
+		line = re_leading_symbol.sub('', line)
+		line = re_blanks.sub(' ', line)
 		line = line.strip()
 		return line
 
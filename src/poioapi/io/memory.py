@@ -17,6 +17,8 @@ used wit memory or GrAF data storage.
 
 import redis
 
+import poioapi.data
+
 class MemoryConverter:
     """This class handles the conversion of different file formats into memory
     data types. It uses a sub-class of BaseParser to get the
@@ -27,6 +29,7 @@ class MemoryConverter:
     def __init__(self, parser, writer=None):
         self.parser = parser
         self.tier_hierarchies = []
+        self.tier_tree = None
         self.meta_information = None
         self.primary_data = None
         self.original_file = None
@@ -42,23 +45,14 @@ class MemoryConverter:
 
         self._tiers_parent_list = []
         self.root_tiers = []
-        tiers_hierarchy_map = {}
 
         for tier in self.parser.get_root_tiers():
             self.root_tiers.append(tier.name)
             self._convert_tier(tier, None)
 
-        i = 0
-        for t in self._tiers_parent_list:
-            if t[1] is None:
-                i += 1
-                tiers_hierarchy_map[str(i)] = [t[0]]
-            else:
-                self._append_tier_to_hierarchy(tiers_hierarchy_map[str(i)],
-                    t[1], t[0])
-
-        for i, hierarchy in tiers_hierarchy_map.items():
-            self.tier_hierarchies.append(hierarchy)
+        self.tier_tree = poioapi.data.TierTree.from_parent_list(
+            self._tiers_parent_list)
+        self.tier_hierarchies = self.tier_tree.hierarchies
 
         if hasattr(self.parser, 'meta_information'):
             self.meta_information = self.parser.meta_information
@@ -120,14 +114,6 @@ class MemoryConverter:
         if not (prefix, parent_prefix) in self._tiers_parent_list:
             self._tiers_parent_list.append((prefix, parent_prefix))
 
-    def _append_tier_to_hierarchy(self, tiers_list, parent_tier, tier):
-        for t in tiers_list:
-            if isinstance(t, list):
-                self._append_tier_to_hierarchy(t, parent_tier, tier)
-            else:
-                if t == parent_tier:
-                    tiers_list.append([tier])
-
     # def _add_node(self, node_id, annotation, annotation_name, regions,
     #         from_node_id):
     #     self._add_node_to_graph(node_id, regions, from_node_id)
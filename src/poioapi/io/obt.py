@@ -9,12 +9,127 @@
 
 import re
 import codecs
-import collections
 
 import poioapi.io.graf
+import poioapi.data
+import poioapi.mapper
 
 re_last_quote = re.compile("[^\"]*$")
 
+default_tier_mapping = {
+    poioapi.data.TIER_UTTERANCE: ['phrase'],
+    poioapi.data.TIER_WORD: ['word']
+}
+
+
+def tier_mapping():
+    return poioapi.mapper.TierMapper(default_tier_mapping)
+
+
+class Phrase(poioapi.io.graf.AnnotationRecord):
+    """
+    A phrase of an OBT file together with the annotations of its words,
+    their variants and the tags of the variants. The value of the
+    annotation are the words of the phrase joined by spaces.
+
+    """
+
+    __slots__ = []
+
+    @property
+    def words(self):
+        return self.get_annotations_for_tier("word")
+
+
+def iter_phrases(input_stream):
+    """Read the phrases of an OBT file one at a time. A phrase ends with a
+    word that has a variant with the tag "<punkt>", a phrase is yielded as
+    soon as the next word starts, as the last word might have more
+    variants. The lines are read one by one, so the file is never held in
+    memory.
+
+    Parameters
+    ----------
+    input_stream : file object
+        The OBT output.
+
+    Returns
+    -------
+    phrases : generator of Phrase
+        The phrases of the file.
+
+    """
+
+    Annotation = poioapi.io.graf.Annotation
+
+    current_id = 1
+    phrase_id = "a0"
+    phrase_words = []
+    annotations_for_parent = {}
+    word_annotations = annotations_for_parent[(phrase_id, "word")] = []
+    variant_annotations = None
+    finished_phrases = []
+
+    # The variants and tags belong to the phrase of their word, also when
+    # they follow the variant that ended the phrase
+    word_annotations_for_parent = annotations_for_parent
+
+    for line in input_stream:
+        line = line.strip()
+        if line.startswith("<word>") and line.endswith("</word>"):
+            for phrase in finished_phrases:
+                yield phrase
+            del finished_phrases[:]
+
+            word = line[6:-7]
+            word_id = "a{0}".format(current_id)
+            current_id += 1
+            word_annotations.append(Annotation(word_id, word))
+            phrase_words.append(word)
+            word_annotations_for_parent = annotations_for_parent
+            variant_annotations = annotations_for_parent.setdefault(
+                (word_id, "variant"), [])
+
+        elif not line.startswith('"<'):
+            last_quote_match = re_last_quote.search(line)
+            variant = line[1:last_quote_match.start(0)-1]
+            variant_tags = [t for t in last_quote_match.group(0).split()
+                            if t != "<<<" and t != ">>>"]
+
+            variant_id = "a{0}".format(current_id)
+            current_id += 1
+            if variant_annotations is None:
+                # a variant before the first word
+                variant_annotations = word_annotations_for_parent.setdefault(
+                    ("aNone", "variant"), [])
+            variant_annotations.append(Annotation(variant_id, variant))
+
+            if variant_tags:
+                word_annotations_for_parent[(variant_id, "tag")] = \
+                    [Annotation("a{0}".format(current_id + i), tag)
+                     for i, tag in enumerate(variant_tags)]
+                current_id += len(variant_tags)
+
+            if "<punkt>" in variant_tags:
+                finished_phrases.append(Phrase(Annotation(phrase_id,
+                    " ".join(phrase_words)), annotations_for_parent))
+
+                phrase_id = "a{0}".format(current_id)
+                current_id += 1
+                phrase_words = []
+                annotations_for_parent = {}
+                word_annotations = annotations_for_parent[
+                    (phrase_id, "word")] = []
+
+    for phrase in finished_phrases:
+        yield phrase
+
+    # Text might not end with a <punkt>
+    if phrase_words:
+        yield Phrase(Annotation(phrase_id, " ".join(phrase_words)),
+            annotations_for_parent)
+
+
 class Parser(poioapi.io.graf.BaseParser):
     """
     Class that will handle parse of OBT files. OBT is The Oslo-Bergen-Tagger.
@@ -25,19 +140,27 @@ class Parser(poioapi.io.graf.BaseParser):
 
     """
 
-    def __init__(self, input_stream):
+    def __init__(self, input_stream, streaming=False):
         """Class's constructor.
 
         Parameters
         ----------
         stream : str or IOBase
             Path of the OBT output file or an IO.stream.
+        streaming : bool
+            If True the file is not parsed in the constructor. Instead the
+            phrases are read one at a time while the GrAFConverter asks for
+            them, only the annotations of the current phrase are kept in
+            memory. The file can then only be converted once.
 
         """
         self._input_stream = None
 
         self.input_stream = input_stream
-        self.parse()
+        self.streaming = streaming
+        self._annotations_for_parent = {}
+        if not streaming:
+            self.parse()
 
     def input_stream():
         doc = "The input_stream property."
@@ -57,71 +180,35 @@ class Parser(poioapi.io.graf.BaseParser):
         """
         This method is called by the constructor. It will parse the input file
         and collect the data in intermediate data structures for later
-        processing.
+        processing. The phrases are read with iter_phrases().
 
         """
-        current_phrase_id = 0
-        current_phrase_words = []
-        current_id = 1
-        current_word_id = None
-
-        self._annotations_for_parent = collections.defaultdict(list)
-
-        for line in self.input_stream:
-            line = line.strip()
-            if line.startswith("<word>") and line.endswith("</word>"):
-                current_word = line[6:-7]
-                current_word_id = current_id
-                current_id += 1
-                # add annotation 
-                self._annotations_for_parent[("a{0}".format(current_phrase_id),
-                    "word")].append((poioapi.io.graf.Annotation("a{0}".format(
-                        current_word_id), 
-                        current_word)))
-                current_phrase_words.append(current_word)
-
-            elif not line.startswith('"<'):
-                last_quote_match = re_last_quote.search(line)
-                variant = line[1:last_quote_match.start(0)-1]
-                variant_tags = last_quote_match.group(0).split()
-                variant_tags = [t for t in variant_tags if t != "<<<" and \
-                    t != ">>>"]
-
-                current_variant_id = current_id
-                current_id += 1
-                self._annotations_for_parent[("a{0}".format(current_word_id),
-                    "variant")].append(
-                        (poioapi.io.graf.Annotation("a{0}".format(
-                            current_variant_id), 
-                            variant)))
-
-                for tag in variant_tags:
-                    self._annotations_for_parent[("a{0}".format(
-                            current_variant_id),
-                        "tag")].append(
-                            (poioapi.io.graf.Annotation("a{0}".format(
-                                current_id), 
-                                tag)))
-                    current_id += 1
-
-                # create phrase
-                if "<punkt>" in variant_tags:
-                    current_phrase = " ".join(current_phrase_words)
-                    self._annotations_for_parent[(None, "phrase")].append(
-                            (poioapi.io.graf.Annotation("a{0}".format(
-                                current_phrase_id), 
-                                current_phrase)))
-                    current_phrase_id = current_id
-                    current_id += 1
-                    current_phrase_words = []
-
-        # Text might not end with a <punkt>
-        if current_phrase_words != []:
-            current_phrase = " ".join(current_phrase_words)
-            self._annotations_for_parent[(None, "phrase")].append(
-                    (poioapi.io.graf.Annotation("a{0}".format(
-                        current_phrase_id), 
-                        current_phrase)))
+
+        phrases = []
+        self._annotations_for_parent = {(None, "phrase"): phrases}
+
+        for phrase in self.iter_phrases():
+            phrases.append(phrase.annotation)
+            self._annotations_for_parent.update(
+                phrase.annotations_for_parent)
+
+    def iter_phrases(self):
+        """Read the phrases of the OBT file one at a time.
+
+        Returns
+        -------
+        phrases : generator of Phrase
+            The phrases of the file.
+
+        """
+
+        return iter_phrases(self.input_stream)
+
+    def _stream_phrases(self):
+        for phrase in self.iter_phrases():
+            self._annotations_for_parent = phrase.annotations_for_parent
+            yield phrase.annotation
+        self._annotations_for_parent = {}
 
     def get_root_tiers(self):
         """This method retrieves all the root tiers.
@@ -162,7 +249,9 @@ class Parser(poioapi.io.graf.BaseParser):
         parent_id = None
         if annotation_parent:
             parent_id = annotation_parent.id
-        return self._annotations_for_parent[(parent_id, tier.name)]
+        elif self.streaming and tier.name == "phrase":
+            return self._stream_phrases()
+        return self._annotations_for_parent.get((parent_id, tier.name), [])
 
     def tier_has_regions(self, tier):
         return False
@@ -16,16 +16,51 @@ import poioapi.data
 import poioapi.mapper
 
 
+default_tier_mapping = {
+    poioapi.data.TIER_UTTERANCE: ['phrase'],
+    poioapi.data.TIER_WORD: ['word'],
+    poioapi.data.TIER_TRANSLATION: ['translation'],
+    poioapi.data.TIER_MORPHEME: ['morpheme'],
+    poioapi.data.TIER_GLOSS: ['gloss'],
+    poioapi.data.TIER_POS: ['pos']
+}
+
+
 def tier_mapping():
-    mapping = poioapi.mapper.TierMapper()
-    mapping.append_to_tier_labels(poioapi.data.TIER_UTTERANCE, ['phrase'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_WORD, ['word'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_TRANSLATION, ['translation'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_MORPHEME, ['morpheme'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_GLOSS, ['gloss'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_POS, ['pos'])
+    return poioapi.mapper.TierMapper(default_tier_mapping)
+
+
+# The regular expressions of the line sanitization are compiled once
+
+# regular expression to detect ignorable parts at the END of the <line> element.
+author_detection = [
+    r'\w* \d+[: ]+\d+',  # for lines ending with one name author
+    r'\w+[; ]+\w+ \d+[: ]+\d+',  # for lines ending with two name author
+]
+re_author_at_end = re.compile(
+    r'[\[\(](?:' + '|'.join(author_detection) + r')[\)\]](?=$)')
+
+# The numbering at the start of a line, like "(1)", "(1) a.", "2b)" or "3.".
+# Each optional group continues where the previous one stopped, so this is
+# the same as removing the parts one after another.
+re_numbering = re.compile(
+    r'^(?:\(?\d+\))?(?:\s*[a-z]\.)?(?:\(?\d+[a-z]+\))?(?:\d+\.)?')
+
+re_sentence_type = re.compile(r'(?:DECL|WH|IMP): \w+$')
+re_portuguese = re.compile(r'\(?\w*\s*PORTUGUESE\)?$', re.IGNORECASE)
+re_speaker = re.compile(r'^(?:Interviewer|Aphasic):')
+
+# Searching re_portuguese tries "\w*" at every position of the line, so
+# lines without the word are skipped with a plain search first
+re_portuguese_word = re.compile(r'PORTUGUESE', re.IGNORECASE)
 
-    return mapping
+# Replaces the same whitespace as r'\s+' with a single space, but leaves
+# single spaces alone
+re_whitespace = re.compile(r'\s{2,}|[^\S ]')
+re_sq_brackets = re.compile(r'\[.*\]')
+re_spaces_and_dots = re.compile(r'^[ .]*$')
+
+translation_delims = ('\'', '`')
 
 
 class MalformedOdin(Exception):
@@ -40,22 +75,12 @@ class Parser(poioapi.io.graf.BaseParser):
         Parameters
         ----------
         :param input_stream: str or IOBase
-            Path of the ODIN source file.
+            Path of the ODIN source file. If None the file is not parsed,
+            it can be read with iter_sources() later.
         :param tier_label_map: the tier mapping for the file
 
         """
 
-        # regular expression to detect ignorable parts at the END of the <line> element.
-        self._author_detection = [
-            r'\w* \d+[: ]+\d+',  # for lines ending with one name author
-            r'\w+[; ]+\w+ \d+[: ]+\d+',  # for lines ending with two name author
-        ]
-
-        self._translation_delims=[
-            '\'',
-            '`'
-        ]
-
         #initializing ids
         self._current_ids = dict()
         self._init_current_ids()
@@ -77,7 +102,8 @@ class Parser(poioapi.io.graf.BaseParser):
 
         self._tier_hierarchy = None
 
-        self.parse(input_stream)
+        if input_stream is not None:
+            self.parse(input_stream)
 
     def tier_labels():
         doc = "The tier_labels property."
@@ -95,7 +121,9 @@ class Parser(poioapi.io.graf.BaseParser):
     tier_labels = property(**tier_labels())
 
     def parse(self, inputfile):
-        """ Main parsing function for ODIN files.
+        """ Main parsing function for ODIN files. The file is read with
+            iterparse, one <source> element at a time, and each element is
+            freed after its annotations were created.
 
         Parameter
         ---------
@@ -103,37 +131,87 @@ class Parser(poioapi.io.graf.BaseParser):
             The path of the source file
 
         """
-        #parse the xml file
-        root = ET.parse(inputfile)
+        for source in self._iter_source_elements(inputfile):
+            self._handle_source_element(source)
 
-        # storing the language in the metadata dictionary
-        language = root.getroot()
-        self.metadata['lang'] = language.get('code', default='und')
-        self._full_lang = language.get('name', default=None)
+    def iter_sources(self, inputfile):
+        """ Parse an ODIN file one <source> element at a time. Before each
+            source the annotations and the metadata of the previous source
+            are discarded, so after each step the parser only contains the
+            current source. The annotation IDs are unique in the whole file.
 
-        sources = root.findall('sources/source')
-        for source in sources:
+        Parameter
+        ---------
+        :param inputfile: str
+            The path of the source file
 
-            # incrementing record record_id
-            self._current_ids['record'] = self._current_ids['seq']
-            self._current_ids['seq'] += 1
+        Return
+        ------
+        :return: generator
+            Yields the parser itself after each source.
+        """
+        for source in self._iter_source_elements(inputfile):
+            self._annotations_for_parent = collections.defaultdict(list)
+            self.metadata = {'lang': self.metadata['lang']}
+            self._handle_source_element(source)
+            yield self
+
+    def _iter_source_elements(self, inputfile):
+        """ Generator over the "sources/source" elements of an ODIN file.
+            The language of the root element is stored when the root element
+            starts and each source element is cleared and removed from its
+            parent when the caller continues.
 
-            # build the metadata for the current record
-            record_metadata = self._build_source_metadata(source)
-            record_id = 'a{0}'.format(self._current_ids['record'])
-            # annotate source element (acts as record level)
-            self._annotations_for_parent[(None, self._record_tag)].append(
-                poioapi.io.graf.Annotation(record_id, ''))
+        """
+        # the elements from the root to the current element
+        path = []
+
+        for event, element in ET.iterparse(inputfile,
+                events=("start", "end")):
+            if event == "start":
+                if not path:
+                    # storing the language in the metadata dictionary
+                    self.metadata['lang'] = element.get('code', 'und')
+                    self._full_lang = element.get('name', None)
+                path.append(element)
+                continue
+
+            path.pop()
+            if element.tag == "source" and len(path) == 2 and \
+                    path[1].tag == "sources":
+                yield element
+                element.clear()
+                path[1].remove(element)
+
+    def _handle_source_element(self, source):
+        """ Creates the record annotation, the metadata and the annotations
+            of the examples of a <source> element.
 
-            self.metadata[record_id] = record_metadata
+        Parameter
+        ---------
+        :param source: xml.etree.ElementTree.Element
+            A 'source' element of the file.
+        """
+        # incrementing record record_id
+        self._current_ids['record'] = self._current_ids['seq']
+        self._current_ids['seq'] += 1
+
+        # build the metadata for the current record
+        record_metadata = self._build_source_metadata(source)
+        record_id = 'a{0}'.format(self._current_ids['record'])
+        # annotate source element (acts as record level)
+        self._annotations_for_parent[(None, self._record_tag)].append(
+            poioapi.io.graf.Annotation(record_id, ''))
 
-            # each source element only has a single igt element. so it should
-            # be safe to do this
-            examples = source.findall('igt/example')
-            for example in examples:
-                if self._build_tier_block(example):
-                    self._handle_example_element(record_id)
-                    self._init_tier_block()
+        self.metadata[record_id] = record_metadata
+
+        # each source element only has a single igt element. so it should
+        # be safe to do this
+        examples = source.findall('igt/example')
+        for example in examples:
+            if self._build_tier_block(example):
+                self._handle_example_element(record_id)
+                self._init_tier_block()
 
     def _build_tier_block(self, element):
         """ Function to build a tier block for processing. Also does cleaning
@@ -218,11 +296,9 @@ class Parser(poioapi.io.graf.BaseParser):
         words = self._tier_block['word'].split()
         morphemes = self._tier_block['morpheme'].split()
         glosses = self._tier_block['gloss'].split()
-        gt_with_underscore = [a for a in glosses
-                              if self._string_has_char_inside(a, '_')]
-
         if len(morphemes) > len(glosses):
-            if len(gt_with_underscore) == 0:
+            if not any(self._string_has_char_inside(a, '_')
+                       for a in glosses):
                 return
 
         # annotate the rest.
@@ -337,8 +413,7 @@ class Parser(poioapi.io.graf.BaseParser):
             True if the char if the char is found and is not at the edges of
             the string.
         """
-        idx = string.find(char)
-        return idx != -1 and idx != 0 and idx != len(string) - 1
+        return 0 < string.find(char) < len(string) - 1
 
     def _clean_translation_line(self, line):
         """ Function to perform specific cleaning of the translation tier.
@@ -353,7 +428,7 @@ class Parser(poioapi.io.graf.BaseParser):
             The parameter, after cleaning.
         """
         line = line.strip()
-        for delim in self._translation_delims:
+        for delim in translation_delims:
             line = line.strip(delim)
 
         return line
@@ -373,50 +448,43 @@ class Parser(poioapi.io.graf.BaseParser):
         ------
         :return:
         """
-        author_at_end = '[\[\(](?:'
-        author_at_end += '|'.join(self._author_detection)
-        author_at_end += ')[\)\]](?=$)'
-
-        if phrase:
-            re.sub(r'\b_+\b', '', line)
-
-        line = re.sub(r'^(?:\(?\d+\))?(?:\s*[a-z]\.)?', '', line)
-        line = re.sub(r'^\(?\d+[a-z]+\)', '', line)
-        line = re.sub(r'^\d+\.', '', line)
-        if self._full_lang is not None and self._full_lang != '':
-            line = re.sub(self._full_lang + ':', '', line)
-        line = re.sub(author_at_end, '', line)
-        line = re.sub(r'(?:DECL|WH|IMP): \w+$', '', line)
-        line = re.sub(r'\(?\w*\s*PORTUGUESE\)?$', '', line, flags=re.IGNORECASE)
+        # the removals depend on each other, so they are applied in order
+        line = re_numbering.sub('', line, 1)
+        if self._full_lang:
+            line = line.replace(self._full_lang + ':', '')
+        # the patterns are only applied to lines that can match, the end
+        # of the author pattern might be followed by a final newline
+        if line.endswith((')', ']', ')\n', ']\n')):
+            line = re_author_at_end.sub('', line)
+        if ': ' in line:
+            line = re_sentence_type.sub('', line)
+        if re_portuguese_word.search(line) is not None:
+            line = re_portuguese.sub('', line)
         line = line.strip('(')
         line = line.strip(')')
 
         # for now we are not implementing validity, so we clean it
-        line = re.sub(r'[*?#]', '', line)
+        line = line.replace('*', '').replace('?', '').replace('#', '')
 
         # possible speaker attribute cleaning. confirm if it is to ignore or not
-        line = re.sub(r'^(?:Interviewer|Aphasic):', '', line)
+        line = re_speaker.sub('', line, 1)
 
         # if anymore cleaning needs to be done, add it before this line
-        line = re.sub(r'\s+', ' ', line)
-
-        sq_brackets = re.search(r'\[.*\]', line)
-        if sq_brackets is not None:
-            start = sq_brackets.start() + 1
-            end = sq_brackets.end() - 1
-            inner = line[start:end]
-            if len(inner) == 1:
-                name = unicodedata.name(inner).lower()
-                if name.find('ellipsis') != -1:
+        line = re_whitespace.sub(' ', line)
+
+        if '[' in line:
+            sq_brackets = re_sq_brackets.search(line)
+            if sq_brackets is not None:
+                inner = line[sq_brackets.start() + 1:sq_brackets.end() - 1]
+                if len(inner) == 1:
+                    name = unicodedata.name(inner).lower()
+                    if name.find('ellipsis') != -1:
+                        return line.strip()
+                if re_spaces_and_dots.match(line) is not None:
                     return line.strip()
-            if re.match(r'^[ .]*$', line) is not None:
-                return line.strip()
-            line = re.sub(r'\[', '', line)
-            line = re.sub(r'\]', '', line)
+                line = line.replace('[', '').replace(']', '')
 
-        line = line.strip()
-
-        return line
+        return line.strip()
 
     def _init_current_ids(self):
         """ Method to initialize the annotation IDs tracking dictionary.
@@ -13,11 +13,124 @@
 
 from __future__ import absolute_import
 
-import re
+import poioapi.io.graf
+import poioapi.data
+import poioapi.mapper
 
-import xml.etree.ElementTree as ET
+default_tier_mapping = {
+    poioapi.data.TIER_UTTERANCE: ['ref'],
+    poioapi.data.TIER_WORD: ['t'],
+    poioapi.data.TIER_MORPHEME: ['m'],
+    poioapi.data.TIER_POS: ['p'],
+    poioapi.data.TIER_GLOSS: ['g']
+}
 
-import poioapi.io.graf
+
+def tier_mapping():
+    return poioapi.mapper.TierMapper(default_tier_mapping)
+
+
+class Record(poioapi.io.graf.AnnotationRecord):
+    """
+    A ref record of a Shoebox XML file together with the annotations of
+    its words, parts of speech, morphemes and glosses. The value of the
+    annotation are the words of the record, each followed by a space.
+
+    Attributes
+    ----------
+    name : str
+        The value of the name element that contains the record.
+
+    """
+
+    __slots__ = ["name"]
+
+    def __init__(self, annotation, name=None):
+        poioapi.io.graf.AnnotationRecord.__init__(self, annotation)
+        self.name = name
+
+    @property
+    def words(self):
+        return self.get_annotations_for_tier("t")
+
+
+def iter_records(filepath):
+    """Read the ref records of a Shoebox XML file one at a time. The
+    words, morphemes and the other child elements get IDs in the order of
+    the file, as they are not present in the XML.
+
+    Parameters
+    ----------
+    filepath : str or file object
+        The Shoebox XML file.
+
+    Returns
+    -------
+    records : generator of Record
+        The records of the file.
+
+    """
+
+    current_id = 0
+    name = None
+    record = None
+    words = None
+    word_id = None
+    morpheme_id = None
+
+    Annotation = poioapi.io.graf.Annotation
+
+    for event, element in poioapi.io.graf.iterparse_and_free(filepath,
+            set(["ref"])):
+        tag = element.tag
+
+        if event == "start":
+            if tag == "name":
+                name = element.attrib["value"]
+
+            elif tag == "ref":
+                record = Record(Annotation(element.attrib["value"], ""), name)
+                words = []
+
+            elif record is None:
+                continue
+
+            elif tag == "t":
+                current_id += 1
+                word_id = str(current_id)
+                words.append(element.attrib["value"])
+                record.add_annotation(tag, record.annotation.id,
+                    Annotation(word_id, element.attrib["value"]))
+
+            elif tag == "m":
+                current_id += 1
+                morpheme_id = str(current_id)
+                record.add_annotation(tag, word_id,
+                    Annotation(morpheme_id, element.attrib["value"]))
+
+            continue
+
+        if record is None:
+            continue
+
+        # p and g elements have no children, their IDs follow the order of
+        # the start tags
+        if tag == "ref":
+            if words:
+                record.annotation.value = " ".join(words) + " "
+            yield record
+            record = None
+
+        elif tag == "p":
+            if element.text and "-" not in element.text:
+                current_id += 1
+                record.add_annotation(tag, word_id,
+                    Annotation(str(current_id), element.text))
+
+        elif tag == "g":
+            current_id += 1
+            record.add_annotation(tag, morpheme_id,
+                Annotation(str(current_id), element.text))
 
 
 class Parser(poioapi.io.graf.BaseParser):
@@ -36,67 +149,35 @@ class Parser(poioapi.io.graf.BaseParser):
         self.parse()
 
     def parse(self):
-        """This method will parse the input file.
+        """This method will parse the input file. The
+        records are read one at a time with iter_records()
+        and their annotations are stored by the ID of their
+        parent annotation.
 
         """
 
-        root = ET.parse(self.filepath)
-        tree = root.getroot()
-        self._current_id = 0
-        self._elements_map = {"ref": [], "t": {}, "m": {},
-                              "g": {}, "p": {}, "f": {}}
+        records = []
 
-        self.parse_element_tree(tree)
+        # The annotations of each tier by the ID of their parent annotation
+        self._annotations_for_parent = {(None, "ref"): records}
+
+        for record in self.iter_records():
+            records.append(record.annotation)
+            self.meta_information = record.name
+            record.copy_annotations_to(self._annotations_for_parent)
+
+    def iter_records(self):
+        """Read the ref records of the Shoebox XML file
+        one at a time, without keeping the file in memory.
+
+        Returns
+        -------
+        records : generator of Record
+            The records of the file.
 
-    def parse_element_tree(self, tree):
-        """
-        tag name and value represent the title
-        ref represents the
         """
-        for t in tree:
-            if t.tag == "ref":
-                self._current_ref = t.attrib['value']
-                self._elements_map["ref"].append({"id":self._current_ref, "value":""})
-
-            elif t.tag == "t":
-                self._current_t = self._next_id()
-                self._add_elment_to_elements(t, self._current_t, self._current_ref,
-                                             t.attrib['value'])
-                self._add_phrase(t.attrib['value'])
-
-            elif t.tag == "p":
-                if t.text and "-" not in t.text:
-                    self._add_elment_to_elements(t, self._next_id(), self._current_t,
-                                                 t.text)
-
-            elif t.tag == "m":
-                self._current_m = self._next_id()
-                self._add_elment_to_elements(t, self._current_m, self._current_t,
-                                             t.attrib['value'])
-
-            elif t.tag == "g":
-                self._add_elment_to_elements(t, self._next_id(), self._current_m, t.text)
-
-            elif t.tag == "name":
-                self.meta_information = t.attrib["value"]
-
-            if len(t.getchildren()) > 0:
-                self.parse_element_tree(t)
-
-    def _add_phrase(self, value):
-        for ref in self._elements_map["ref"]:
-            if ref["id"] == self._current_ref:
-                ref["value"] += value + " "
-
-
-    def _add_elment_to_elements(self, t, id, parent=None, value=None, features=None, region=None):
-        if (t.tag, parent) in self._elements_map:
-            self._elements_map[(t.tag, parent)].append(
-                {"id": id, "value": value, "region": region, "features": features})
-        else:
-            self._elements_map[(t.tag, parent)] = [{"id": id, "value": value,
-                                                    "region": region,
-                                                    "features": features}]
+
+        return iter_records(self.filepath)
 
     def get_root_tiers(self):
         return [poioapi.io.graf.Tier("ref")]
@@ -111,17 +192,10 @@ class Parser(poioapi.io.graf.BaseParser):
             return [poioapi.io.graf.Tier("g")]
 
     def get_annotations_for_tier(self, tier, annotation_parent=None):
-        if tier.name == "ref":
-            return [poioapi.io.graf.Annotation(e["id"], e['value'])
-                    for e in self._elements_map[tier.name]]
-
-        else:
-            if (tier.name, annotation_parent.id) in self._elements_map:
-                return [poioapi.io.graf.Annotation(e["id"], e["value"],
-                                                   e["features"])
-                        for e in self._elements_map[(tier.name, annotation_parent.id)]]
-            else:
-                return []
+        parent_id = None
+        if annotation_parent is not None:
+            parent_id = annotation_parent.id
+        return self._annotations_for_parent.get((parent_id, tier.name), [])
 
     def tier_has_regions(self, tier):
         #if tier.name == "t":
@@ -130,14 +204,6 @@ class Parser(poioapi.io.graf.BaseParser):
         return False
 
     def region_for_annotation(self, annotation):
-        idGroup = [value for key, value in self._elements_map.items()
-                   if "idGroup" in key]
-
-        for elements in idGroup:
-            for e in elements:
-                if e["id"] == annotation.id:
-                    return e["region"]
-
         return None
 
     def get_primary_data(self):
@@ -156,22 +222,3 @@ class Parser(poioapi.io.graf.BaseParser):
         primary_data.filename = "unknown"
 
         return primary_data
-
-    def _next_id(self):
-        current_id = str(int(self._current_id) + 1)
-        self._current_id = current_id
-
-        return current_id
-
-    def _split_region(self, element):
-        try:
-            aud = element.find("aud").text
-            results = re.findall("\d*\.\d+|\d+", aud)
-
-            region = (results[-2], results[-1])
-            value = aud.split(results[-2])[0]
-        except:
-            value = None
-            region = None
-
-        return value, region
\ No newline at end of file
@@ -13,6 +13,7 @@
 
 from __future__ import unicode_literals
 
+import collections
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 
@@ -50,6 +51,52 @@ class Parser(poioapi.io.graf.BaseParser):
         self.tree = self.root.find("{0}TextCorpus".format(self.namespace))
         self._current_id = 0
 
+        # The sentences with their regions, the tokens by ID and the POS
+        # tags and lemmas by the token IDs they refer to. The maps are
+        # built once, the annotations of the child tiers are then resolved
+        # with dictionary lookups.
+        self._sentences = []
+        self._region_for_sentence = dict()
+        sentences = self.tree.find("{0}sentences".format(self.namespace))
+        if sentences is not None:
+            for s in sentences.findall("{0}sentence".format(self.namespace)):
+                self._sentences.append(s)
+                start = s.attrib.get("start")
+                end = s.attrib.get("end")
+                if start is not None and end is not None:
+                    self._region_for_sentence[s.attrib["ID"]] = (start, end)
+
+        self._token_for_id = dict()
+        for tokens in self.tree.findall("{0}tokens".format(self.namespace)):
+            for t in tokens:
+                self._token_for_id[t.attrib["ID"]] = t.text
+
+        self._postags_for_token = self._elements_for_token("POStags")
+        self._lemmas_for_token = self._elements_for_token("lemmas")
+
+    def _elements_for_token(self, layer):
+        """Map the token IDs to the elements of a layer that refer to them.
+
+        Parameters
+        ----------
+        layer : str
+            The name of the layer element, e.g. "POStags".
+
+        Returns
+        -------
+        elements_for_token : defaultdict
+            Lists of elements by the value of their tokenIDs attribute.
+
+        """
+
+        elements_for_token = collections.defaultdict(list)
+        for elements in self.tree.findall("{0}{1}".format(
+                self.namespace, layer)):
+            for e in elements:
+                elements_for_token[e.attrib["tokenIDs"]].append(e)
+
+        return elements_for_token
+
     def get_root_tiers(self):
         """This method retrieves all the root tiers.
 
@@ -105,27 +152,22 @@ class Parser(poioapi.io.graf.BaseParser):
         annotations = []
 
         if tier.name == "sentences":
-            sentences = self.tree.find("{0}sentences".format(self.namespace))
-            for s in sentences.findall("{0}sentence".format(self.namespace)):
+            for s in self._sentences:
                 annotations.append(poioapi.io.graf.Annotation(s.attrib["ID"], s.attrib["tokenIDs"]))
 
         elif tier.name == "tokens":
-            for tokens in self.tree.findall("{0}tokens".format(self.namespace)):
-                for t in tokens:
-                    if t.attrib["ID"] in annotation_parent.value:
-                        annotations.append(poioapi.io.graf.Annotation(t.attrib["ID"], t.text))
+            # the value of a sentence is the list of its token IDs
+            for token_id in annotation_parent.value.split():
+                if token_id in self._token_for_id:
+                    annotations.append(poioapi.io.graf.Annotation(token_id, self._token_for_id[token_id]))
 
         elif tier.name == "POStags":
-            for tags in self.tree.findall("{0}POStags".format(self.namespace)):
-                for t in tags:
-                    if t.attrib["tokenIDs"] == annotation_parent.id:
-                        annotations.append(poioapi.io.graf.Annotation(self._next_id(), t.text))
+            for t in self._postags_for_token.get(annotation_parent.id, []):
+                annotations.append(poioapi.io.graf.Annotation(self._next_id(), t.text))
 
         elif tier.name == "lemmas":
-            for lemmas in self.tree.findall("{0}lemmas".format(self.namespace)):
-                for l in lemmas:
-                    if l.attrib["tokenIDs"] == annotation_parent.id:
-                        annotations.append(poioapi.io.graf.Annotation(l.attrib["ID"], l.text))
+            for l in self._lemmas_for_token.get(annotation_parent.id, []):
+                annotations.append(poioapi.io.graf.Annotation(l.attrib["ID"], l.text))
 
         return annotations
 
@@ -142,10 +184,7 @@ class Parser(poioapi.io.graf.BaseParser):
         return False
 
     def region_for_annotation(self, annotation):
-        sentences = self.tree.find("{0}sentences".format(self.namespace))
-        for s in sentences.findall("{0}sentence".format(self.namespace)):
-            if s.attrib["ID"] == annotation.id:
-                return s.attrib["start"], s.attrib["end"]
+        return self._region_for_sentence.get(annotation.id, None)
 
     def get_primary_data(self):
         """This method gets the information about
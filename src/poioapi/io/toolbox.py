@@ -51,17 +51,19 @@ def char_len(string):
     return(len(string.encode("utf-8")))
 
 
+default_tier_mapping = {
+    poioapi.data.TIER_UTTERANCE: ['utterance_gen'],
+    poioapi.data.TIER_WORD: ['tx', 't'],
+    poioapi.data.TIER_TRANSLATION: ['ft', 'f'],
+    poioapi.data.TIER_MORPHEME: ['mb', 'm'],
+    poioapi.data.TIER_GLOSS: ['ge', 'g'],
+    poioapi.data.TIER_POS: ['ps', 'p'],
+    poioapi.data.TIER_COMMENT: ['nt']
+}
+
+
 def tier_mapping():
-    mapping = poioapi.mapper.TierMapper()
-    mapping.append_to_tier_labels(poioapi.data.TIER_UTTERANCE, ['utterance_gen'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_WORD, ['tx', 't'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_TRANSLATION, ['ft', 'f'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_MORPHEME, ['mb', 'm'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_GLOSS, ['ge', 'g'])
-    mapping.append_to_tier_labels(poioapi.data.TIER_POS, ['ps', 'p']),
-    mapping.append_to_tier_labels(poioapi.data.TIER_COMMENT, ['nt'])
-
-    return mapping
+    return poioapi.mapper.TierMapper(default_tier_mapping)
 
 
 class Parser(poioapi.io.graf.BaseParser):
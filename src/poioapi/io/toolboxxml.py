@@ -15,11 +15,155 @@ from __future__ import absolute_import
 
 import re
 
-import xml.etree.ElementTree as ET
-
 import poioapi.io.graf
 
 
+class ItemGroup(poioapi.io.graf.AnnotationRecord):
+    """
+    An itmGroup of a Toolbox XML file together with the annotations of its
+    idGroups, txGroups, words, morphemes and glosses. The value of the
+    annotation is the title and its features contain the speaker.
+
+    Attributes
+    ----------
+    regions : dict
+        The regions of the idGroups by their ID.
+
+    """
+
+    __slots__ = ["regions"]
+
+    def __init__(self, annotation):
+        poioapi.io.graf.AnnotationRecord.__init__(self, annotation)
+        self.regions = {}
+
+    @property
+    def id_groups(self):
+        return self.get_annotations_for_tier("idGroup")
+
+
+def iter_item_groups(filepath):
+    """Read the itmGroups of a Toolbox XML file one at a time. The
+    txGroups, words, morphemes and glosses get IDs in the order of the
+    file, as they are not present in the XML.
+
+    Parameters
+    ----------
+    filepath : str or file object
+        The Toolbox XML file.
+
+    Returns
+    -------
+    item_groups : generator of ItemGroup
+        The itmGroups of the file.
+
+    """
+
+    current_id = 0
+    item_group = None
+
+    # The values of the child elements of the current itmGroup and
+    # idGroup, their annotations are created when the group ends
+    item = None
+    id_groups = None
+    id_group = None
+    tx_groups = None
+    tx_group_id = None
+    tx_id = None
+
+    Annotation = poioapi.io.graf.Annotation
+
+    for event, element in poioapi.io.graf.iterparse_and_free(filepath,
+            set(["itmGroup"])):
+        tag = element.tag
+
+        if event == "start":
+            if tag == "itmGroup":
+                item = {}
+                id_groups = []
+                item_group = ItemGroup(None)
+
+            elif item_group is None:
+                continue
+
+            elif tag == "idGroup":
+                id_group = {}
+                tx_groups = []
+
+            elif tag == "txGroup" and id_group is not None:
+                current_id += 1
+                tx_group_id = str(current_id)
+                tx_groups.append(Annotation(tx_group_id, None))
+
+            continue
+
+        if item_group is None:
+            continue
+
+        # tx, mr and mg elements have no children, their IDs follow the
+        # order of the start tags
+        if tag == "itmGroup":
+            item_group.annotation = Annotation(item.get("itm"),
+                item.get("ti"), {"sp": item.get("sp")})
+            item_group.add_annotations("idGroup", item_group.annotation.id,
+                id_groups)
+            yield item_group
+            item_group = None
+
+        elif id_group is None:
+            if tag in ("itm", "ti", "sp"):
+                item[tag] = element.text
+
+        elif tag == "idGroup":
+            id_group_id = id_group.get("id")
+            value, region = _split_region(id_group.get("aud"))
+            id_groups.append(Annotation(id_group_id, value,
+                {"fg": id_group.get("fg")}))
+            if id_group_id not in item_group.regions:
+                item_group.regions[id_group_id] = region
+
+            item_group.add_annotations("txGroup", id_group_id, tx_groups)
+            id_group = None
+
+        elif tag in ("id", "aud"):
+            id_group[tag] = element.text
+
+        elif tag == "fg":
+            # as in the tree parser, the free translation is only stored for
+            # fg elements with child elements
+            if len(element) > 0:
+                id_group[tag] = element.text
+
+        elif tag == "tx":
+            current_id += 1
+            tx_id = str(current_id)
+            item_group.add_annotation(tag, tx_group_id,
+                Annotation(tx_id, element.text))
+
+        elif tag == "mr" or tag == "mg":
+            current_id += 1
+            item_group.add_annotation(tag, tx_id,
+                Annotation(str(current_id), element.text))
+
+
+def _split_region(aud):
+    """Split the text of an aud element into the value and the region,
+    which are the last two numbers of the text.
+
+    """
+
+    try:
+        results = re.findall("\d*\.\d+|\d+", aud)
+
+        region = (results[-2], results[-1])
+        value = aud.split(results[-2])[0]
+    except:
+        value = None
+        region = None
+
+    return value, region
+
+
 class Parser(poioapi.io.graf.BaseParser):
 
     def __init__(self, filepath):
@@ -36,59 +180,39 @@ class Parser(poioapi.io.graf.BaseParser):
         self.parse()
 
     def parse(self):
-        """This method will parse the input file.
+        """This method will parse the input file. The
+        itmGroups are read one at a time with
+        iter_item_groups() and their annotations are
+        stored by the ID of their parent annotation.
 
         """
 
-        root = ET.parse(self.filepath)
-        tree = root.getroot()
-        self._current_id = 0
-        self._elements_map = {"itmGroup": [], "idGroup": {}, "txGroup": {},
-                              "tx": {}, "mr": {}, "mg": {}}
-
-        self.parse_element_tree(tree)
-
-    def parse_element_tree(self, tree):
-        for t in tree:
-            if t.tag == "itmGroup":
-                self._current_itmGroup = t.find("itm").text
-                self._elements_map["itmGroup"].append(
-                    {"id": self._current_itmGroup, "value": t.find("ti").text,
-                     "features": {'sp': t.find("sp").text}})
-
-            elif t.tag == "idGroup":
-                self._current_idGroup = t.find("id").text
-                value, region = self._split_region(t)
-                fg = None
+        item_groups = []
 
-                if len(t.find("fg")) > 0:
-                    fg = t.find("fg").text
+        # The annotations of each tier by the ID of their parent annotation
+        self._annotations_for_parent = {(None, "itmGroup"): item_groups}
+        self._region_for_id_group = {}
 
-                self._add_elment_to_elements(t, self._current_idGroup,
-                                             self._current_itmGroup, value, {"fg": fg}, region)
+        for item_group in self.iter_item_groups():
+            item_groups.append(item_group.annotation)
+            item_group.copy_annotations_to(self._annotations_for_parent)
 
-            elif t.tag == "txGroup":
-                self._current_txGroup = self._next_id()
-                self._add_elment_to_elements(t, self._current_txGroup, self._current_idGroup)
+            for id_group_id, region in item_group.regions.items():
+                if id_group_id not in self._region_for_id_group:
+                    self._region_for_id_group[id_group_id] = region
 
-            elif t.tag == "tx":
-                self._current_tx = self._next_id()
-                self._add_elment_to_elements(t, self._current_tx, self._current_txGroup, t.text)
+    def iter_item_groups(self):
+        """Read the itmGroups of the Toolbox XML file one
+        at a time, without keeping the file in memory.
 
-            elif t.tag == "mg" or t.tag == "mr":
-                self._add_elment_to_elements(t, self._next_id(), self._current_tx, t.text)
+        Returns
+        -------
+        item_groups : generator of ItemGroup
+            The itmGroups of the file.
 
-            if len(t.getchildren()) > 0:
-                self.parse_element_tree(t)
+        """
 
-    def _add_elment_to_elements(self, t, id, parent=None, value=None, features=None, region=None):
-        if (t.tag, parent) in self._elements_map:
-            self._elements_map[(t.tag, parent)].append(
-                {"id": id, "value": value, "region": region, "features": features})
-        else:
-            self._elements_map[(t.tag, parent)] = [{"id": id, "value": value,
-                                                    "region": region,
-                                                    "features": features}]
+        return iter_item_groups(self.filepath)
 
     def get_root_tiers(self):
         return [poioapi.io.graf.Tier("itmGroup")]
@@ -105,18 +229,10 @@ class Parser(poioapi.io.graf.BaseParser):
                     poioapi.io.graf.Tier("mg")]
 
     def get_annotations_for_tier(self, tier, annotation_parent=None):
-        if tier.name == "itmGroup":
-            return [poioapi.io.graf.Annotation(e["id"], e["value"],
-                                               e["features"])
-                    for e in self._elements_map[tier.name]]
-
-        else:
-            if (tier.name, annotation_parent.id) in self._elements_map:
-                return [poioapi.io.graf.Annotation(e["id"], e["value"],
-                                                   e["features"])
-                        for e in self._elements_map[(tier.name, annotation_parent.id)]]
-            else:
-                return []
+        parent_id = None
+        if annotation_parent is not None:
+            parent_id = annotation_parent.id
+        return self._annotations_for_parent.get((parent_id, tier.name), [])
 
     def tier_has_regions(self, tier):
         if tier.name == "idGroup":
@@ -125,15 +241,7 @@ class Parser(poioapi.io.graf.BaseParser):
         return False
 
     def region_for_annotation(self, annotation):
-        idGroup = [value for key, value in self._elements_map.items()
-                   if "idGroup" in key]
-
-        for elements in idGroup:
-            for e in elements:
-                if e["id"] == annotation.id:
-                    return e["region"]
-
-        return None
+        return self._region_for_id_group.get(annotation.id, None)
 
     def get_primary_data(self):
         """This method gets the information about
@@ -151,22 +259,3 @@ class Parser(poioapi.io.graf.BaseParser):
         primary_data.filename = "unknown"
 
         return primary_data
-
-    def _next_id(self):
-        current_id = str(int(self._current_id) + 1)
-        self._current_id = current_id
-
-        return current_id
-
-    def _split_region(self, element):
-        try:
-            aud = element.find("aud").text
-            results = re.findall("\d*\.\d+|\d+", aud)
-
-            region = (results[-2], results[-1])
-            value = aud.split(results[-2])[0]
-        except:
-            value = None
-            region = None
-
-        return value, region
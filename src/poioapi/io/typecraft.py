@@ -28,7 +28,8 @@ import poioapi.annotationgraph
 import poioapi.data
 import poioapi.mapper
 
-# Tier map
+# The tier labels of the format, the tier mappers of the annotation graphs
+# start with these labels
 tier_map = {
     poioapi.data.TIER_UTTERANCE: ['phrase', 'utterance_gen'],
     poioapi.data.TIER_WORD: ['word', 't'],
@@ -40,6 +41,141 @@ tier_map = {
 }
 
 
+def tier_mapping():
+    return poioapi.mapper.TierMapper(tier_map)
+
+
+class Phrase(poioapi.io.graf.AnnotationRecord):
+    """
+    A phrase of a Typecraft file together with the annotations of its
+    words, parts of speech, morphemes, glosses, translations and
+    descriptions. The value of the annotation is the original text of the
+    phrase.
+
+    """
+
+    __slots__ = []
+
+    @property
+    def words(self):
+        return self.get_annotations_for_tier("word")
+
+    @property
+    def translations(self):
+        return self.get_annotations_for_tier("translation")
+
+    @property
+    def descriptions(self):
+        return self.get_annotations_for_tier("description")
+
+
+def iter_phrases(filepath):
+    """Read the phrases of a Typecraft file one at a time. The words,
+    morphemes and the other child elements get IDs in the order of the
+    file, as they are not present in the XML.
+
+    Parameters
+    ----------
+    filepath : str or file object
+        The Typecraft file.
+
+    Returns
+    -------
+    phrases : generator of Phrase
+        The phrases of the file.
+
+    """
+
+    tier_for_tag = None
+    current_id = 0
+    phrase = None
+    word_id = None
+    morpheme_id = None
+
+    Annotation = poioapi.io.graf.Annotation
+
+    for event, element in poioapi.io.graf.iterparse_and_free(filepath,
+            set(["phrase"])):
+        if tier_for_tag is None:
+            # The namespaced tags are built once from the root element, the
+            # map returns the tier name for each tag
+            namespace = re.findall(r"^\{(.*?)\}", element.tag)
+            if namespace:
+                prefix = "{{{0}}}".format(namespace[0])
+            else:
+                prefix = ""
+            tier_for_tag = dict(("{0}{1}".format(prefix, tag), tag)
+                for tag in ["phrase", "original", "word", "pos", "morpheme",
+                            "gloss", "description", "translation"])
+
+        tier = tier_for_tag.get(element.tag, None)
+
+        if event == "start":
+            if tier == "phrase":
+                phrase = Phrase(Annotation(element.attrib["id"], None,
+                    _get_features(element.attrib)))
+
+            elif phrase is None:
+                continue
+
+            elif tier == "word":
+                current_id += 1
+                word_id = str(current_id)
+                phrase.add_annotation(tier, phrase.annotation.id,
+                    Annotation(word_id, element.attrib["text"],
+                               _get_features(element.attrib)))
+
+            elif tier == "morpheme":
+                current_id += 1
+                morpheme_id = str(current_id)
+                phrase.add_annotation(tier, word_id,
+                    Annotation(morpheme_id, element.attrib["text"],
+                               _get_features(element.attrib)))
+
+            continue
+
+        if tier is None or phrase is None:
+            continue
+
+        if tier == "phrase":
+            yield phrase
+            phrase = None
+
+        elif tier == "original":
+            phrase.annotation.value = element.text
+
+        elif tier == "pos":
+            current_id += 1
+            phrase.add_annotation(tier, word_id,
+                Annotation(str(current_id), element.text))
+
+        elif tier == "gloss":
+            current_id += 1
+            phrase.add_annotation(tier, morpheme_id,
+                Annotation(str(current_id), element.text))
+
+        elif tier == "description" or tier == "translation":
+            current_id += 1
+            phrase.add_annotation(tier, phrase.annotation.id,
+                Annotation(str(current_id), element.text))
+
+
+def _get_features(attributes):
+    """This method gets the attribute data from
+    the tag elements.
+
+    """
+
+    features = {}
+
+    for key, value in attributes.items():
+        if key != "id":
+            if key != "text":
+                features[key] = value
+
+    return features
+
+
 class Parser(poioapi.io.graf.BaseParser):
     """
     Class that will handle the parse of
@@ -62,67 +198,33 @@ class Parser(poioapi.io.graf.BaseParser):
 
     def parse(self):
         """This method it will parse the Typecraft
-        file.
+        file. The phrases are read one at a time with
+        iter_phrases() and their annotations are stored
+        by the ID of their parent annotation.
 
         """
 
-        self.nodetree = ET.parse(self.filepath)
-        self.tree = self.nodetree.getroot()
-        self.namespace = {'xmlns': re.findall(r"\{(.*?)\}", self.tree.tag)[0]}
-        self._current_id = 0
-        self._elements_map = {"phrase": [], "word": [], "translation": [],
-                              "description": [], "pos": [], "morpheme": [],
-                              "gloss": []}
+        phrases = []
 
-        self.parse_element_tree(self.tree)
+        # The annotations of each tier by the ID of their parent annotation
+        self._annotations_for_parent = {(None, "phrase"): phrases}
 
-    def parse_element_tree(self, tree):
-        """This method it will parse the XML elements
-        into a map. It also create ids for the child
-        elements since they are not present in the
-        XML.
+        for phrase in self.iter_phrases():
+            phrases.append(phrase.annotation)
+            phrase.copy_annotations_to(self._annotations_for_parent)
+
+    def iter_phrases(self):
+        """Read the phrases of the Typecraft file one at
+        a time, without keeping the file in memory.
+
+        Returns
+        -------
+        phrases : generator of Phrase
+            The phrases of the file.
 
         """
 
-        for element in tree:
-            if element.tag == "{" + self.namespace['xmlns'] + "}" + "phrase":
-                self._elements_map["phrase"].append({"id": element.attrib["id"],
-                                                     "attrib": element.attrib})
-                self._current_phrase_id = element.attrib["id"]
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "original":
-                for i, el in enumerate(self._elements_map["phrase"]):
-                    if el["id"] == self._current_phrase_id:
-                        el["value"] = element.text
-                        self._elements_map["phrase"][0] = el
-
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "word":
-                self._current_word_id = self._next_id()
-                self._elements_map["word"].append({"id": self._current_word_id,
-                                                   "attrib": element.attrib,
-                                                   "parent": self._current_phrase_id})
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "pos":
-                self._elements_map["pos"].append({"id": self._next_id(),
-                                                  "value": element.text,
-                                                  "parent": self._current_word_id})
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "morpheme":
-                self._current_morpheme_id = self._next_id()
-                self._elements_map["morpheme"].append({"id": self._current_morpheme_id,
-                                                       "attrib": element.attrib,
-                                                       "parent": self._current_word_id})
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "gloss":
-                self._elements_map["gloss"].append({"id": self._next_id(),
-                                                    "value": element.text,
-                                                    "parent": self._current_morpheme_id})
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "description":
-                self._elements_map["description"].append({"id": self._next_id(),
-                                                          "value": element.text,
-                                                          "parent": self._current_phrase_id})
-            elif element.tag == "{" + self.namespace['xmlns'] + "}" + "translation":
-                self._elements_map["translation"].append({"id": self._next_id(),
-                                                          "value": element.text,
-                                                          "parent": self._current_phrase_id})
-            if len(element.getchildren()) > 0:
-                self.parse_element_tree(element)
+        return iter_phrases(self.filepath)
 
     def get_root_tiers(self):
         return [poioapi.io.graf.Tier("phrase")]
@@ -141,26 +243,10 @@ class Parser(poioapi.io.graf.BaseParser):
             return [poioapi.io.graf.Tier("gloss")]
 
     def get_annotations_for_tier(self, tier, annotation_parent=None):
-        if tier.name == "phrase":
-            return [poioapi.io.graf.Annotation(e["id"], e["value"],
-                                               self._get_features(e["attrib"]))
-                    for e in self._elements_map[tier.name]]
-
-        elif tier.name == "word" or tier.name == "morpheme":
-            annotations = []
-            for e in self._elements_map[tier.name]:
-                if e["parent"] == annotation_parent.id:
-                    features = self._get_features(e["attrib"])
-                    value = e["attrib"]["text"]
-                    annotations.append(poioapi.io.graf.Annotation(e["id"],
-                        value, features))
-
-            return annotations
-
-        else:
-            return [poioapi.io.graf.Annotation(e["id"], e["value"])
-                    for e in self._elements_map[tier.name]
-                    if e["parent"] == annotation_parent.id]
+        parent_id = None
+        if annotation_parent is not None:
+            parent_id = annotation_parent.id
+        return self._annotations_for_parent.get((parent_id, tier.name), [])
 
     def get_primary_data(self):
         """This method gets the information about
@@ -180,27 +266,6 @@ class Parser(poioapi.io.graf.BaseParser):
 
         return primary_data
 
-    def _get_features(self, attributes):
-        """This method gets the attribute data from
-        the tag elements.
-
-        """
-
-        features = {}
-
-        for key, value in attributes.items():
-            if key != "id":
-                if key != "text":
-                    features[key] = value
-
-        return features
-
-    def _next_id(self):
-        current_id = str(int(self._current_id) + 1)
-        self._current_id = current_id
-
-        return current_id
-
     def region_for_annotation(self, annotation):
         pass
 
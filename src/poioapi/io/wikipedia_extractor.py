@@ -10,19 +10,74 @@
 from __future__ import absolute_import, unicode_literals
 
 import os
+import codecs
 
 import xml.etree.ElementTree as ET
 
 import poioapi.io.graf
 
 
+def _document_text(element):
+    """Return the text of a <doc> element of the extractor output. The text
+    is the text of the element and the tail of its first child element.
+
+    """
+
+    text = element.text or ""
+    if len(element) != 0:
+        text += element[0].tail or ""
+
+    return text
+
+
 class Parser(poioapi.io.graf.BaseParser):
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, streaming=False, primary_data_file=None):
+        """Class's constructor.
+
+        Parameters
+        ----------
+        filepath : str
+            Path of the Wikipedia extractor XML file.
+        streaming : bool
+            If True the file is not parsed in the constructor. Instead the
+            <doc> elements are read one at a time while the GrAFConverter
+            asks for them and the text of each document is written to the
+            primary data file right away, so neither the XML tree nor the
+            text are kept in memory. The file can then only be converted
+            once.
+        primary_data_file : str
+            The path of the text file for the primary data in streaming
+            mode. The default is the path of the input file with the
+            extension ".txt", or with "-primary.txt" if the input file
+            itself has the extension ".txt".
+
+        Raises
+        ------
+        ValueError
+            If the primary data file is the input file.
+
+        """
+
         self.filepath = filepath
         (self.basedirname, _) = os.path.splitext(os.path.abspath(self.filepath))
 
-        self.parse()
+        self.streaming = streaming
+        input_file = os.path.abspath(self.filepath)
+        if primary_data_file is None:
+            primary_data_file = self.basedirname + '.txt'
+            if os.path.abspath(primary_data_file) == input_file:
+                primary_data_file = self.basedirname + '-primary.txt'
+        elif os.path.abspath(primary_data_file) == input_file:
+            raise ValueError(
+                "The primary data file can not be the input file.")
+        self.primary_data_file = primary_data_file
+
+        self.documents_map = {}
+        self.documents = []
+        self.root = None
+        if not streaming:
+            self.parse()
 
     def parse(self):
         self.root = ET.parse(self.filepath).getroot()
@@ -36,12 +91,15 @@ class Parser(poioapi.io.graf.BaseParser):
         pass
 
     def get_annotations_for_tier(self, tier, annotation_parent=None):
+        if tier.name == "doc" and self.streaming:
+            return self._stream_documents()
+
         annotations = []
         last_position = 0
 
         if tier.name == "doc":
             for a, annotation in enumerate(self.root):
-                text = annotation.text
+                text = _document_text(annotation)
                 id = annotation.attrib["id"]
 
                 features = {"title":annotation.attrib["title"],
@@ -50,9 +108,6 @@ class Parser(poioapi.io.graf.BaseParser):
                 annotations.append(poioapi.io.graf.Annotation(id,
                     None, features))
 
-                if len(annotation) is not 0:
-                    text += annotation[0].tail
-
                 self.documents_map[id] = (last_position, last_position +
                                                          len(text) + 1)
                 self.documents.append(text)
@@ -61,6 +116,42 @@ class Parser(poioapi.io.graf.BaseParser):
 
         return annotations
 
+    def _stream_documents(self):
+        """Read the <doc> elements one at a time with iterparse. The text of
+        each document is written to the primary data file, separated by a
+        newline as in the content of the primary data in the default mode,
+        and its region is computed from the number of characters written so
+        far.
+
+        """
+
+        last_position = 0
+
+        f = codecs.open(self.primary_data_file, 'w', 'utf-8')
+        try:
+            for event, element in poioapi.io.graf.iterparse_and_free(
+                    self.filepath, set(["doc"])):
+                if event == "start" or element.tag != "doc":
+                    continue
+
+                text = _document_text(element)
+                id = element.attrib["id"]
+
+                features = {"title":element.attrib["title"],
+                            "url":element.attrib["url"]}
+
+                if last_position > 0:
+                    f.write("\n")
+                f.write(text)
+
+                self.documents_map[id] = (last_position, last_position +
+                                                         len(text) + 1)
+                last_position += len(text) + 1
+
+                yield poioapi.io.graf.Annotation(id, None, features)
+        finally:
+            f.close()
+
     def region_for_annotation(self, annotation):
         return self.documents_map[annotation.id]
 
@@ -96,6 +187,10 @@ class Parser(poioapi.io.graf.BaseParser):
 
         primary_data = poioapi.io.graf.PrimaryData()
         primary_data.type = poioapi.io.graf.TEXT
-        primary_data.content = "\n".join(self.documents)
+        if self.streaming:
+            # the text was written while the documents were read
+            primary_data.filename = self.primary_data_file
+        else:
+            primary_data.content = "\n".join(self.documents)
 
         return primary_data
@@ -13,6 +13,7 @@ import poioapi.data
 import os.path
 import json
 import sys
+import threading
 
 
 def list_from_json_dict(json_dict):
@@ -56,12 +57,48 @@ class MalformedJsonFile(Exception):
 
 
 class TierMapper(object):
+    """ This class maps the tier types of poioapi.data.tier_labels to the
+        tier labels of a file format. Each instance has its own mapping, an
+        initial mapping that is passed to the constructor is shared until
+        the instance changes its labels for the first time. Changes are made
+        on a copy of the mapping that replaces the current one when it is
+        complete, so that an instance can be read while another thread
+        loads or appends labels.
+
+        Parameters
+        ----------
+        tier_mapping : dict
+            An optional initial mapping of tier types to lists of labels.
+            The dict and its lists are never changed by the instance.
+    """
 
     _tier_mapping_name = 'tier_mapping'
-    _tier_mapping = {}
 
-    def __init__(self):
-        pass
+    def __init__(self, tier_mapping=None):
+        self._lock = threading.RLock()
+        if tier_mapping is None:
+            tier_mapping = {}
+        self._set_mapping(tier_mapping)
+
+    def _set_mapping(self, tier_mapping):
+        """ This method replaces the mapping and builds the reverse dictionary
+            from the labels to their tier type. If a label is mapped to more
+            than one tier type the first one is used.
+        """
+        label_to_tier = dict()
+        for tier_identifier, labels in tier_mapping.items():
+            for label in labels:
+                if label not in label_to_tier:
+                    label_to_tier[label] = tier_identifier
+
+        self._tier_mapping = tier_mapping
+        self._label_to_tier = label_to_tier
+
+    def __copy__(self):
+        return TierMapper(self._tier_mapping)
+
+    def _copy_mapping(self):
+        return dict((k, list(v)) for k, v in self._tier_mapping.items())
 
     def load_mapping(self, file_path):
         """ This method initializes the tier and tag mappings.
@@ -85,7 +122,7 @@ class TierMapper(object):
 
                 #load the mapping of the tier names for each type
                 if self._tier_mapping_name in mappings.keys():
-                    self._tier_mapping = dict()
+                    tier_mapping = dict()
                     mapping = mappings[self._tier_mapping_name]
                     if isinstance(mapping, dict):
             # this cycle is to ignore any tier mapping whose key is not defined
@@ -93,12 +130,15 @@ class TierMapper(object):
                         for key in poioapi.data.tier_labels.keys():
                             try:
                                 if isinstance(mapping[poioapi.data.tier_labels[key]], list):
-                                    self.append_to_tier_labels(key, mapping[poioapi.data.tier_labels[key]])
+                                    self._append_labels(tier_mapping, key, mapping[poioapi.data.tier_labels[key]])
                                 else:
                                     raise MalformedJsonFile('The tier mapping should be a list')
                             except KeyError:
                                 pass
 
+                    with self._lock:
+                        self._set_mapping(tier_mapping)
+
             else:
                 raise IOError('File was not found')
 
@@ -123,7 +163,7 @@ class TierMapper(object):
         if tier_identifier is None or not isinstance(tier_identifier, int):
             raise ValueError('The tier_identifier must be an integer.')
 
-        if tier_identifier not in self._tier_mapping.keys():
+        if tier_identifier not in self._tier_mapping:
             raise ValueError('The specified tier does not exist.')
 
         label = self._tier_mapping[tier_identifier][label_index]
@@ -141,16 +181,13 @@ class TierMapper(object):
             Return
             ------
             labels : list
-                The labels mapped to the specified tier
+                A copy of the labels mapped to the specified tier, use
+                append_to_tier_labels to add labels.
         """
         if tier_identifier is None or not isinstance(tier_identifier, int):
             raise ValueError('The tier_identifier must be an integer.')
 
-        labels = []
-        if tier_identifier in self._tier_mapping.keys():
-            labels = self._tier_mapping[tier_identifier]
-
-        return labels
+        return list(self._tier_mapping.get(tier_identifier, []))
 
     def append_to_tier_labels(self, tier_identifier, new_value):
         """ Method to add a new label to a level
@@ -164,12 +201,18 @@ class TierMapper(object):
         if not isinstance(new_value, list):
             raise ValueError('The new_value parameter must be a list')
 
-        if tier_identifier not in self._tier_mapping.keys() or self._tier_mapping[tier_identifier] is None:
-            self._tier_mapping[tier_identifier] = []
+        with self._lock:
+            tier_mapping = self._copy_mapping()
+            self._append_labels(tier_mapping, tier_identifier, new_value)
+            self._set_mapping(tier_mapping)
+
+    def _append_labels(self, tier_mapping, tier_identifier, new_value):
+        if tier_identifier not in tier_mapping or tier_mapping[tier_identifier] is None:
+            tier_mapping[tier_identifier] = []
 
         for val in new_value:
-            if val not in self._tier_mapping[tier_identifier]:
-                self._tier_mapping[tier_identifier].append(val)
+            if val not in tier_mapping[tier_identifier]:
+                tier_mapping[tier_identifier].append(val)
 
     def tier_label_exists(self, label):
         """ Function to check whether a label exists on the mapping.
@@ -177,17 +220,24 @@ class TierMapper(object):
             The label to verify
         :return: True if the label exists, False otherwise.
         """
-        for type in self._tier_mapping.keys():
-            if label in self.tier_labels(type):
-                return True
-        else:
-            return False
+        return label in self._label_to_tier
+
+    def tier_type_for_label(self, label):
+        """ Function to return the tier type of a label.
+        :param label: str
+            The label to look up
+        :return: The tier type of the label or None if the label is not
+            mapped.
+        """
+        return self._label_to_tier.get(label, None)
 
 
 class AnnotationMapper(object):
 
     def __init__(self, source_type, destination_type):
         self._annotation_mappings = dict()
+        self._tag_index = dict()
+        self._validated_tags = dict()
         self.missing_tags = dict()
         file_name = '{0}_{1}.json'.format(poioapi.data.type_names[source_type],
                                           poioapi.data.type_names
@@ -243,9 +293,41 @@ class AnnotationMapper(object):
                             else:
                                 self._annotation_mappings[key] = []
                                 self._annotation_mappings[key].append((k, v))
+
+                self._build_tag_index()
             else:
                 raise IOError('File was not found')
 
+    def _build_tag_index(self):
+        """ This method builds a dictionary for each tier that maps the
+            upper case tags to their mapping, so that validate_tag does not
+            have to search the list of mappings. The tags of the N-1 tuple
+            keys are added one by one. If a tag matches more than one mapping
+            the first one wins, as in the list of mappings. The memoized
+            results of validate_tag are discarded.
+        """
+        self._tag_index = dict()
+        self._validated_tags = dict()
+
+        for tier_label, mappings in self._annotation_mappings.items():
+            if mappings is None:
+                continue
+
+            index = dict()
+            for key, val in mappings:
+                #handling the N-1 tag correspondence, the tags of the tuple
+                #are compared without case folding
+                if isinstance(key, tuple):
+                    for k in key:
+                        if k not in index:
+                            index[k] = val
+                else:
+                    k = key.upper()
+                    if k not in index:
+                        index[k] = val
+
+            self._tag_index[tier_label] = index
+
     def validate_tag(self, tier_label, tag_to_validate):
         """ This function validates if a tag is present in the specified tier
             tag mapping.
@@ -275,20 +357,20 @@ class AnnotationMapper(object):
                     self.missing_tags[tier_label].keys():
                 return None
 
+            #the results are memoized, both found and not found tags
+            validated_tags = self._validated_tags.get(tier_label, None)
+            if validated_tags is None:
+                validated_tags = self._validated_tags[tier_label] = dict()
+            elif tag_to_validate in validated_tags:
+                return validated_tags[tag_to_validate]
+
             #perform the validation
             value = None
-            if tier_label in self._annotation_mappings.keys() and \
-                            self._annotation_mappings[tier_label] is not None:
-                for key, val in self._annotation_mappings[tier_label]:
-                    #handling the N-1 tag correspondence
-                    if isinstance(key, tuple):
-                        if tag_to_validate.upper() in key:
-                            value = val
-                            break
-                    else:
-                        if tag_to_validate.upper() == key.upper():
-                            value = val
-                            break
+            if tier_label in self._tag_index:
+                value = self._tag_index[tier_label].get(
+                    tag_to_validate.upper(), None)
+
+            validated_tags[tag_to_validate] = value
         else:
             raise ValueError('You must specify a tag to validate.')
 
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+#
+# Poio Tools for Linguists
+#
+# Copyright (C) 2009-2014 Poio Project
+# Author: Peter Bouda <pbouda@cidles.eu>
+# URL: <http://media.cidles.eu/poio/>
+# For license information, see LICENSE.TXT
+
+"""This module contains the region tables of time aligned tiers. A region
+table stores the start and end times of all annotations of one tier in NumPy
+arrays sorted by start time, so that questions like "which annotations
+overlap with this time window" are answered with a binary search and a
+vectorized comparison instead of a walk over the nodes of the graph.
+
+NumPy is an optional dependency of Poio API, without it no region tables
+are built.
+
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class RegionTable(object):
+    """The time regions of the annotations of one tier.
+
+    Attributes
+    ----------
+    tier_name : str
+        The name of the tier, the prefix of its nodes.
+    starts : numpy.ndarray
+        The start times of the regions, sorted.
+    ends : numpy.ndarray
+        The end times of the regions, in the order of `starts`.
+    node_indices : numpy.ndarray
+        For each region the index of its node in `nodes`.
+    nodes : list of graf.Node
+        The nodes of the tier in the order in which they were added.
+    values : list
+        The annotation values of the nodes, in the order of `nodes`.
+    skipped_rows : int
+        The number of rows that `from_rows` left out because their anchors
+        are not numbers.
+
+    All queries treat regions as half-open intervals [start, end).
+
+    """
+
+    def __init__(self, tier_name, starts, ends, nodes, values):
+        if numpy is None:
+            raise ImportError("Region tables need NumPy.")
+
+        self.tier_name = tier_name
+        self.skipped_rows = 0
+        self.nodes = list(nodes)
+        self.values = list(values)
+
+        starts = numpy.asarray(starts, dtype=float)
+        ends = numpy.asarray(ends, dtype=float)
+
+        # A stable sort keeps regions with the same start in node order
+        order = numpy.argsort(starts, kind="mergesort")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.node_indices = order
+
+        # The running maximum of the end times is sorted, so the first region
+        # that may still be active at a time is found by a binary search
+        if len(self.ends) > 0:
+            self._max_ends = numpy.maximum.accumulate(self.ends)
+        else:
+            self._max_ends = self.ends
+
+        # The values are mapped to integer codes for the durations per value
+        codes = {}
+        self._value_codes = numpy.array(
+            [codes.setdefault(v, len(codes)) for v in self.values],
+            dtype=int)[order]
+        self._code_values = [None] * len(codes)
+        for v, c in codes.items():
+            self._code_values[c] = v
+
+    @classmethod
+    def from_rows(cls, tier_name, rows):
+        """Create a region table from a list of (anchors, node, value)
+        tuples, as they are collected by the GrAFConverter. The first two
+        anchors are the start and the end of the region. Rows whose anchors
+        are not numbers are left out and counted in `skipped_rows`.
+
+        Returns
+        -------
+        region_table : RegionTable
+            The region table or None if no anchors are numbers.
+
+        """
+
+        starts = []
+        ends = []
+        valid_rows = []
+        for row in rows:
+            try:
+                start = float(row[0][0])
+                end = float(row[0][1])
+            except (TypeError, ValueError, IndexError):
+                continue
+            starts.append(start)
+            ends.append(end)
+            valid_rows.append(row)
+
+        if len(valid_rows) == 0:
+            return None
+
+        region_table = cls(tier_name, starts, ends,
+                           [r[1] for r in valid_rows],
+                           [r[2] for r in valid_rows])
+        region_table.skipped_rows = len(rows) - len(valid_rows)
+        return region_table
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end):
+        """Return the indices of the regions that overlap with the time
+        window [start, end), ordered by the start of the regions.
+
+        Returns
+        -------
+        indices : numpy.ndarray
+            Indices into `starts` and `ends`.
+
+        """
+
+        first = numpy.searchsorted(self._max_ends, start, side="right")
+        last = numpy.searchsorted(self.starts, end, side="left")
+        if last <= first:
+            return numpy.arange(0)
+        mask = self.ends[first:last] > start
+        return numpy.nonzero(mask)[0] + first
+
+    def at(self, time):
+        """Return the indices of the regions that contain the given time,
+        ordered by the start of the regions.
+
+        """
+
+        first = numpy.searchsorted(self._max_ends, time, side="right")
+        last = numpy.searchsorted(self.starts, time, side="right")
+        if last <= first:
+            return numpy.arange(0)
+        mask = self.ends[first:last] > time
+        return numpy.nonzero(mask)[0] + first
+
+    def active_at(self, times):
+        """For each of the given times return the index of the last region
+        that starts at or before the time, if that region contains the
+        time, and -1 otherwise. For tiers without overlapping regions this
+        is the region at each time.
+
+        Parameters
+        ----------
+        times : array_like
+            The times to look up.
+
+        Returns
+        -------
+        indices : numpy.ndarray
+            One index or -1 for each time.
+
+        """
+
+        times = numpy.asarray(times, dtype=float)
+        indices = numpy.searchsorted(self.starts, times, side="right") - 1
+        valid = indices >= 0
+        valid[valid] = self.ends[indices[valid]] > times[valid]
+        return numpy.where(valid, indices, -1)
+
+    def nodes_for_indices(self, indices):
+        """Return the nodes for a list of indices of regions.
+
+        """
+
+        return [self.nodes[i] for i in self.node_indices[indices]]
+
+    def total_duration(self):
+        """Return the sum of the durations of all regions.
+
+        """
+
+        return float(numpy.sum(self.ends - self.starts))
+
+    def duration_by_value(self):
+        """Return the sum of the durations of the regions for each
+        annotation value.
+
+        Returns
+        -------
+        durations : dict
+            Maps the annotation values to their total duration.
+
+        """
+
+        totals = numpy.bincount(self._value_codes,
+            weights=self.ends - self.starts,
+            minlength=len(self._code_values))
+        return dict((v, float(totals[c]))
+                    for c, v in enumerate(self._code_values))
+
+
+def region_tables_for_rows(rows_for_tier, stats=None):
+    """Create the region tables for a dict that maps tier names to lists of
+    (anchors, node, value) tuples. Rows whose anchors are not numbers are
+    left out, tiers without any numeric anchors get no region table. The
+    number of rows that were left out is added as "skipped_regions" to the
+    optional poioapi.io.graf.ConversionStats object.
+
+    Returns
+    -------
+    region_tables : dict
+        The region tables by tier name, empty if NumPy is not installed.
+
+    """
+
+    region_tables = {}
+    if numpy is None:
+        return region_tables
+
+    for tier_name, rows in rows_for_tier.items():
+        if len(rows) == 0:
+            continue
+        region_table = RegionTable.from_rows(tier_name, rows)
+        if region_table is None:
+            skipped_rows = len(rows)
+        else:
+            region_tables[tier_name] = region_table
+            skipped_rows = region_table.skipped_rows
+
+        if stats is not None and skipped_rows > 0:
+            stats.add_count("skipped_regions", tier_name, skipped_rows)
+
+    return region_tables
@@ -11,6 +11,7 @@ import os
 
 import poioapi.io.elan
 import poioapi.io.graf
+import poioapi.data
 
 class TestElan:
     """
@@ -46,6 +47,20 @@ class TestElan:
 
         assert len(child_tier) == 2
 
+    def test_tier_mapping(self):
+        tier_mapper = self.elan.tier_mapping()
+
+        assert tier_mapper.tier_labels(poioapi.data.TIER_UTTERANCE) == \
+            ['utterance', 'gestures']
+        assert tier_mapper.tier_labels(poioapi.data.TIER_WORD) == \
+            ['words', 'gesture_phases']
+        assert tier_mapper.tier_labels(poioapi.data.TIER_TRANSLATION) == \
+            ['phonetic_transcription']
+        # the linguistic type "part of speech" is associated with the words
+        assert tier_mapper.tier_labels(poioapi.data.TIER_POS) == \
+            ['part_of_speech', 'gesture_meaning']
+        assert tier_mapper.tier_labels(poioapi.data.TIER_MORPHEME) == []
+
     def test_get_annotations_for_tier(self):
         root_tier = self.elan.get_root_tiers()[1] # W-Spch
         root_tier_annotations = self.elan.get_annotations_for_tier(root_tier)
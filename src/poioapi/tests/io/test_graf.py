@@ -8,6 +8,7 @@
 # For license information, see LICENSE.TXT
 
 import os
+import io
 
 import poioapi.io.elan
 import poioapi.io.graf
@@ -174,6 +175,20 @@ class TestGrAFConverter:
         assert len(annotation_spaces['word']) == 8
         assert len(annotation_spaces['graid']) == 8
 
+    def test_annotation_spaces_without_bulk_mode(self):
+        converter = poioapi.io.graf.GrAFConverter(SimpleParser(),
+            bulk_annotations=False)
+        converter.parse()
+
+        expected = [(s.as_id, [a.id for a in s])
+                    for s in self.graph.annotation_spaces]
+        result = [(s.as_id, [a.id for a in s])
+                  for s in converter.graf.annotation_spaces]
+
+        assert result == expected
+        for annotation in self.graph.annotation_spaces['word']:
+            assert annotation.aspace.as_id == 'word'
+
     def test_append_tier_hierarchies(self):
         filename = os.path.join(os.path.dirname(__file__), "..", "sample_files",
             "elan_graf", "example.eaf")
@@ -189,3 +204,135 @@ class TestGrAFConverter:
             ['phonetic_transcription..W-IPA']]
 
         assert expected_tier_hierarchies in converter.tier_hierarchies
+
+
+class TestConversionStats:
+    def setup(self):
+        self.parser = SimpleParser()
+        self.stats = poioapi.io.graf.ConversionStats()
+        self.converter = poioapi.io.graf.GrAFConverter(self.parser,
+            stats=self.stats)
+        self.converter.parse()
+
+    def test_counts(self):
+        assert self.stats.counts["annotations"] == 26
+        assert self.stats.counts["nodes"] == 26
+        assert self.stats.counts["edges"] == 24
+        assert "regions" not in self.stats.counts
+
+    def test_tier_counts(self):
+        assert self.stats.tiers["utterance"]["nodes"] == 2
+        assert self.stats.tiers["utterance"]["edges"] == 0
+        assert self.stats.tiers["word"]["annotations"] == 8
+        assert self.stats.tiers["graid"]["edges"] == 8
+
+    def test_timings(self):
+        for phase in [poioapi.io.graf.PHASE_PARSER,
+                      poioapi.io.graf.PHASE_NODES,
+                      poioapi.io.graf.PHASE_ANNOTATIONS,
+                      poioapi.io.graf.PHASE_HIERARCHY,
+                      poioapi.io.graf.PHASE_TOTAL]:
+            assert phase in self.stats.timings
+
+        assert poioapi.io.graf.PHASE_NODES in \
+            self.stats.tiers["word"]["timings"]
+
+    def test_as_dict(self):
+        stats = self.stats.as_dict()
+        assert stats["counts"]["nodes"] == 26
+        assert stats["tiers"]["wfw"]["nodes"] == 8
+
+
+class TestAnnotationRecord:
+    def setup(self):
+        self.record = poioapi.io.graf.AnnotationRecord(
+            poioapi.io.graf.Annotation("r1", "a b"))
+        self.record.add_annotation("word", "r1",
+            poioapi.io.graf.Annotation("w1", "a"))
+        self.record.add_annotations("word", "r1",
+            [poioapi.io.graf.Annotation("w2", "b")])
+        self.record.add_annotation("pos", "w2",
+            poioapi.io.graf.Annotation("p1", "N"))
+
+    def test_get_annotations_for_tier(self):
+        assert [a.id for a in self.record.get_annotations_for_tier("word")] \
+            == ["w1", "w2"]
+        assert [a.id for a in self.record.get_annotations_for_tier("pos",
+            "w2")] == ["p1"]
+        assert self.record.get_annotations_for_tier("pos", "w1") == []
+
+    def test_copy_annotations_to(self):
+        annotations_for_parent = {("r0", "word"): ["w0"]}
+        self.record.copy_annotations_to(annotations_for_parent)
+        self.record.copy_annotations_to(annotations_for_parent)
+
+        assert sorted(annotations_for_parent) == [("r0", "word"),
+            ("r1", "word"), ("w2", "pos")]
+        assert len(annotations_for_parent[("r1", "word")]) == 4
+
+
+class TestIterparseAndFree:
+    def test_iterparse_and_free(self):
+        source = io.BytesIO(b'<text xmlns="http://example.org/">'
+            b'<phrase><word/></phrase><phrase><word/><word/></phrase></text>')
+
+        root = None
+        phrases = []
+        nr_of_words = []
+        for event, element in poioapi.io.graf.iterparse_and_free(source,
+                set(["phrase"])):
+            if root is None:
+                root = element
+            if event == "end" and element.tag.endswith("phrase"):
+                # the phrase is complete until the iteration continues
+                phrases.append(element)
+                nr_of_words.append(len(element))
+
+        assert nr_of_words == [1, 2]
+        assert [len(phrase) for phrase in phrases] == [0, 0]
+        assert len(root) == 0
+
+
+class DeepParser(poioapi.io.graf.BaseParser):
+    """A parser with a chain of tiers that is deeper than the recursion
+    limit of Python.
+
+    """
+
+    depth = 3000
+
+    def __init__(self):
+        pass
+
+    def get_root_tiers(self):
+        return [poioapi.io.graf.Tier("t0")]
+
+    def get_child_tiers_for_tier(self, tier):
+        level = int(tier.name[1:])
+        if level < self.depth - 1:
+            return [poioapi.io.graf.Tier("t{0}".format(level + 1))]
+        return []
+
+    def get_annotations_for_tier(self, tier, annotation_parent=None):
+        return [poioapi.io.graf.Annotation(tier.name[1:], tier.name)]
+
+    def tier_has_regions(self, tier):
+        return False
+
+    def region_for_annotation(self, annotation):
+        pass
+
+    def get_primary_data(self):
+        pass
+
+
+class TestDeepHierarchy:
+    def test_parse(self):
+        converter = poioapi.io.graf.GrAFConverter(DeepParser())
+        converter.parse()
+
+        assert len(converter.graf.nodes) == DeepParser.depth
+        assert len(converter.graf.edges) == DeepParser.depth - 1
+        edge = converter.graf.edges['e2999']
+        assert edge.from_node.id == 't2998..n2998'
+        assert edge.to_node.id == 't2999..n2999'
@@ -8,8 +8,10 @@
 # For license information, see LICENSE.TXT
 
 import poioapi.io.latex
+import poioapi.data
 import poioapi.annotationgraph
 
+import io
 import os.path
 import filecmp
 
@@ -50,4 +52,62 @@ class TestWriter():
         writer.write(output, ag)
 
         assert(os.path.getsize(output) == os.path.getsize(expected))
-        assert(filecmp.cmp(output, expected, False))
\ No newline at end of file
+        assert(filecmp.cmp(output, expected, False))
+
+    def test_format_for_latex(self):
+        writer = poioapi.io.latex.Writer()
+
+        assert(writer._format_for_latex('a_b #1') == 'a\\_b \\#1')
+        assert(writer._format_for_latex('ʔa ʔa') ==
+               '\\textglotstop a \\textglotstop a')
+        assert(writer._preamble == {'tipa': ''})
+
+        # the double acute is combined with the character before it
+        assert(writer._format_for_latex('x\u030b') == '\\H{x}')
+        # unknown characters are replaced unless they end the text
+        assert(writer._format_for_latex('\u0378a \u0378') == '□a \u0378')
+        assert('latexsym' in writer._preamble)
+
+    def test_write_to_stream(self):
+        input = os.path.join(os.path.dirname(__file__), "..",
+            "sample_files", "mandinka", "mandinka_latex.txt")
+
+        expected = os.path.join(os.path.dirname(__file__), "..",
+            "sample_files", "latex", "mandinka_latex_expected.tex")
+
+        ag = poioapi.annotationgraph.AnnotationGraph()
+        ag = ag.from_mandinka(input)
+        writer = poioapi.io.latex.Writer()
+        output = io.BytesIO()
+        writer.write(output, ag)
+
+        with open(expected, "rb") as f:
+            assert(output.getvalue() == f.read())
+        assert(not output.closed)
+
+    def test_all_nodes_for_tier(self):
+        input = os.path.join(os.path.dirname(__file__), "..",
+            "sample_files", "toolbox_graf", "toolbox_latex.txt")
+
+        ag = poioapi.annotationgraph.AnnotationGraph()
+        ag = ag.from_toolbox(input)
+        writer = poioapi.io.latex.Writer()
+
+        words = []
+        for record in ag.root_nodes():
+            phrases = writer._all_nodes_for_tier(poioapi.data.TIER_UTTERANCE,
+                ag, record)
+            assert(len(phrases) > 0)
+
+            for phrase in phrases:
+                expected = []
+                for tag in ag.tier_mapper.tier_labels(poioapi.data.TIER_WORD):
+                    for node in ag.nodes_for_tier(tag, phrase):
+                        if node not in expected:
+                            expected.append(node)
+
+                words = writer._all_nodes_for_tier(poioapi.data.TIER_WORD,
+                    ag, phrase)
+                assert([n.id for n in words] == [n.id for n in expected])
+
+        assert(len(words) > 0)
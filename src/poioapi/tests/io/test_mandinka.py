@@ -68,4 +68,28 @@ class TestParser:
         tier_annotations = self.parser.get_annotations_for_tier(
             tier, annotation_parent)
 
-        assert len(tier_annotations) == 9
\ No newline at end of file
+        assert len(tier_annotations) == 9
+
+    def test_sanitize_line(self):
+        assert self.parser.sanitize_line(
+            '« A  lá\tmaañóo !  »\n') == '«A lá maañóo! »'
+        assert self.parser.sanitize_line('- Musukéebâa ... ') == \
+            'Musukéebâa...'
+        # only one whitespace character is removed after «
+        assert self.parser.sanitize_line('«  níŋ ?') == '« níŋ?'
+
+    def test_morphemes_and_glosses(self):
+        root_tiers = self.parser.get_root_tiers()
+        phrase = self.parser.get_annotations_for_tier(root_tiers[0])[0]
+        words = self.parser.get_annotations_for_tier(poioapi.io.graf.Tier(
+            poioapi.data.tier_labels[poioapi.data.TIER_WORD]), phrase)
+
+        morpheme_tier = poioapi.io.graf.Tier(
+            poioapi.data.tier_labels[poioapi.data.TIER_MORPHEME])
+        gloss_tier = poioapi.io.graf.Tier(
+            poioapi.data.tier_labels[poioapi.data.TIER_GLOSS])
+        for word in words:
+            for morpheme in self.parser.get_annotations_for_tier(
+                    morpheme_tier, word):
+                assert len(self.parser.get_annotations_for_tier(
+                    gloss_tier, morpheme)) > 0
@@ -11,6 +11,7 @@ from __future__ import unicode_literals
 
 import os
 import poioapi.io.obt
+import poioapi.io.graf
 
 class TestParser:
     """
@@ -55,3 +56,37 @@ class TestParser:
             tier, annotation_parent)
 
         assert len(tier_annotations) == 15
+
+    def test_iter_phrases(self):
+        phrases = poioapi.io.obt.Parser(self.filename,
+            streaming=True).iter_phrases()
+
+        phrase = next(phrases)
+        assert phrase.annotation.id == "a0"
+        assert len(phrase.words) == 15
+        assert phrase.words[1].value == "Strømsgodset-stallen"
+
+        variants = phrase.get_annotations_for_tier("variant",
+            phrase.words[1].id)
+        assert [v.value for v in variants] == \
+            ["Strømsgodset-stall", "Strømsgodset-stallen"]
+
+        tags = phrase.get_annotations_for_tier("tag", variants[0].id)
+        assert [t.value for t in tags] == ["subst", "appell", "mask", "be",
+            "ent", "samset", "<*>"]
+
+        assert len(list(phrases)) == 100
+
+    def test_streaming(self):
+        converter = poioapi.io.graf.GrAFConverter(self.parser)
+        converter.parse()
+
+        parser = poioapi.io.obt.Parser(self.filename, streaming=True)
+        streaming_converter = poioapi.io.graf.GrAFConverter(parser)
+        streaming_converter.parse()
+
+        assert [n.id for n in streaming_converter.graf.nodes] == \
+            [n.id for n in converter.graf.nodes]
+        assert streaming_converter.tier_hierarchies == \
+            converter.tier_hierarchies
+        assert len(parser._annotations_for_parent) == 0
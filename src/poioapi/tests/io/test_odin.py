@@ -91,4 +91,39 @@ class TestParser:
         assert len(glosses) == 7
 
         expected = ['the', 'Paulo', 'worked', 'more', 'than', 'what', 'nobody']
-        assert set(expected) == set([a.value for a in glosses])
\ No newline at end of file
+        assert set(expected) == set([a.value for a in glosses])
+
+    def test_sanitize_line(self):
+        self._parser._full_lang = 'Portuguese'
+
+        assert self._parser._sanitize_line(
+            '(1) a. O Paulo   trabalhou *mais (Costa 1998: 12)') == \
+            'O Paulo trabalhou mais'
+        assert self._parser._sanitize_line(
+            '2b)3. Portuguese: o [Paulo] DECL: x') == 'o Paulo'
+        assert self._parser._sanitize_line(
+            'ninguem (European Portuguese)') == 'ninguem'
+        assert self._parser._sanitize_line(
+            'Interviewer: o   Paulo\tcorreu?') == 'o Paulo correu'
+
+        assert self._parser._clean_translation_line(
+            " `Paulo worked.' ") == 'Paulo worked.'
+
+    def test_iter_sources(self):
+        parser = poioapi.io.odin.Parser(None)
+        sources = list(parser.iter_sources(self._inputfile))
+        assert len(sources) == 1
+        assert sources[0] is parser
+
+        assert parser.metadata['lang'] == self._parser.metadata['lang']
+        assert parser.metadata['a0'] == self._parser.metadata['a0']
+
+        utter = poioapi.io.graf.Tier(parser.tier_labels.tier_label(
+            poioapi.data.TIER_UTTERANCE))
+        root_annot = parser.get_annotations_for_tier(self._root_tier)
+        assert [a.id for a in root_annot] == ['a0']
+        utter_annots = parser.get_annotations_for_tier(utter, root_annot[0])
+        expected = self._parser.get_annotations_for_tier(utter,
+            self._parser.get_annotations_for_tier(self._root_tier)[0])
+        assert [(a.id, a.value) for a in utter_annots] == \
+            [(a.id, a.value) for a in expected]
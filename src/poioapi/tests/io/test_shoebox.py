@@ -66,3 +66,28 @@ class TestParser:
             tier, annotation_parent)
 
         assert len(tier_annotations) == 1
+
+    def test_iter_records(self):
+        records = list(self.parser.iter_records())
+
+        assert len(records) == 1
+
+        record = records[0]
+        assert record.annotation.id == "mjs3001revised"
+        assert record.name == "mjs1 The hyena and the rabbit"
+
+        words = record.words
+        assert len(words) == 12
+        assert words[0].value == "Baho"
+
+        morphemes = record.get_annotations_for_tier("m", words[2].id)
+        assert [m.value for m in morphemes] == ["di-", "fisi"]
+        assert [g.value for g in record.get_annotations_for_tier(
+            "g", morphemes[0].id)] == ["5-"]
+        # parts of speech with a "-" are skipped
+        assert [p.value for p in record.get_annotations_for_tier(
+            "p", words[2].id)] == ["n"]
+
+        assert [w.id for w in words] == [w.id for w in
+            self.parser.get_annotations_for_tier(
+                poioapi.io.graf.Tier("t"), record.annotation)]
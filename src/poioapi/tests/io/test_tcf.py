@@ -54,6 +54,22 @@ class TestParser:
         token_annotations = self.parser.get_annotations_for_tier(token_tier[0], parent_annotation)
         assert len(token_annotations) == 5
 
+        # "t1" must not match the tokens "t10" or "t11"
+        parent_annotation = poioapi.io.graf.Annotation("s2", "t10 t11")
+        token_annotations = self.parser.get_annotations_for_tier(token_tier[0], parent_annotation)
+        assert len(token_annotations) == 0
+
+        parent_annotation = poioapi.io.graf.Annotation("s2", "t6 t7 t8 t9")
+        token_annotations = self.parser.get_annotations_for_tier(token_tier[0], parent_annotation)
+        assert [a.id for a in token_annotations] == ["t6", "t7", "t8", "t9"]
+
+        pos_annotations = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("POStags"), token_annotations[0])
+        assert len(pos_annotations) == 1
+        lemma_annotations = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("lemmas"), token_annotations[0])
+        assert len(lemma_annotations) == 1
+
     def test_tier_has_regions(self):
         root_tiers = self.parser.get_root_tiers()
         assert self.parser.tier_has_regions(root_tiers[0])
@@ -64,6 +80,23 @@ class TestParser:
         region = self.parser.region_for_annotation(root_annotations[0])
         assert region == ('1', '20')
 
+    def test_region_for_annotation_without_offsets(self):
+        with open(self.filename, "rb") as f:
+            content = f.read()
+        (_, tmp_filename) = tempfile.mkstemp(suffix=".xml")
+        try:
+            with open(tmp_filename, "wb") as f:
+                f.write(content.replace(b'ID="s2" start="22" ', b'ID="s2" '))
+            parser = poioapi.io.tcf.Parser(tmp_filename)
+        finally:
+            os.remove(tmp_filename)
+
+        root_tiers = parser.get_root_tiers()
+        root_annotations = parser.get_annotations_for_tier(root_tiers[0])
+        assert parser.region_for_annotation(root_annotations[0]) == \
+            ('1', '20')
+        assert parser.region_for_annotation(root_annotations[1]) is None
+
 class TestWriter:
 
     def setup(self):
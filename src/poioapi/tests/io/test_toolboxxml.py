@@ -81,3 +81,27 @@ class TestParser:
         expected_regions = ('905.88', '917.4')
 
         assert regions == expected_regions
+
+    def test_iter_item_groups(self):
+        item_groups = list(self.parser.iter_item_groups())
+
+        assert len(item_groups) == 2
+
+        item_group = item_groups[0]
+        assert item_group.annotation.id == "013"
+        assert item_group.annotation.features == {"sp": "Kalsarap Namaf"}
+        assert item_group.regions["013:001"] == ('905.88', '917.4')
+
+        id_groups = item_group.id_groups
+        assert len(id_groups) == 29
+
+        tx_groups = item_group.get_annotations_for_tier("txGroup",
+            id_groups[0].id)
+        words = item_group.get_annotations_for_tier("tx", tx_groups[0].id)
+        assert [w.value for w in words] == ["Amurin"]
+        assert [m.value for m in item_group.get_annotations_for_tier(
+            "mg", words[0].id)] == ["1S.RS=", "want", "-TS", "-3S.O"]
+
+        assert [t.id for t in tx_groups] == [t.id for t in
+            self.parser.get_annotations_for_tier(
+                poioapi.io.graf.Tier("txGroup"), id_groups[0])]
@@ -44,7 +44,7 @@ class TestParser:
         self.xml_namespace = re.search('\{(.*)\}', self.root.tag).group()
 
     def test_phrase_nodes(self):
-        nodes_number = len(self.root.findall(self.xml_namespace+"phrase")) - 1
+        nodes_number = len(self.root.findall(self.xml_namespace+"phrase"))
 
         expected_nodes_number = 0
 
@@ -92,6 +92,67 @@ class TestParser:
 
         assert len(child_tier_annotations) == 10
 
+    def test_get_annotations_for_parent(self):
+        phrase = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("phrase"))[0]
+        assert phrase.id == "1818"
+
+        words = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("word"), phrase)
+        assert [(w.id, w.value) for w in words[:4]] == [("3", "Mpa"),
+            ("7", u"kɛseɛ"), ("10", u"nkɔ"), ("15", "dan")]
+
+        pos = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("pos"), words[0])
+        assert [(p.id, p.value) for p in pos] == [("4", "N")]
+
+        morphemes = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("morpheme"), words[0])
+        assert [(m.id, m.value) for m in morphemes] == [("5", "mpa")]
+
+        glosses = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("gloss"), morphemes[0])
+        assert [(g.id, g.value) for g in glosses] == [("6", "SBJ")]
+
+        # an annotation without children
+        assert self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("morpheme"), pos[0]) == []
+
+    def test_parse_phrase_ids(self):
+        phrases = self.parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("phrase"))
+
+        assert [p.id for p in phrases] == \
+            [p.annotation.id for p in self.parser.iter_phrases()]
+        assert len(set(p.id for p in phrases)) == 10
+
+    def test_iter_phrases(self):
+        phrases = list(self.parser.iter_phrases())
+
+        assert len(phrases) == 10
+
+        phrase = phrases[0]
+        assert phrase.annotation.id == "1818"
+        assert phrase.annotation.value == u"Mpa kɛseɛ nkɔ dan no mu"
+        assert phrase.annotation.features == {"valid": "VALID"}
+        assert [t.value for t in phrase.translations] == \
+            ["The big bed cannot enter the room"]
+
+        words = phrase.words
+        assert [w.value for w in words] == \
+            [u"Mpa", u"kɛseɛ", u"nkɔ", u"dan", u"nó", u"mu"]
+
+        morphemes = phrase.get_annotations_for_tier("morpheme", words[2].id)
+        assert [m.value for m in morphemes] == [u"n", u"kɔ"]
+        assert [g.value for g in phrase.get_annotations_for_tier(
+            "gloss", morphemes[0].id)] == ["NEG"]
+        assert [p.value for p in phrase.get_annotations_for_tier(
+            "pos", words[2].id)] == ["V"]
+
+        assert [w.id for w in words] == [w.id for w in
+            self.parser.get_annotations_for_tier(
+                poioapi.io.graf.Tier("word"), phrase.annotation)]
+
 
 class TestWriter:
 
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Poio Tools for Linguists
+#
+# Copyright (C) 2009-2014 Poio Project
+# URL: <http://media.cidles.eu/poio/>
+# For license information, see LICENSE.TXT
+
+from __future__ import unicode_literals
+
+import os
+import codecs
+import shutil
+import tempfile
+
+import nose.tools
+
+import poioapi.io.wikipedia_extractor
+import poioapi.io.graf
+
+extractor_output = """<xml>
+<doc id="12" url="http://bar.wikipedia.org/wiki?curid=12" title="Anarchismus">
+Da Anarchismus is a Theorie.<br/>
+Mia red'n boarisch.
+</doc>
+<doc id="25" url="http://bar.wikipedia.org/wiki?curid=25" title="Ösdareich">
+Ösdareich is a Land.
+</doc>
+</xml>
+"""
+
+
+class TestParser:
+    """
+    This class contain the test methods to the
+    class io/wikipedia_extractor.py.
+
+    """
+
+    def setup(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, "wiki.xml")
+        with codecs.open(self.filename, "w", "utf-8") as f:
+            f.write(extractor_output)
+
+    def teardown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_get_annotations_for_tier(self):
+        parser = poioapi.io.wikipedia_extractor.Parser(self.filename)
+        annotations = parser.get_annotations_for_tier(
+            poioapi.io.graf.Tier("doc"))
+
+        assert [a.id for a in annotations] == ["12", "25"]
+        assert annotations[1].features["title"] == "Ösdareich"
+        assert parser.region_for_annotation(annotations[0]) == (0, 51)
+        assert parser.region_for_annotation(annotations[1]) == (51, 74)
+
+    def test_streaming(self):
+        parser = poioapi.io.wikipedia_extractor.Parser(self.filename)
+        converter = poioapi.io.graf.GrAFConverter(parser)
+        converter.parse()
+
+        stream_parser = poioapi.io.wikipedia_extractor.Parser(self.filename,
+            streaming=True)
+        assert stream_parser.primary_data_file == \
+            os.path.join(self.tempdir, "wiki.txt")
+        stream_converter = poioapi.io.graf.GrAFConverter(stream_parser)
+        stream_converter.parse()
+
+        assert [n.id for n in stream_converter.graf.nodes] == \
+            [n.id for n in converter.graf.nodes]
+        assert [r.anchors for r in stream_converter.graf.regions] == \
+            [r.anchors for r in converter.graf.regions]
+        assert stream_parser.documents_map == parser.documents_map
+
+        primary_data = stream_converter.primary_data
+        assert primary_data.content is None
+        assert primary_data.filename == stream_parser.primary_data_file
+        with codecs.open(primary_data.filename, "r", "utf-8") as f:
+            assert f.read() == converter.primary_data.content
+
+    def test_primary_data_file_is_not_input(self):
+        filename = os.path.join(self.tempdir, "wiki.txt")
+        shutil.copy(self.filename, filename)
+
+        parser = poioapi.io.wikipedia_extractor.Parser(filename,
+            streaming=True)
+        assert parser.primary_data_file == \
+            os.path.join(self.tempdir, "wiki-primary.txt")
+        converter = poioapi.io.graf.GrAFConverter(parser)
+        converter.parse()
+
+        # the input file is still intact
+        with codecs.open(filename, "r", "utf-8") as f:
+            assert f.read() == extractor_output
+
+        nose.tools.assert_raises(ValueError,
+            poioapi.io.wikipedia_extractor.Parser, filename, True, filename)
@@ -10,9 +10,15 @@
 from __future__ import unicode_literals
 
 import os
+import shutil
+import tempfile
+
+import nose.tools
+from nose.plugins.skip import SkipTest
 
 from poioapi import data
 import poioapi.annotationgraph
+import poioapi.regions
 
 class TestAnnotationGraph:
     """
@@ -37,6 +43,94 @@ class TestAnnotationGraph:
         root_nodes = self.annotation_graph.root_nodes()
         assert(len(root_nodes) == 9)
 
+    def test_region_queries(self):
+        if poioapi.regions.numpy is None:
+            raise SkipTest("NumPy is not installed")
+
+        tier_name = 'Äußerung..P-Spch'
+        assert list(self.annotation_graph.region_tables) == [tier_name]
+
+        nodes = self.annotation_graph.nodes_at_time(3811, tier_name)
+        assert [n.id for n in nodes] == ['Äußerung..P-Spch..na2']
+
+        nodes = self.annotation_graph.nodes_overlapping(3000, 8000)
+        assert [n.id for n in nodes[tier_name]] == ['Äußerung..P-Spch..na1',
+            'Äußerung..P-Spch..na2', 'Äußerung..P-Spch..na3']
+
+        assert self.annotation_graph.duration_for_tier(tier_name) == 48340.0
+        durations = self.annotation_graph.duration_for_tier(tier_name,
+            by_value=True)
+        assert durations['dün akşam koşa koşa eve geldim'] == 3550.0
+
+        nose.tools.assert_raises(data.UnknownAnnotationTypeError,
+            self.annotation_graph.region_table, 'W-Words')
+
+    def test_slice_time(self):
+        annotation_graph = self.annotation_graph.slice_time(3000, 8000)
+
+        root_nodes = annotation_graph.root_nodes()
+        assert [n.id for n in root_nodes] == ['Äußerung..P-Spch..na1',
+            'Äußerung..P-Spch..na2', 'Äußerung..P-Spch..na3']
+        assert len(annotation_graph.graf.nodes) == 94
+        assert annotation_graph.tier_hierarchies == \
+            self.annotation_graph.tier_hierarchies
+
+        # the nodes and the meta information are copies
+        assert root_nodes[0] is not \
+            self.annotation_graph.graf.nodes['Äußerung..P-Spch..na1']
+        assert len(annotation_graph.meta_information.find('TIME_ORDER')) == 6
+        assert len(self.annotation_graph.meta_information.find(
+            'TIME_ORDER')) == 18
+        assert annotation_graph.root_tiers == \
+            self.annotation_graph.root_tiers
+        assert annotation_graph.root_tiers is not \
+            self.annotation_graph.root_tiers
+        assert annotation_graph.tier_hierarchies[0] is not \
+            self.annotation_graph.tier_hierarchies[0]
+        assert annotation_graph.primary_data is not \
+            self.annotation_graph.primary_data
+        annotation_graph.tier_mapper.append_to_tier_labels(
+            data.TIER_GLOSS, ['slice'])
+        assert not self.annotation_graph.tier_mapper.tier_label_exists('slice')
+
+        words = annotation_graph.nodes_for_tier('Wort..P-Word', root_nodes[1])
+        assert [annotation_graph.annotation_value_for_node(n) for n in words] \
+            == ['eve', 'geldiğimde', 'yağmur', 'başlamıştı']
+
+        assert len(self.annotation_graph.slice_time(60000, 70000).graf.nodes) \
+            == 0
+
+    def test_slice_time_to_elan(self):
+        annotation_graph = self.annotation_graph.slice_time(3000, 8000)
+
+        outputdir = tempfile.mkdtemp()
+        try:
+            outputfile = os.path.join(outputdir, 'slice.eaf')
+            annotation_graph.to_elan(outputfile)
+            result = poioapi.annotationgraph.AnnotationGraph.from_elan(
+                outputfile)
+        finally:
+            shutil.rmtree(outputdir)
+
+        assert sorted(n.id for n in result.graf.nodes) == \
+            sorted(n.id for n in annotation_graph.graf.nodes)
+        assert [n.links[0][0].anchors for n in result.root_nodes()] == \
+            [[40, 3590], [3810, 7450], [7700, 13170]]
+
+    def test_conversion_stats(self):
+        assert self.annotation_graph.conversion_stats is None
+
+        filename = os.path.abspath(os.path.join(os.path.dirname( __file__ ),
+            '..', '..', '..', 'example_data', 'turkish.eaf'))
+        stats = poioapi.io.graf.ConversionStats()
+        ag = poioapi.annotationgraph.AnnotationGraph.from_elan(filename,
+            stats=stats)
+
+        assert ag.conversion_stats is stats
+        assert stats.counts["nodes"] == len(ag.graf.nodes)
+        assert stats.counts["regions"] == len(ag.graf.regions)
+        assert stats.timings["total"] >= stats.timings["parser"]
+
     def test_nodes_for_tier(self):
         root_nodes = self.annotation_graph.root_nodes()
         nodes = self.annotation_graph.nodes_for_tier("Äußerung", root_nodes[0])
@@ -106,6 +200,47 @@ class TestAnnotationGraph:
             trimmed = set(original)
             assert len(original) == len(trimmed)
 
+    def test_tier_mapper_per_graph(self):
+        inputfile = os.path.join(os.path.dirname(__file__), 'sample_files',
+            'toolbox_graf', 'toolbox.txt')
+        ag = poioapi.annotationgraph.AnnotationGraph.from_toolbox(inputfile)
+
+        assert ag.tier_mapper.tier_labels(data.TIER_WORD) == ['tx', 't']
+        # the tier labels of Elan files are the file's linguistic types
+        assert self.annotation_graph.tier_mapper.tier_labels(
+            data.TIER_WORD) == ['Wort']
+        assert 'tier_mapper' not in vars(poioapi.annotationgraph.AnnotationGraph)
+
+    def test_iter_from_odin(self):
+        inputfile = os.path.join(os.path.dirname(__file__), 'sample_files',
+            'odin', 'odin_test.xml')
+        with open(inputfile, 'rb') as f:
+            content = f.read()
+        start = content.index(b'<source ')
+        end = content.index(b'</source>') + len(b'</source>')
+        source = content[start:end]
+
+        # a file with three copies of the source
+        outputdir = tempfile.mkdtemp()
+        try:
+            outputfile = os.path.join(outputdir, 'odin_sources.xml')
+            with open(outputfile, 'wb') as f:
+                f.write(content[:end] + source + source + content[end:])
+
+            annotation_graphs = list(poioapi.annotationgraph.AnnotationGraph
+                .iter_from_odin(outputfile))
+            ag = poioapi.annotationgraph.AnnotationGraph.from_odin(outputfile)
+        finally:
+            shutil.rmtree(outputdir)
+
+        assert len(annotation_graphs) == 3
+        assert [len(g.root_nodes()) for g in annotation_graphs] == [1, 1, 1]
+
+        node_ids = [n.id for g in annotation_graphs for n in g.graf.nodes]
+        assert len(node_ids) == len(set(node_ids))
+        assert len(node_ids) == len(ag.graf.nodes) == 3 * 472
+        assert set(node_ids) == set(n.id for n in ag.graf.nodes)
+
 class TestAnnotationGraphFilter:
 
     def setup(self):
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Poio Tools for Linguists
+#
+# Copyright (C) 2009-2014 Poio Project
+# Author: Peter Bouda <pbouda@cidles.eu>
+# URL: <http://media.cidles.eu/poio/>
+# For license information, see LICENSE.TXT
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+import poioapi.corpus
+import poioapi.data
+
+class TestCorpusFiles:
+    """
+    This class contain the test methods to the
+    class CorpusFiles in corpus.py.
+
+    """
+
+    def setup(self):
+        sample_files = os.path.join(os.path.dirname(__file__),
+            "sample_files")
+
+        self.corpus = poioapi.corpus.CorpusFiles()
+        self.corpus.add_item(os.path.join(sample_files, "typecraft_graf",
+            "typecraft_example.xml"), poioapi.data.TYPECRAFT)
+        self.corpus.add_item(os.path.join(sample_files, "mandinka",
+            "mandinka.txt"), poioapi.data.MANDINKA)
+
+    def test_add_item(self):
+        nose.tools.assert_raises(poioapi.data.UnknownFileFormatError,
+            self.corpus.add_item, "example.tex", poioapi.data.LATEX)
+        assert self.corpus.nr_of_files == 2
+
+    def test_words(self):
+        words = self.corpus.words()
+        all_words = list(words)
+
+        assert len(words) == len(all_words) == 211
+        assert words[0] == "Mpa"
+        assert words[-1] == "faata"
+
+        # indexes that cross the border between the files
+        for i in [85, 86, 87, -1, -211]:
+            assert words[i] == all_words[i]
+        nose.tools.assert_raises(IndexError, words.__getitem__, 211)
+
+        for s in [slice(78, 85), slice(10, 2, -3), slice(None, None, 50),
+                slice(100, 90)]:
+            assert len(words[s]) == len(all_words[s])
+            assert list(words[s]) == all_words[s]
+
+    def test_sents(self):
+        sents = self.corpus.sents()
+        assert len(sents) == 17
+        assert sents[-1][-1] == "faata"
+        assert sum(len(s) for s in sents) == 211
+
+    def test_tagged_sents(self):
+        tagged_sents = self.corpus.tagged_sents()
+        assert tagged_sents[0][:3] == [("Mpa", "N"), ("kɛseɛ", "ADJ"),
+            ("nkɔ", "V")]
+
+        tagged_words = self.corpus.tagged_words()
+        assert len(tagged_words) == 211
+        assert tagged_words[3] == ("dan", "N")
+
+    def test_iter_graphs(self):
+        filepaths = [f for f, _ in self.corpus.iter_graphs()]
+        assert filepaths == [f for f, _ in self.corpus.files]
+
+
+class TestCorpusGraphs:
+    """
+    This class contain the test methods to the
+    class CorpusGraphs in corpus.py.
+
+    """
+
+    def setup(self):
+        sample_files = os.path.join(os.path.dirname(__file__),
+            "sample_files")
+
+        self.corpus = poioapi.corpus.CorpusGraphs()
+        self.corpus.add_item(os.path.join(sample_files, "shoebox_graf",
+            "shoebox.xml"), poioapi.data.SHOEBOX)
+        self.corpus.add_item(os.path.join(sample_files, "elan_graf",
+            "example.eaf"), poioapi.data.EAF)
+
+    def test_add_item(self):
+        assert len(self.corpus) == 2
+        filepath, annotation_graph = self.corpus[1]
+        assert filepath.endswith("example.eaf")
+        assert len(annotation_graph.root_nodes()) > 0
+
+        nose.tools.assert_raises(poioapi.data.UnknownFileFormatError,
+            self.corpus.add_item, "example.tex", poioapi.data.LATEX)
+        assert len(self.corpus) == 2
+
+    def test_tier_names(self):
+        assert self.corpus.tier_names == set(["ref", "t", "p", "m", "g",
+            "utterance..K-Spch"])
+
+    def test_words(self):
+        words = self.corpus.words()
+        assert len(words) == 170
+        assert list(words[:3]) == ["Baho", "katali", "difisi"]
+        # the words of the Elan file follow the words of the Shoebox file,
+        # the tier types of the Elan file follow from its tier hierarchy, so
+        # the gesture phases are the words of the gestures
+        assert list(words[12:16]) == ["so", "you", "go", "out"]
+        assert words[-1] == "retraction"
+        assert self.corpus.tagged_words()[0] == ("Baho", "prn")
+
+
+class TestCorpusIndex:
+    """
+    This class contain the test methods to the
+    class CorpusIndex in corpus.py.
+
+    """
+
+    def setup(self):
+        sample_files = os.path.join(os.path.dirname(__file__),
+            "sample_files")
+
+        self.corpus_dir = tempfile.mkdtemp()
+        self.typecraft_file = os.path.join(self.corpus_dir,
+            "typecraft_example.xml")
+        self.mandinka_file = os.path.join(self.corpus_dir, "mandinka.txt")
+        shutil.copy(os.path.join(sample_files, "typecraft_graf",
+            "typecraft_example.xml"), self.typecraft_file)
+        shutil.copy(os.path.join(sample_files, "mandinka", "mandinka.txt"),
+            self.mandinka_file)
+
+        self.corpus = poioapi.corpus.CorpusFiles()
+        self.corpus.add_item(self.typecraft_file, poioapi.data.TYPECRAFT)
+        self.corpus.add_item(self.mandinka_file, poioapi.data.MANDINKA)
+
+        self.index_file = os.path.join(self.corpus_dir, "corpus_index.json")
+
+    def teardown(self):
+        shutil.rmtree(self.corpus_dir)
+
+    def test_tokens_for_value(self):
+        assert poioapi.corpus.tokens_for_value("«A lá maañóo!» ...") == \
+            ["a", "lá", "maañóo"]
+        # decomposed characters are composed
+        assert poioapi.corpus.tokens_for_value("maan\u0303o\u0301o") == \
+            ["maañóo"]
+
+    def test_query(self):
+        hits = self.corpus.query("word", "maañóo")
+        assert os.path.exists(self.index_file)
+        assert hits == [(self.mandinka_file, "phrase..na0"),
+            (self.mandinka_file, "phrase..na39"),
+            (self.mandinka_file, "phrase..na412")]
+
+        # all tokens of the text must be on the tier
+        assert self.corpus.query("phrase", "a lá") == \
+            [(self.mandinka_file, "phrase..na0")]
+        assert self.corpus.query("word", "mepɛ maañóo") == []
+        assert self.corpus.query("unknown", "mepɛ") == []
+
+        results = list(self.corpus.query_graphs("word", "mepɛ"))
+        assert len(results) == 1
+        filepath, annotation_graph, root_nodes = results[0]
+        assert filepath == self.typecraft_file
+        assert [n.id for n in root_nodes] == ["phrase..n35334"]
+
+    def test_query_tier_hierarchies(self):
+        # the words of the Elan file are not in the first tier hierarchy
+        sample_files = os.path.join(os.path.dirname(__file__),
+            "sample_files")
+        elan_file = os.path.join(self.corpus_dir, "example.eaf")
+        shutil.copy(os.path.join(sample_files, "elan_graf", "example.eaf"),
+            elan_file)
+        self.corpus.add_item(elan_file, poioapi.data.EAF)
+
+        hits = self.corpus.query("words..W-Words", "so")
+        assert len(hits) > 0
+        assert all(f == elan_file for f, _ in hits)
+        assert all(node_id.startswith("utterance..W-Spch..")
+            for _, node_id in hits)
+
+        corpus_index = poioapi.corpus.CorpusIndex(self.index_file)
+        assert "part_of_speech..W-POS" in corpus_index.tier_names
+        assert "utterance..K-Spch" in corpus_index.tier_names
+
+    def test_update(self):
+        self.corpus.index()
+
+        corpus_index = poioapi.corpus.CorpusIndex(self.index_file)
+        assert corpus_index.filepaths == sorted([self.typecraft_file,
+            self.mandinka_file])
+        assert "word" in corpus_index.tier_names
+        mtime = os.path.getmtime(self.typecraft_file)
+        assert corpus_index.is_current(self.typecraft_file, mtime)
+
+        # changed files are indexed again, removed files are removed
+        os.utime(self.typecraft_file, (mtime + 10, mtime + 10))
+        del self.corpus.files[1]
+        corpus_index = self.corpus.index()
+        assert corpus_index.is_current(self.typecraft_file, mtime + 10)
+        assert corpus_index.filepaths == [self.typecraft_file]
+        assert corpus_index.query("word", "maañóo") == []
+        assert len(corpus_index.query("word", "mepɛ")) == 1
+
+    def test_empty_corpus(self):
+        corpus = poioapi.corpus.CorpusFiles()
+        assert corpus.query("word", "mepɛ") == []
+        nose.tools.assert_raises(ValueError, corpus.index)
+
+        # with an index file path the index of the empty corpus is updated
+        # and the files that are not in the corpus are removed
+        self.corpus.index()
+        assert corpus.query("word", "mepɛ", self.index_file) == []
+        assert poioapi.corpus.CorpusIndex(self.index_file).filepaths == []
+
+    def test_unreadable_index(self):
+        with open(self.index_file, "w") as f:
+            f.write('{"files": {')
+
+        corpus_index = self.corpus.index()
+        assert len(corpus_index.query("word", "mepɛ")) == 1
+        assert poioapi.corpus.CorpusIndex(self.index_file).filepaths == \
+            sorted([self.typecraft_file, self.mandinka_file])
+        # the temporary file of the index was renamed
+        assert sorted(os.listdir(self.corpus_dir)) == ["corpus_index.json",
+            "mandinka.txt", "typecraft_example.xml"]
+
+    def test_empty_tiers(self):
+        with open(self.typecraft_file, "rb") as f:
+            content = f.read()
+        with open(self.typecraft_file, "wb") as f:
+            f.write(content.replace(b"firi: can firi inflect like a verb?",
+                b""))
+
+        corpus_index = self.corpus.index()
+        assert "description" not in corpus_index.tier_names
+        assert "word" in corpus_index.tier_names
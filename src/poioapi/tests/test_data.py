@@ -30,28 +30,51 @@ class TestDataStructureType:
         self.data_structure_type = data.DataStructureType()
         self.data_structure_type_graid = data.DataStructureTypeGraid()
 
-    # def test_get_siblings_of_type(self):
-    #     """Raise an assertion if there's no siblings to return.
+    def test_get_siblings_of_type(self):
+        """Raise an assertion if there's no siblings to return.
 
-    #     Return all the siblings of a given type in the hierarchy
-    #     including the given type itself.
+        Return all the siblings of a given type in the hierarchy
+        including the given type itself.
 
-    #     Raises
-    #     ------
-    #     AssertionError
-    #         If the results there aren't the expected.
+        Raises
+        ------
+        AssertionError
+            If the results there aren't the expected.
+
+        """
+
+        # If the ann_type value equal like this
+        ann_type = 'utterance'
+
+        # The result expected should be
+        expected_result = ['utterance']
+
+        assert(self.data_structure_type.get_siblings_of_type(
+            ann_type) == expected_result)
+
+        assert(self.data_structure_type.get_siblings_of_type(
+            'word') == ['word', 'translation'])
+        assert(self.data_structure_type_graid.get_siblings_of_type(
+            'wfw') == ['wfw', 'graid1'])
 
-    #     """
+        nose.tools.assert_raises(data.UnknownAnnotationTypeError,
+            self.data_structure_type.get_siblings_of_type, 'gloss')
 
-    #     # If the ann_type value equal like this
-    #     ann_type = 'utterance'
+    def test_get_depth_of_type(self):
+        """Raise an assertion if the depth of a type is wrong.
 
-    #     # The result expected should be
-    #     expected_result = ['utterance']
-    #     print(self.data_structure_type.get_siblings_of_type(ann_type))
+        Raises
+        ------
+        AssertionError
+            If the results there aren't the expected.
 
-    #     assert(self.data_structure_type.get_siblings_of_type(
-    #         ann_type) == expected_result)
+        """
+
+        assert(self.data_structure_type.get_depth_of_type('utterance') == 0)
+        assert(self.data_structure_type.get_depth_of_type('translation') == 1)
+        assert(self.data_structure_type_graid.get_depth_of_type('wfw') == 3)
+        assert('wfw' in self.data_structure_type_graid)
+        assert('wfw' not in self.data_structure_type)
 
     def test_get_parents_of_type(self):
         """Raise an assertion if there's no parents to return.
@@ -200,4 +223,83 @@ class TestDataStructureType:
                            'comment']
 
         assert (self.data_structure_type._flatten_hierarchy_elements(
-            elements) == expected_result)
\ No newline at end of file
+            elements) == expected_result)
+
+class TestTierTree:
+    """
+    This class contain the test methods to the
+    class TierTree in data.py.
+
+    """
+
+    def setup(self):
+        self.tier_hierarchies = [
+            ['utterance..W-Spch',
+                ['words..W-Words',
+                    ['part_of_speech..W-POS']],
+                ['phonetic_transcription..W-IPA']],
+            ['comment..W-Comment']]
+        self.tier_tree = data.TierTree(self.tier_hierarchies)
+
+    def test_maps(self):
+        assert self.tier_tree.get_parent('utterance..W-Spch') is None
+        assert self.tier_tree.get_parent('part_of_speech..W-POS') == \
+            'words..W-Words'
+        assert self.tier_tree.get_children('utterance..W-Spch') == \
+            ['words..W-Words', 'phonetic_transcription..W-IPA']
+        assert self.tier_tree.get_children('part_of_speech..W-POS') == []
+        assert self.tier_tree.get_depth('part_of_speech..W-POS') == 2
+        assert self.tier_tree.roots == \
+            ['utterance..W-Spch', 'comment..W-Comment']
+
+    def test_order(self):
+        assert self.tier_tree.order == \
+            data.DataStructureType()._flatten_hierarchy_elements(
+                self.tier_hierarchies)
+        assert 'words..W-Words' in self.tier_tree
+        assert 'words' not in self.tier_tree
+
+    def test_unknown_tier(self):
+        nose.tools.assert_raises(data.UnknownAnnotationTypeError,
+            self.tier_tree.get_children, 'words')
+
+    def test_from_parent_list(self):
+        tiers_parent_list = [
+            ('utterance..W-Spch', None),
+            ('words..W-Words', 'utterance..W-Spch'),
+            ('part_of_speech..W-POS', 'words..W-Words'),
+            ('phonetic_transcription..W-IPA', 'utterance..W-Spch'),
+            ('comment..W-Comment', None)]
+
+        tier_tree = data.TierTree.from_parent_list(tiers_parent_list)
+
+        assert tier_tree.hierarchies == self.tier_hierarchies
+        assert tier_tree.children == self.tier_tree.children
+
+    def test_duplicate_tiers(self):
+        # the last occurrence of a tier wins, as in the recursive lookups
+        tier_tree = data.TierTree([
+            ['a', ['b', ['c']]],
+            ['d', ['c']]])
+        assert tier_tree.get_parent('c') == 'd'
+        assert tier_tree.get_depth('c') == 1
+        assert tier_tree.get_children('b') == []
+        assert tier_tree.get_children('d') == ['c']
+        assert tier_tree.order == ['a', 'b', 'c', 'd']
+
+    def test_tier_tree_for(self):
+        class Converter(object):
+            pass
+
+        converter = Converter()
+        converter.tier_hierarchies = self.tier_hierarchies
+        converter.tier_tree = self.tier_tree
+        assert data.tier_tree_for(converter) is self.tier_tree
+
+        # hierarchies that were changed in place get a new tree
+        self.tier_hierarchies[1].append(['note..W-Note'])
+        tier_tree = data.tier_tree_for(converter)
+        assert tier_tree is not self.tier_tree
+        assert tier_tree.get_parent('note..W-Note') == 'comment..W-Comment'
+        assert data.TierTree.signature_for([['a', 'b']]) != \
+            data.TierTree.signature_for([['a'], 'b'])
@@ -9,6 +9,7 @@
 
 import os.path
 import filecmp
+import threading
 
 import poioapi.mapper
 import poioapi.data
@@ -78,6 +79,48 @@ class TestTierMapper:
         assert tag_exists is True
         assert tag_not_exists is False
 
+        assert self._tm.tier_type_for_label('pos') == poioapi.data.TIER_POS
+        assert self._tm.tier_type_for_label('test') is None
+
+    def test_instances_do_not_share_mappings(self):
+        defaults = {poioapi.data.TIER_WORD: ['word']}
+        tm1 = poioapi.mapper.TierMapper(defaults)
+        tm2 = poioapi.mapper.TierMapper(defaults)
+
+        tm1.append_to_tier_labels(poioapi.data.TIER_WORD, ['tx'])
+        tm1.append_to_tier_labels(poioapi.data.TIER_GLOSS, ['ge'])
+
+        assert tm1.tier_labels(poioapi.data.TIER_WORD) == ['word', 'tx']
+        assert tm1.tier_label_exists('ge')
+        assert tm2.tier_labels(poioapi.data.TIER_WORD) == ['word']
+        assert not tm2.tier_label_exists('ge')
+        assert defaults == {poioapi.data.TIER_WORD: ['word']}
+        assert poioapi.mapper.TierMapper().tier_labels(
+            poioapi.data.TIER_WORD) == []
+
+        # changing the returned labels does not change the mapping
+        tm2.tier_labels(poioapi.data.TIER_WORD).append('tx')
+        assert tm2.tier_labels(poioapi.data.TIER_WORD) == ['word']
+        assert defaults == {poioapi.data.TIER_WORD: ['word']}
+
+    def test_concurrent_append(self):
+        self._tm = poioapi.mapper.TierMapper()
+
+        def append(i):
+            for j in range(50):
+                self._tm.append_to_tier_labels(poioapi.data.TIER_GLOSS,
+                    ['g{0}-{1}'.format(i, j)])
+
+        threads = [threading.Thread(target=append, args=(i,))
+                   for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(self._tm.tier_labels(poioapi.data.TIER_GLOSS)) == 200
+        assert self._tm.tier_label_exists('g3-49')
+
 
 
 class TestAnnotationMapper:
@@ -111,6 +154,45 @@ class TestAnnotationMapper:
         assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, tag_to_succeed) == '1SG')
         assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, multitag_to_succeed) == 'TEST')
 
+    def test_validate_tag_case_and_memo(self):
+        self._am = poioapi.mapper.AnnotationMapper(poioapi.data.MANDINKA, poioapi.data.TYPECRAFT)
+        self._am.load_mappings(self._sample_file)
+
+        assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, '1sg') == '1SG')
+        assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, 'NOTATAG') is None)
+        assert(self._am.validate_tag(poioapi.data.TIER_POS, '1SG') is None)
+
+        # a memoized tag that is added to the missing tags is not valid anymore
+        self._am.add_to_missing(poioapi.data.TIER_GLOSS, '1sg')
+        assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, '1sg') is None)
+        assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, '1SG') == '1SG')
+
+    def test_validate_tag_index(self):
+        self._am = poioapi.mapper.AnnotationMapper(poioapi.data.MANDINKA, poioapi.data.TYPECRAFT)
+        self._am.load_mappings(self._sample_file)
+
+        mappings = self._am.annotation_mappings[poioapi.data.TIER_GLOSS]
+        tags = []
+        for key, _ in mappings:
+            if isinstance(key, tuple):
+                tags.extend(key)
+            else:
+                tags.append(key)
+
+        # the index must give the same result as a search in the mappings
+        for tag in tags + [t.lower() for t in tags]:
+            expected = None
+            for key, val in mappings:
+                if isinstance(key, tuple):
+                    if tag.upper() in key:
+                        expected = val
+                        break
+                elif tag.upper() == key.upper():
+                    expected = val
+                    break
+
+            assert(self._am.validate_tag(poioapi.data.TIER_GLOSS, tag) == expected)
+
     def test_export(self):
         self._am = poioapi.mapper.AnnotationMapper(poioapi.data.MANDINKA, poioapi.data.TYPECRAFT)
         self._am.load_mappings(self._sample_file)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Poio Tools for Linguists
+#
+# Copyright (C) 2009-2014 Poio Project
+# Author: Peter Bouda <pbouda@cidles.eu>
+# URL: <http://media.cidles.eu/poio/>
+# For license information, see LICENSE.TXT
+
+"""This module contains the tests for the class RegionTable in the
+regions.py module.
+
+"""
+
+from __future__ import unicode_literals
+
+from nose.plugins.skip import SkipTest
+
+import poioapi.io.graf
+import poioapi.regions
+
+
+class TestRegionTable:
+
+    def setup(self):
+        if poioapi.regions.numpy is None:
+            raise SkipTest("NumPy is not installed")
+
+        # node "c" overlaps with the nodes "a" and "b"
+        self.region_table = poioapi.regions.RegionTable("tier",
+            [100, 0, 50, 300], [200, 100, 150, 400], ["b", "a", "c", "d"],
+            ["x", "y", "x", "y"])
+
+    def test_sorted(self):
+        assert list(self.region_table.starts) == [0, 50, 100, 300]
+        assert list(self.region_table.ends) == [100, 150, 200, 400]
+        assert self.region_table.nodes_for_indices([0, 1, 2, 3]) == \
+            ["a", "c", "b", "d"]
+
+    def test_overlapping(self):
+        overlapping = self.region_table.overlapping(90, 120)
+        assert self.region_table.nodes_for_indices(overlapping) == \
+            ["a", "c", "b"]
+
+        overlapping = self.region_table.overlapping(150, 300)
+        assert self.region_table.nodes_for_indices(overlapping) == ["b"]
+
+        assert len(self.region_table.overlapping(400, 500)) == 0
+
+    def test_at(self):
+        assert self.region_table.nodes_for_indices(
+            self.region_table.at(100)) == ["c", "b"]
+        assert self.region_table.nodes_for_indices(
+            self.region_table.at(0)) == ["a"]
+        assert len(self.region_table.at(250)) == 0
+
+    def test_active_at(self):
+        active = self.region_table.active_at([-10, 10, 120, 250, 350, 400])
+        assert list(active) == [-1, 0, 2, -1, 3, -1]
+
+    def test_durations(self):
+        assert self.region_table.total_duration() == 400.0
+        assert self.region_table.duration_by_value() == \
+            {"x": 200.0, "y": 200.0}
+
+    def test_from_rows(self):
+        region_table = poioapi.regions.RegionTable.from_rows("tier",
+            [((0, 10), "a", "x"), ((5, 20), "b", "y")])
+        assert list(region_table.ends) == [10, 20]
+
+        assert poioapi.regions.RegionTable.from_rows("tier",
+            [(("start", "end"), "a", "x")]) is None
+
+        # rows with anchors that are not numbers are skipped
+        region_table = poioapi.regions.RegionTable.from_rows("tier",
+            [((0, 10), "a", "x"), (("start", "end"), "b", "y"),
+             ((5, 20), "c", "y")])
+        assert region_table.nodes == ["a", "c"]
+        assert region_table.skipped_rows == 1
+
+    def test_region_tables_for_rows(self):
+        stats = poioapi.io.graf.ConversionStats()
+        region_tables = poioapi.regions.region_tables_for_rows({
+            "tier": [((0, 10), "a", "x"), ((None,), "b", "y")],
+            "text": [(("start", "end"), "c", "z")]}, stats)
+
+        assert list(region_tables) == ["tier"]
+        assert stats.counts["skipped_regions"] == 2
+        assert stats.tiers["tier"]["skipped_regions"] == 1
+        assert stats.tiers["text"]["skipped_regions"] == 1